@@ -1,65 +1,89 @@
 """
-Doodle Jump-like Gymnasium environment using Pygame.
+Doodle Jump-like Gymnasium environment.
 Coins, flying enemies, upward pellets (shoot), personas from YAML, and denser reward shaping.
+Simulation lives in doodle_jump_physics; pygame is only imported when rendering.
+Entities are kept in world coordinates: scrolling only moves the camera, and the camera offset is
+applied when building observations and drawing.
+Each step fills `reward_components` (unweighted REWARD_COMPONENTS terms); the scalar reward is their dot
+product with the persona's reward_weights(), so one rollout can be re-scored for any persona.
 """
 import os
 # Headless by default for training; visualize.py unsets this for display
 os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
 
+import pickle
 import random
-import pygame
+from dataclasses import dataclass, fields
+from functools import lru_cache
 import numpy as np
-import yaml
 from gymnasium import Env, spaces
 
+from envs.doodle_jump_physics import (
+    SCREEN_W, SCREEN_H, MOVE_ACCEL, JUMP_VELOCITY, MAX_PLATFORMS, INITIAL_PLATFORMS,
+    PLATFORM_HORIZONTAL_VAR, TIME_LIMIT, MAX_COINS, COIN_VERTICAL_OFFSET, MAX_ENEMIES, ENEMY_W,
+    ENEMY_SPEED, ENEMY_MIN_HEIGHT, PELLET_W, PELLET_H, PELLET_COOLDOWN,
+    Platform, Player, Coin, Enemy, Pellet, YIndex,
+    move_player, find_landing, is_standing, advance_pellets, advance_enemies, collect_coins, cull,
+)
+from envs.doodle_jump_state import STATE_DTYPE, as_record, pack_state, unpack_state
+from envs.doodle_jump_raster import (
+    COL_BG, COL_PLAT, COL_PLAYER, COL_COIN, COL_ENEMY, COL_PELLET, GRAY_COLORS, frame_shape, render_env,
+)
+from envs.doodle_jump_replay import EpisodeRecorder
+from envs.doodle_jump_profile import (
+    PH_ACTION, PH_PHYSICS, PH_LANDING, PH_COMBAT, PH_SCROLL, PH_COINS, PH_SPAWN, PH_CULL, PH_OBS,
+    C_PELLET_TESTS, C_ENEMY_TESTS, C_SPAWNED_PLATFORMS, C_SPAWNED_COINS, C_SPAWNED_ENEMIES, C_SPAWNED_PELLETS,
+    C_CULLED_PLATFORMS, C_CULLED_COINS, C_CULLED_ENEMIES, C_CULLED_PELLETS, StepProfiler, empty_profile,
+)
+
 # -------------------- Config load --------------------
 def _resolve_personas_path():
     here = os.path.dirname(os.path.abspath(__file__))
     candidate = os.path.normpath(os.path.join(here, "..", "configs", "personas.yaml"))
     return candidate
 
-def _load_personas():
+def _personas_cache_path(path):
+    return os.path.join(os.path.dirname(path), "__pycache__", os.path.basename(path) + ".pickle")
+
+@lru_cache(maxsize=None)
+def load_personas():
+    """
+    Parsed personas.yaml, loaded on first use. The parse is cached as a pickle under configs/__pycache__
+    keyed by the YAML's mtime and size, so later processes skip importing and running the YAML parser.
+    """
     path = _resolve_personas_path()
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cache = _personas_cache_path(path)
+    try:
+        with open(cache, "rb") as f:
+            cached_key, personas = pickle.load(f)
+        if cached_key == key:
+            return personas
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    import yaml
     with open(path, "r") as f:
-        return yaml.safe_load(f)
-
-PERSONAS = _load_personas()
-
-# -------------------- Game Constants --------------------
-SCREEN_W = 400
-SCREEN_H = 600
-
-GRAVITY = 0.42
-MOVE_ACCEL = 1.05
-FRICTION = 0.82
-JUMP_VELOCITY = -11.2
-
+        personas = yaml.safe_load(f)
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((key, personas), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)  # atomic, so concurrent workers never read a half-written cache
+    except OSError:
+        pass  # read-only checkout: just parse every time
+    return personas
+
+# -------------------- Persona defaults --------------------
 # Curriculum / ease
 PLATFORM_W_BASE = 120
-PLATFORM_H = 12
 PLAT_GAP_MIN_BASE = 36
 PLAT_GAP_MAX_BASE = 72
-MAX_PLATFORMS = 14
-INITIAL_PLATFORMS = 7
-PLATFORM_HORIZONTAL_VAR = 0.55
-
-TIME_LIMIT = 3000  # steps
 
-# Coins / Enemies / Pellets
-MAX_COINS = 6
-COIN_SIZE = 12
 COIN_SPAWN_P_BASE = 0.25
-COIN_VERTICAL_OFFSET = 28
-
-MAX_ENEMIES = 2
-ENEMY_W, ENEMY_H = 28, 22
-ENEMY_SPEED = 1.3
 ENEMY_SPAWN_P_BASE = 0.14
-ENEMY_MIN_HEIGHT = 160  # visible sooner
-
-PELLET_W, PELLET_H = 6, 12
-PELLET_SPEED = -10.0
-PELLET_COOLDOWN = 40
 
 # Rewards (defaults overridden by persona)
 REWARD_LAND = 0.6
@@ -74,75 +98,134 @@ PENALTY_PLATFORM_TIME = -0.03
 REWARD_HEIGHT_BONUS = 0.005
 REWARD_UPWARD_MOTION = 0.02
 REWARD_HORIZONTAL_ACTIVITY = 0.003
-
-COL_BG = (20, 20, 28)
-COL_PLAT = (60, 200, 120)
-COL_PLAYER = (240, 230, 80)
-COL_COIN = (255, 200, 0)
-COL_ENEMY = (220, 70, 70)
-COL_PELLET = (200, 220, 255)
-
-# -------------------- Entities --------------------
-class Platform:
-    __slots__ = ("x","y","w","h","pid")
-    _NEXT_ID = 0
-    def __init__(self, x, y, w=PLATFORM_W_BASE, h=PLATFORM_H):
-        self.x, self.y, self.w, self.h = x, y, w, h
-        self.pid = Platform._NEXT_ID
-        Platform._NEXT_ID += 1
-    def rect(self):
-        return pygame.Rect(int(self.x), int(self.y), self.w, self.h)
-
-class Player:
-    __slots__ = ("x","y","vx","vy","w","h","cooldown")
-    def __init__(self, x, y):
-        self.x, self.y = x, y
-        self.vx, self.vy = 0.0, 0.0
-        self.w, self.h = 26, 32
-        self.cooldown = 0
-    def rect(self):
-        return pygame.Rect(int(self.x), int(self.y), self.w, self.h)
-
-class Coin:
-    __slots__ = ("x","y","r")
-    def __init__(self, x, y, r=COIN_SIZE):
-        self.x, self.y, self.r = x, y, r
-    def rect(self):
-        return pygame.Rect(int(self.x - self.r), int(self.y - self.r), 2*self.r, 2*self.r)
-
-class Enemy:
-    __slots__ = ("x","y","w","h","vx")
-    def __init__(self, x, y, w=ENEMY_W, h=ENEMY_H, vx=ENEMY_SPEED):
-        self.x, self.y, self.w, self.h = x, y, w, h
-        self.vx = vx if random.random() < 0.5 else -vx
-    def rect(self):
-        return pygame.Rect(int(self.x), int(self.y), self.w, self.h)
-
-class Pellet:
-    __slots__ = ("x","y","w","h","vy")
-    def __init__(self, x, y, w=PELLET_W, h=PELLET_H, vy=PELLET_SPEED):
-        self.x, self.y, self.w, self.h, self.vy = x, y, w, h, vy
-    def rect(self):
-        return pygame.Rect(int(self.x), int(self.y), self.w, self.h)
+# shaping shared by every persona
+REWARD_NOVELTY = 0.2          # first landing on a platform
+PENALTY_RELAND = -0.05        # landing on the same platform again
+PENALTY_CAMPING = -0.02       # per step on a platform, times min(steps there, 150)
+REWARD_LEAVE_CAMP = 0.1       # leaving after camping >= 20 steps
+
+@dataclass(frozen=True)
+class PersonaConfig:
+    """Reward weights + level generation knobs for one persona (fields are the lower-cased YAML keys)."""
+    name: str = "survivor"
+    reward_land: float = REWARD_LAND
+    reward_climb_scale: float = REWARD_CLIMB_SCALE
+    reward_climb_cap: float = REWARD_CLIMB_CAP
+    reward_coin: float = REWARD_COIN
+    reward_kill: float = REWARD_KILL
+    penalty_death: float = PENALTY_DEATH
+    penalty_idle: float = PENALTY_IDLE
+    penalty_platform_time: float = PENALTY_PLATFORM_TIME
+    reward_height_bonus: float = REWARD_HEIGHT_BONUS
+    reward_upward_motion: float = REWARD_UPWARD_MOTION
+    coin_spawn_p: float = COIN_SPAWN_P_BASE
+    enemy_spawn_p: float = ENEMY_SPAWN_P_BASE
+    platform_w: int = PLATFORM_W_BASE
+    gap_min: int = PLAT_GAP_MIN_BASE
+    gap_max: int = PLAT_GAP_MAX_BASE
+
+    @classmethod
+    def from_dict(cls, name, values):
+        known = {f.name for f in fields(cls)}
+        return cls(name=name, **{k.lower(): v for k, v in values.items() if k.lower() in known})
+
+@lru_cache(maxsize=None)
+def persona_config(name):
+    """Frozen config for a persona name; unknown names fall back to survivor."""
+    personas = load_personas()
+    name = name if name in personas else "survivor"
+    return PersonaConfig.from_dict(name, personas[name])
+
+# -------------------- Reward components --------------------
+# unweighted per-step terms; reward = components @ reward_weights(cfg)
+REWARD_COMPONENTS = (
+    "activity",      # 1 while |vx| > 0.2
+    "idle",          # 1 on the idle action
+    "land",          # 1 on landing on a platform other than the last one
+    "novelty",       # 1 on first landing on a platform
+    "reland",        # 1 on landing on the last platform again
+    "camping",       # min(steps on this platform, 150) while standing still on it
+    "leave_camp",    # 1 on leaving a platform after camping >= 20 steps
+    "kill",          # enemies shot
+    "death",         # 1 on hitting an enemy or falling off the screen
+    "upward",        # 1 while moving up
+    "climb",         # new height in px, clipped at reward_climb_cap / reward_climb_scale
+    "height_bonus",  # 1 when a new max height is reached
+    "coin",          # coins collected
+)
+(R_ACTIVITY, R_IDLE, R_LAND, R_NOVELTY, R_RELAND, R_CAMPING, R_LEAVE_CAMP, R_KILL, R_DEATH, R_UPWARD, R_CLIMB,
+ R_HEIGHT_BONUS, R_COIN) = range(len(REWARD_COMPONENTS))
+
+@lru_cache(maxsize=None)
+def reward_weights(cfg):
+    """Read-only weight vector of a PersonaConfig over REWARD_COMPONENTS."""
+    w = np.array([REWARD_HORIZONTAL_ACTIVITY, cfg.penalty_idle, cfg.reward_land, REWARD_NOVELTY, PENALTY_RELAND,
+                  PENALTY_CAMPING, REWARD_LEAVE_CAMP, cfg.reward_kill, cfg.penalty_death, cfg.reward_upward_motion,
+                  cfg.reward_climb_scale, cfg.reward_height_bonus, cfg.reward_coin], dtype=np.float64)
+    w.flags.writeable = False
+    return w
+
+def climb_clip(cfg):
+    """Height gain (px) at which a step's climb reward hits reward_climb_cap."""
+    return cfg.reward_climb_cap / cfg.reward_climb_scale if cfg.reward_climb_scale else np.inf
+
+def rescore(components, personas):
+    """
+    Rewards of recorded `components` (..., len(REWARD_COMPONENTS)) under each persona (names or PersonaConfigs),
+    as (..., len(personas)). The level was generated by the persona that played it, and the climb term is clipped
+    at that persona's cap, so this is exact for personas sharing its reward_climb_cap / reward_climb_scale.
+    """
+    cfgs = [persona_config(p) if isinstance(p, str) else p for p in personas]
+    return np.asarray(components) @ np.stack([reward_weights(c) for c in cfgs], axis=1)
+
+def obs_kwargs(observation_space):
+    """DoodleJumpEnv obs_type/pixel_scale/frame_stack kwargs that reproduce `observation_space` (e.g. a model's)."""
+    if len(observation_space.shape) == 1:
+        return {"obs_type": "vector"}
+    stack, h, _ = observation_space.shape
+    return {"obs_type": "pixels", "pixel_scale": SCREEN_H // h, "frame_stack": stack}
 
 # -------------------- Env --------------------
 class DoodleJumpEnv(Env):
     metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 60}
 
-    def __init__(self, render_mode=None, seed=None, reward_preset="survivor"):
+    def __init__(self, render_mode=None, seed=None, reward_preset="survivor", reset_pool=None, render_scale=1,
+                 obs_type="vector", pixel_scale=5, frame_stack=4, profile=False,
+                 record=False):
         super().__init__()
         self.render_mode = render_mode
+        # rgb_array frames are (SCREEN_H//render_scale, SCREEN_W//render_scale, 3)
+        self.render_scale = render_scale
+        # optional ResetPool (envs/doodle_jump_reset_pool.py) of pre-generated initial worlds
+        self.reset_pool = reset_pool
         self.screen = None
         self.clock = None
-        self.preset_name = reward_preset if reward_preset in PERSONAS else "survivor"
-        self._apply_persona(PERSONAS[self.preset_name])
+        # per-phase step() timings/counters (envs/doodle_jump_profile.py); None = off, zero cost
+        self._profiler = StepProfiler() if profile else None
+        # seed/start state + actions of the current episode (envs/doodle_jump_replay.py); None = off
+        self._recorder = EpisodeRecorder() if record else None
+        # this step's unweighted reward terms (REWARD_COMPONENTS); overwritten in place every step
+        self.reward_components = np.zeros(len(REWARD_COMPONENTS), dtype=np.float64)
+        self.set_persona(reward_preset)
 
         # 0=left, 1=right, 2=idle, 3=shoot
         self.action_space = spaces.Discrete(4)
 
-        # 13D observation (added onPlatform flag)
-        high = np.ones((13,), dtype=np.float32)
-        self.observation_space = spaces.Box(low=-high, high=high, dtype=np.float32)
+        self.obs_type = obs_type
+        if obs_type == "vector":
+            # 13D observation (added onPlatform flag)
+            high = np.ones((13,), dtype=np.float32)
+            self.observation_space = spaces.Box(low=-high, high=high, dtype=np.float32)
+        elif obs_type == "pixels":
+            # last `frame_stack` grayscale frames at 1/pixel_scale resolution, oldest first; channel-first
+            # so SB3's CnnPolicy uses it as is (no VecTransposeImage / VecFrameStack copies)
+            self.pixel_scale = pixel_scale
+            self._frames = np.zeros((frame_stack, *frame_shape(pixel_scale, gray=True)), dtype=np.uint8)
+            self._frame_head = 0
+            self._frame_order = [np.roll(np.arange(frame_stack), -(i + 1)) for i in range(frame_stack)]
+            self.observation_space = spaces.Box(low=0, high=255, shape=self._frames.shape, dtype=np.uint8)
+        else:
+            raise ValueError(f"obs_type must be 'vector' or 'pixels', got {obs_type!r}")
 
         self._seed(seed)
         self._reset_game_state()
@@ -151,25 +234,37 @@ class DoodleJumpEnv(Env):
     def reset(self, *, seed=None, options=None):
         if seed is not None:
             self._seed(seed)
-        self._reset_game_state()
+        pool = self.reset_pool
+        if pool is not None and pool.persona == self.preset_name:
+            obs = pool.load(self, self._rnd.randrange(len(pool)))
+        else:
+            self._reset_game_state()
+            obs = self._reset_obs() if self.obs_type == "vector" else None
+        if self.obs_type == "pixels":
+            obs = self._pixel_obs(first=True)
+        if self._recorder is not None:
+            # a seed alone only reproduces a plain seeded reset; otherwise keep the full start state
+            if seed is not None and pool is None:
+                self._recorder.begin(seed)
+            else:
+                self._recorder.begin(None, self.get_state())
         if self.render_mode == "human":
             self._init_pygame()
-
-        # detect if starting exactly on a platform
-        prect = self.player.rect()
-        on_plat = any(
-            abs((self.player.y + self.player.h) - p.y) <= 2 and prect.colliderect(p.rect())
-            for p in self.platforms
-        )
-        return self._get_obs(on_plat), {"max_height": self.max_height, "persona": self.preset_name}
+        return obs, {"max_height": self.max_height, "persona": self.preset_name}
 
     def step(self, action):
         assert self.action_space.contains(action), "Invalid action"
+        prof = self._profiler
+        stats = None
+        if prof is not None:
+            prof.begin()
+            stats = prof.counts
         self.steps += 1
-        reward = 0.0
+        rc = self.reward_components
+        rc.fill(0.0)
 
         # Tiny activity bonus to prevent freezing
-        reward += REWARD_HORIZONTAL_ACTIVITY * (abs(self.player.vx) > 0.2)
+        rc[R_ACTIVITY] = abs(self.player.vx) > 0.2
 
         # --- Action handling ---
         if action == 0:      # left
@@ -177,150 +272,114 @@ class DoodleJumpEnv(Env):
         elif action == 1:    # right
             self.player.vx += MOVE_ACCEL
         elif action == 2:    # idle
-            reward += PENALTY_IDLE
+            rc[R_IDLE] = 1.0
         elif action == 3:    # shoot
             if self.player.cooldown <= 0:
                 px = self.player.x + self.player.w//2 - PELLET_W//2
                 py = self.player.y - PELLET_H
                 self.pellets.append(Pellet(px, py))
                 self.player.cooldown = PELLET_COOLDOWN
+                if prof is not None:
+                    prof.counts[C_SPAWNED_PELLETS] += 1
+        if prof is not None:
+            prof.lap(PH_ACTION)
 
-        # Physics
-        self.player.vx *= FRICTION
-        self.player.vx = max(-6.0, min(6.0, self.player.vx))
-        self.player.vy += GRAVITY
-
-        # Cooldown decrement
-        if self.player.cooldown > 0:
-            self.player.cooldown -= 1
+        # Physics + motion + horizontal wrap
+        move_player(self.player)
+        if prof is not None:
+            prof.lap(PH_PHYSICS)
 
         # Track platform "camping"
         self.platform_time = getattr(self, 'platform_time', 0)
         on_platform_now = False
 
-        # Apply motion
-        self.player.x += self.player.vx
-        self.player.y += self.player.vy
-
-        # Wrap horizontally
-        if self.player.x < -self.player.w:
-            self.player.x = SCREEN_W
-        elif self.player.x > SCREEN_W:
-            self.player.x = -self.player.w
-
         # --- Land on platforms ---
-        landed = False
         if self.player.vy > 0:  # descending
-            prect = self.player.rect()
-            for plat in self.platforms:
-                if prect.colliderect(plat.rect()):
-                    if (self.player.y + self.player.h - self.player.vy) <= plat.y + 4:
-                        self.player.y = plat.y - self.player.h
-                        self.player.vy = JUMP_VELOCITY
-                        landed = True
-                        on_platform_now = True
-                        # landing counters + anti-camping logic
-                        self.landings += 1
-                        if self.last_platform_pid is None or plat.pid != self.last_platform_pid:
-                            reward += REWARD_LAND
-                            if plat.pid not in self.visited_platforms:
-                                reward += 0.2  # novelty once per unique platform
-                                self.visited_platforms.add(plat.pid)
-                        else:
-                            reward -= 0.05  # same platform again
-                        self.last_platform_pid = plat.pid
-                        break
+            plat = find_landing(self.player, self.platforms, self._camera_top(), stats)
+            if plat is not None:
+                self.player.y = plat.y - self.player.h
+                self.player.vy = JUMP_VELOCITY
+                on_platform_now = True
+                # landing counters + anti-camping logic
+                self.landings += 1
+                if self.last_platform_pid is None or plat.pid != self.last_platform_pid:
+                    rc[R_LAND] = 1.0
+                    if plat.pid not in self.visited_platforms:
+                        rc[R_NOVELTY] = 1.0  # novelty once per unique platform
+                        self.visited_platforms.add(plat.pid)
+                else:
+                    rc[R_RELAND] = 1.0  # same platform again
+                self.last_platform_pid = plat.pid
         else:
             # detect "standing" on platform top (edge case)
-            prect = self.player.rect()
-            for plat in self.platforms:
-                if abs((self.player.y + self.player.h) - plat.y) <= 2 and prect.colliderect(plat.rect()):
-                    on_platform_now = True
-                    break
+            on_platform_now = is_standing(self.player, self.platforms, self._camera_top(), stats)
 
         # On-platform time (escalating penalty + leaving bonus)
         if on_platform_now and abs(self.player.vy) < 0.1:
             self.platform_time += 1
-            reward += -0.02 * min(self.platform_time, 150)
+            rc[R_CAMPING] = min(self.platform_time, 150)
         else:
             if getattr(self, "platform_time", 0) >= 20:
-                reward += 0.1  # tiny bonus for finally leaving a camp
+                rc[R_LEAVE_CAMP] = 1.0  # tiny bonus for finally leaving a camp
             self.platform_time = 0
+        if prof is not None:
+            prof.lap(PH_LANDING)
+            stats[C_PELLET_TESTS] += len(self.pellets) * len(self.enemies)
+            n_pellets = len(self.pellets)
 
         # --- Pellets & enemies ---
-        new_pellets = []
-        pellet_kills = 0
-        for pe in self.pellets:
-            pe.y += pe.vy
-            if pe.y + pe.h < 0:
-                continue
-            hit_idx = None
-            for ei, en in enumerate(self.enemies):
-                if pe.rect().colliderect(en.rect()):
-                    hit_idx = ei
-                    break
-            if hit_idx is not None:
-                pellet_kills += 1
-                self.enemies.pop(hit_idx)
-            else:
-                new_pellets.append(pe)
-        self.pellets = new_pellets
+        self.pellets, pellet_kills = advance_pellets(self.pellets, self.enemies, self._camera_top())
         if pellet_kills > 0:
-            reward += REWARD_KILL * pellet_kills
+            rc[R_KILL] = pellet_kills
+        if prof is not None:
+            # pellets that flew off the top (the rest of the missing ones hit an enemy)
+            stats[C_CULLED_PELLETS] += n_pellets - len(self.pellets) - pellet_kills
 
         terminated = False
-        for en in self.enemies:
-            en.x += en.vx
-            if en.x < -en.w:
-                en.x = SCREEN_W
-            elif en.x > SCREEN_W:
-                en.x = -en.w
-            if self.player.rect().colliderect(en.rect()):
-                reward += PENALTY_DEATH
-                terminated = True
-                break
+        if prof is not None:
+            stats[C_ENEMY_TESTS] += len(self.enemies)
+        if advance_enemies(self.enemies, self.player, self._camera_top()):
+            rc[R_DEATH] = 1.0
+            terminated = True
+        if prof is not None:
+            prof.lap(PH_COMBAT)
 
         # --- Camera scroll / honest climb reward ---
         if self.player.vy < -0.1:
-            reward += REWARD_UPWARD_MOTION
+            rc[R_UPWARD] = 1.0
 
-        if self.player.y < SCREEN_H * 0.4:
-            dy = SCREEN_H * 0.4 - self.player.y
-            self.player.y += dy
-            self._scroll(dy)
+        screen_y = self.player.y - self._camera_top()
+        if screen_y < SCREEN_H * 0.4:
+            self.global_camera_y -= SCREEN_H * 0.4 - screen_y
 
         new_max = min(self.max_height, self.global_camera_y)
         if new_max < self.max_height:
             delta = (self.max_height - new_max)
-            gain = min(delta * REWARD_CLIMB_SCALE, REWARD_CLIMB_CAP)
-            reward += gain
-            reward += REWARD_HEIGHT_BONUS
+            rc[R_CLIMB] = min(delta, self._climb_clip)
+            rc[R_HEIGHT_BONUS] = 1.0
             self.max_height = new_max
+        if prof is not None:
+            prof.lap(PH_SCROLL)
 
         # --- Coin collection ---
-        new_coins = []
-        coins_got = 0
-        prect = self.player.rect()
-        for c in self.coins:
-            if prect.colliderect(c.rect()):
-                coins_got += 1
-            else:
-                new_coins.append(c)
-        self.coins = new_coins
+        coins_got = collect_coins(self.player, self.coins, self._camera_top(), stats)
         if coins_got > 0:
-            reward += REWARD_COIN * coins_got
+            rc[R_COIN] = coins_got
+        if prof is not None:
+            prof.lap(PH_COINS)
 
-        # Maintain world & spawn
+        # Maintain world & spawn (laps PH_SPAWN / PH_CULL itself)
         self._ensure_platforms_and_objects()
 
         # --- Death by falling ---
-        if not terminated and self.player.y > SCREEN_H:
-            reward += PENALTY_DEATH
+        if not terminated and self.player.y - self._camera_top() > SCREEN_H:
+            rc[R_DEATH] = 1.0
             terminated = True
 
         truncated = (self.steps >= TIME_LIMIT)
+        reward = float(rc.dot(self._reward_w))  # ndarray.dot: half the overhead of @ on a 13-vector
 
-        obs = self._get_obs(on_platform_now)
+        obs = self._get_obs(on_platform_now) if self.obs_type == "vector" else self._pixel_obs()
         info = {
             "max_height": self.max_height,
             "steps": self.steps,
@@ -328,6 +387,10 @@ class DoodleJumpEnv(Env):
             "death": int(terminated),
             "platforms": self.landings,  # <- used by eval
         }
+        if prof is not None:
+            prof.lap(PH_OBS)
+        if self._recorder is not None:
+            self._recorder.step(action, reward, terminated)
         if self.render_mode == "human":
             self._render_frame()
         return obs, reward, terminated, truncated, info
@@ -339,42 +402,64 @@ class DoodleJumpEnv(Env):
                 self._init_pygame()
             self._render_frame()
         elif self.render_mode == "rgb_array":
-            if self.screen is None:
-                self._init_pygame(headless=True)
-            surface = self._draw_surface()
-            return pygame.surfarray.array3d(surface).swapaxes(0,1)
+            return render_env(self, scale=self.render_scale)
         else:
             return None
 
+    def render_into(self, out):
+        """Rasterize the current frame into a preallocated uint8 buffer (see envs/doodle_jump_raster.py)."""
+        return render_env(self, out, self.render_scale)
+
     def close(self):
         if self.screen is not None:
+            import pygame
             pygame.display.quit()
             pygame.quit()
             self.screen = None
 
-    # ------------- Internal Helpers -------------
-    def _apply_persona(self, p):
-        global REWARD_LAND, REWARD_CLIMB_SCALE, REWARD_CLIMB_CAP, REWARD_COIN, REWARD_KILL
-        global PENALTY_DEATH, PENALTY_IDLE, PENALTY_PLATFORM_TIME, REWARD_HEIGHT_BONUS
-        global REWARD_UPWARD_MOTION, COIN_SPAWN_P_BASE, ENEMY_SPAWN_P_BASE
-        global PLATFORM_W_BASE, PLAT_GAP_MIN_BASE, PLAT_GAP_MAX_BASE
-
-        REWARD_LAND = p["REWARD_LAND"]
-        REWARD_CLIMB_SCALE = p["REWARD_CLIMB_SCALE"]
-        REWARD_CLIMB_CAP = p["REWARD_CLIMB_CAP"]
-        REWARD_COIN = p["REWARD_COIN"]
-        REWARD_KILL = p["REWARD_KILL"]
-        PENALTY_DEATH = p["PENALTY_DEATH"]
-        PENALTY_IDLE = p["PENALTY_IDLE"]
-        PENALTY_PLATFORM_TIME = p["PENALTY_PLATFORM_TIME"]
-        REWARD_HEIGHT_BONUS = p["REWARD_HEIGHT_BONUS"]
-        REWARD_UPWARD_MOTION = p["REWARD_UPWARD_MOTION"]
-        COIN_SPAWN_P_BASE = p["COIN_SPAWN_P"]
-        ENEMY_SPAWN_P_BASE = p["ENEMY_SPAWN_P"]
-        PLATFORM_W_BASE = p["PLATFORM_W"]
-        PLAT_GAP_MIN_BASE = p["GAP_MIN"]
-        PLAT_GAP_MAX_BASE = p["GAP_MAX"]
+    # ------------- Persona -------------
+    def set_persona(self, name):
+        """Switch reward weights / level generation to another persona (takes effect immediately)."""
+        self.cfg = persona_config(name)
+        self.preset_name = self.cfg.name
+        self._reward_w = reward_weights(self.cfg)
+        self._climb_clip = climb_clip(self.cfg)
+
+    # ------------- Profiling -------------
+    def enable_profiling(self, on=True):
+        """Start (fresh) or stop per-phase step() profiling; see envs/doodle_jump_profile.py."""
+        self._profiler = StepProfiler() if on else None
+
+    def get_profile(self, reset=False):
+        """Accumulated phase times (ns) and counters as a plain dict; all zeros when profiling is off."""
+        prof = self._profiler
+        if prof is None:
+            return empty_profile()
+        out = prof.as_dict()
+        if reset:
+            prof.reset()
+        return out
+
+    # ------------- Recording -------------
+    def episode_record(self, tag=""):
+        """EpisodeRecord (seed or start state, persona, actions, outcome) of the current episode; needs record=True."""
+        if self._recorder is None:
+            raise RuntimeError("episode recording is off; build the env with record=True")
+        return self._recorder.record(self, tag)
+
+    # ------------- Snapshots -------------
+    def get_state(self):
+        """Full simulation state (incl. RNG) as one STATE_DTYPE record; `.tobytes()` for raw bytes."""
+        return pack_state(self, np.zeros((), dtype=STATE_DTYPE))[()]
+
+    def set_state(self, state):
+        """Restore a record (or its bytes) from get_state; stepping afterwards replays identically."""
+        unpack_state(self, as_record(state))
+        if self.obs_type == "pixels":
+            # the frame stack is not part of the snapshot; restart it from the restored frame
+            self._pixel_obs(first=True)
 
+    # ------------- Internal Helpers -------------
     def _seed(self, seed):
         if seed is None:
             seed = random.randint(0, 10_000_000)
@@ -382,13 +467,19 @@ class DoodleJumpEnv(Env):
         np.random.seed(seed)
 
     def _reset_game_state(self):
+        self._clear_game_state()
+        self._generate_initial_world()
+
+    def _clear_game_state(self):
         self.player = Player(SCREEN_W//2 - 13, SCREEN_H - 120)
-        self.platforms = []
-        self.coins = []
+        # platforms/coins are y-sorted indexes; enemies (<= MAX_ENEMIES) and pellets stay plain lists
+        self.platforms = YIndex()
+        self.coins = YIndex()
         self.enemies = []
         self.pellets = []
 
-        self.global_camera_y = SCREEN_H  # decreases as we go up
+        # world y of the bottom screen edge; decreases as we go up (world == screen coords at reset)
+        self.global_camera_y = SCREEN_H
         self.max_height = self.global_camera_y
         self.steps = 0
 
@@ -397,28 +488,41 @@ class DoodleJumpEnv(Env):
         self.last_platform_pid = None
         self.visited_platforms = set()
         self.platform_time = 0
+        self._next_pid = 0
 
+    def _generate_initial_world(self):
         # Seed ground stack
+        cfg = self.cfg
+        plat_w = cfg.platform_w
         y = SCREEN_H - 20
         for _ in range(INITIAL_PLATFORMS):
-            x = self._rnd.randint(0, SCREEN_W - PLATFORM_W_BASE)
-            self.platforms.append(Platform(x, y, w=PLATFORM_W_BASE))
+            x = self._rnd.randint(0, SCREEN_W - plat_w)
+            self._add_platform(x, y, plat_w)
             if self._rnd.random() < 0.5:
                 self._maybe_spawn_coin_near(x, y)
-            y -= self._rnd.randint(PLAT_GAP_MIN_BASE, PLAT_GAP_MAX_BASE)
+            y -= self._rnd.randint(cfg.gap_min, cfg.gap_max)
 
         # Safe platform under player
         safe_y = self.player.y + self.player.h + 6
-        center_x = max(0, min(SCREEN_W - PLATFORM_W_BASE, int(self.player.x + self.player.w/2 - PLATFORM_W_BASE/2)))
-        self.platforms.append(Platform(center_x, int(safe_y), w=PLATFORM_W_BASE))
+        center_x = max(0, min(SCREEN_W - plat_w, int(self.player.x + self.player.w/2 - plat_w/2)))
+        self._add_platform(center_x, int(safe_y), plat_w)
+        self._last_spawn_x = center_x
+
+    def _add_platform(self, x, y, w):
+        # pids are per env (not process-global) so a restored snapshot keeps numbering identically
+        self.platforms.add(Platform(x, y, w=w, pid=self._next_pid))
+        self._next_pid += 1
 
     def _maybe_spawn_coin_near(self, px, py):
         if len(self.coins) >= MAX_COINS:
             return
-        if self._rnd.random() < COIN_SPAWN_P_BASE:
-            cx = int(px + PLATFORM_W_BASE//2 + self._rnd.randint(-PLATFORM_W_BASE//3, PLATFORM_W_BASE//3))
-            cy = int(py - COIN_VERTICAL_OFFSET)
-            self.coins.append(Coin(cx, cy))
+        if self._rnd.random() < self.cfg.coin_spawn_p:
+            plat_w = self.cfg.platform_w
+            cx = int(px + plat_w//2 + self._rnd.randint(-plat_w//3, plat_w//3))
+            # truncate on screen, as when entities lived in screen coordinates (and as DoodleJumpVecEnv does)
+            top = self._camera_top()
+            cy = int(py - COIN_VERTICAL_OFFSET - top) + top
+            self.coins.add(Coin(cx, cy))
 
     def _maybe_spawn_enemy_near(self, py):
         if len(self.enemies) >= MAX_ENEMIES:
@@ -426,54 +530,82 @@ class DoodleJumpEnv(Env):
         # earlier visibility
         if self.global_camera_y > SCREEN_H - (ENEMY_MIN_HEIGHT // 2):
             return
-        if self._rnd.random() < ENEMY_SPAWN_P_BASE:
+        if self._rnd.random() < self.cfg.enemy_spawn_p:
             ex = self._rnd.randint(0, SCREEN_W - ENEMY_W)
-            ey = int(py - self._rnd.randint(30, 90))
-            self.enemies.append(Enemy(ex, ey))
+            top = self._camera_top()
+            ey = int(py - self._rnd.randint(30, 90) - top) + top  # screen-space truncation, as for coins
+            vx = ENEMY_SPEED if self._rnd.random() < 0.5 else -ENEMY_SPEED
+            self.enemies.append(Enemy(ex, ey, vx=vx))
 
     def _ensure_platforms_and_objects(self):
+        cfg = self.cfg
+        prof = self._profiler
+        if prof is not None:
+            n_plats, n_coins, n_enemies = len(self.platforms), len(self.coins), len(self.enemies)
         while len(self.platforms) < MAX_PLATFORMS:
-            top_y = min(p.y for p in self.platforms) if self.platforms else SCREEN_H
-            new_y = top_y - self._rnd.randint(PLAT_GAP_MIN_BASE, PLAT_GAP_MAX_BASE)
+            top_y = self.platforms.top_y() if self.platforms else self.global_camera_y
+            new_y = top_y - self._rnd.randint(cfg.gap_min, cfg.gap_max)
 
-            prev_x = self.platforms[-1].x if self.platforms else SCREEN_W/2
+            # x of the most recently spawned platform
+            prev_x = self._last_spawn_x if self.platforms else SCREEN_W/2
             max_x_diff = int(SCREEN_W * PLATFORM_HORIZONTAL_VAR)
             x_offset = self._rnd.randint(-max_x_diff, max_x_diff)
-            x = max(0, min(SCREEN_W - PLATFORM_W_BASE, prev_x + x_offset))
+            x = max(0, min(SCREEN_W - cfg.platform_w, prev_x + x_offset))
 
-            self.platforms.append(Platform(x, new_y, w=PLATFORM_W_BASE))
+            self._add_platform(x, new_y, cfg.platform_w)
+            self._last_spawn_x = x
             self._maybe_spawn_coin_near(x, new_y)
             self._maybe_spawn_enemy_near(new_y)
 
+        if prof is not None:
+            counts = prof.counts
+            counts[C_SPAWNED_PLATFORMS] += len(self.platforms) - n_plats
+            counts[C_SPAWNED_COINS] += len(self.coins) - n_coins
+            counts[C_SPAWNED_ENEMIES] += len(self.enemies) - n_enemies
+            n_plats, n_coins, n_enemies, n_pellets = (len(self.platforms), len(self.coins), len(self.enemies),
+                                                      len(self.pellets))
+            prof.lap(PH_SPAWN)
+
         # Cull off-screen objects
-        self.platforms = [p for p in self.platforms if p.y < SCREEN_H + 40]
-        self.coins = [c for c in self.coins if c.y < SCREEN_H + 40]
-        self.enemies = [e for e in self.enemies if e.y < SCREEN_H + 40]
-        self.pellets = [pe for pe in self.pellets if pe.y + pe.h > -20]
+        self.enemies, self.pellets = cull(self.platforms, self.coins, self.enemies, self.pellets,
+                                          self._camera_top())
+        if prof is not None:
+            counts[C_CULLED_PLATFORMS] += n_plats - len(self.platforms)
+            counts[C_CULLED_COINS] += n_coins - len(self.coins)
+            counts[C_CULLED_ENEMIES] += n_enemies - len(self.enemies)
+            counts[C_CULLED_PELLETS] += n_pellets - len(self.pellets)
+            prof.lap(PH_CULL)
+
+    def _reset_obs(self):
+        # detect if starting exactly on a platform
+        return self._get_obs(is_standing(self.player, self.platforms, self._camera_top()))
 
-    def _scroll(self, dy):
-        for p in self.platforms:
-            p.y += dy
-        for c in self.coins:
-            c.y += dy
-        for e in self.enemies:
-            e.y += dy
-        for pe in self.pellets:
-            pe.y += dy
-        self.global_camera_y -= dy
+    def _camera_top(self):
+        # world y of the top screen edge: screen_y = world_y - _camera_top()
+        return self.global_camera_y - SCREEN_H
+
+    def _pixel_obs(self, first=False):
+        # ring buffer: draw the new frame over the oldest slot, then read the slots out oldest-first
+        self._frame_head = (self._frame_head + 1) % len(self._frames)
+        frame = render_env(self, self._frames[self._frame_head], self.pixel_scale, GRAY_COLORS)
+        if first:
+            self._frames[:] = frame
+        return self._frames.take(self._frame_order[self._frame_head], axis=0)
 
     def _get_obs(self, on_platform: bool = False):
         px_center = self.player.x + self.player.w / 2
         py_top = self.player.y
 
-        plats = sorted(self.platforms, key=lambda p: abs(p.y - py_top))[:2]
-        coin = min(self.coins, key=lambda c: abs(c.y - py_top)) if self.coins else None
+        # ties: older platform first, lower coin first (the old list-order behaviour)
+        plats = sorted(self.platforms.around(py_top, 2), key=lambda p: (abs(p.y - py_top), p.pid))[:2]
+        coins = self.coins.around(py_top, 1)
+        coin = min(coins, key=lambda c: (abs(c.y - py_top), -c.y)) if coins else None
         enemy = min(self.enemies, key=lambda e: abs(e.y - py_top)) if self.enemies else None
 
         vals = []
         # player (4)
         vals.append((px_center - SCREEN_W/2) / (SCREEN_W/2))
-        vals.append((py_top - SCREEN_H/2) / (SCREEN_H/2))
+        vals.append((py_top - self._camera_top() - SCREEN_H/2) / (SCREEN_H/2))
         vals.append(max(-1.0, min(1.0, self.player.vx/6.0)))
         vals.append(max(-1.0, min(1.0, self.player.vy/12.0)))
 
@@ -513,6 +645,7 @@ class DoodleJumpEnv(Env):
         return np.array(vals[:13], dtype=np.float32)
 
     def _init_pygame(self, headless=False):
+        import pygame
         if not pygame.get_init():
             pygame.init()
         if self.screen is None:
@@ -525,20 +658,23 @@ class DoodleJumpEnv(Env):
             self.clock = pygame.time.Clock()
 
     def _draw_surface(self):
+        import pygame
+        top = self._camera_top()
         surface = pygame.Surface((SCREEN_W, SCREEN_H))
         surface.fill(COL_BG)
         for p in self.platforms:
-            pygame.draw.rect(surface, COL_PLAT, p.rect(), border_radius=4)
+            pygame.draw.rect(surface, COL_PLAT, p.bounds(top), border_radius=4)
         for c in self.coins:
-            pygame.draw.circle(surface, COL_COIN, (int(c.x), int(c.y)), c.r)
+            pygame.draw.circle(surface, COL_COIN, (int(c.x), int(c.y - top)), c.r)
         for e in self.enemies:
-            pygame.draw.rect(surface, COL_ENEMY, e.rect(), border_radius=4)
+            pygame.draw.rect(surface, COL_ENEMY, e.bounds(top), border_radius=4)
         for pe in self.pellets:
-            pygame.draw.rect(surface, COL_PELLET, pe.rect(), border_radius=2)
-        pygame.draw.rect(surface, COL_PLAYER, self.player.rect(), border_radius=6)
+            pygame.draw.rect(surface, COL_PELLET, pe.bounds(top), border_radius=2)
+        pygame.draw.rect(surface, COL_PLAYER, self.player.bounds(top), border_radius=6)
         return surface
 
     def _render_frame(self):
+        import pygame
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -0,0 +1,231 @@
+"""
+Pure-Python physics core for DoodleJumpEnv: game constants, entities and collision phases.
+No pygame here -- collisions are inline AABB tests on the entities' __slots__ fields, using the same
+int-truncated rectangles pygame.Rect.colliderect would see, so headless training never loads SDL.
+Entity y values are world coordinates; `top` arguments are the camera's world y of the screen top,
+and rectangles are truncated in screen space (int(y - top)) as the on-screen rects were. Results match the old
+screen-space simulation up to float rounding: it added every scroll to every y, so exact ties (equal platform
+distances, a player resting exactly on a platform top) could come out a few ulps either way.
+"""
+from bisect import bisect_left, insort
+from operator import attrgetter
+
+# -------------------- Game Constants --------------------
+SCREEN_W = 400
+SCREEN_H = 600
+
+GRAVITY = 0.42
+MOVE_ACCEL = 1.05
+FRICTION = 0.82
+JUMP_VELOCITY = -11.2
+MAX_VX = 6.0
+PLAYER_W, PLAYER_H = 26, 32
+
+PLATFORM_W = 120
+PLATFORM_H = 12
+MAX_PLATFORMS = 14
+INITIAL_PLATFORMS = 7
+PLATFORM_HORIZONTAL_VAR = 0.55
+
+TIME_LIMIT = 3000  # steps
+
+MAX_COINS = 6
+COIN_SIZE = 12
+COIN_VERTICAL_OFFSET = 28
+
+MAX_ENEMIES = 2
+ENEMY_W, ENEMY_H = 28, 22
+ENEMY_SPEED = 1.3
+ENEMY_MIN_HEIGHT = 160  # visible sooner
+
+PELLET_W, PELLET_H = 6, 12
+PELLET_SPEED = -10.0
+PELLET_COOLDOWN = 40
+# A pellet lives ~60 steps and the cooldown is 40, so more than 2 are never in flight
+MAX_PELLETS = 4
+
+CULL_MARGIN = 40
+
+# -------------------- Entities --------------------
+class Platform:
+    __slots__ = ("x","y","w","h","pid")
+    def __init__(self, x, y, w=PLATFORM_W, h=PLATFORM_H, pid=0):
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.pid = pid
+    def bounds(self, top=0):
+        return (int(self.x), int(self.y - top), self.w, self.h)
+
+class Player:
+    __slots__ = ("x","y","vx","vy","w","h","cooldown")
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+        self.vx, self.vy = 0.0, 0.0
+        self.w, self.h = PLAYER_W, PLAYER_H
+        self.cooldown = 0
+    def bounds(self, top=0):
+        return (int(self.x), int(self.y - top), self.w, self.h)
+
+class Coin:
+    __slots__ = ("x","y","r")
+    def __init__(self, x, y, r=COIN_SIZE):
+        self.x, self.y, self.r = x, y, r
+    def bounds(self, top=0):
+        return (int(self.x - self.r), int(self.y - top - self.r), 2*self.r, 2*self.r)
+
+class Enemy:
+    __slots__ = ("x","y","w","h","vx")
+    def __init__(self, x, y, w=ENEMY_W, h=ENEMY_H, vx=ENEMY_SPEED):
+        self.x, self.y, self.w, self.h, self.vx = x, y, w, h, vx
+    def bounds(self, top=0):
+        return (int(self.x), int(self.y - top), self.w, self.h)
+
+class Pellet:
+    __slots__ = ("x","y","w","h","vy")
+    def __init__(self, x, y, w=PELLET_W, h=PELLET_H, vy=PELLET_SPEED):
+        self.x, self.y, self.w, self.h, self.vy = x, y, w, h, vy
+    def bounds(self, top=0):
+        return (int(self.x), int(self.y - top), self.w, self.h)
+
+# -------------------- Spatial index --------------------
+_y = attrgetter("y")
+
+class YIndex:
+    """
+    Entities kept sorted by y (top of the screen first). Indexed entities never move vertically in
+    world space, so the order only changes on add/cull; range, nearest and cull queries are bisects.
+    """
+    __slots__ = ("items",)
+    def __init__(self, items=()):
+        self.items = sorted(items, key=_y)
+    def __len__(self):
+        return len(self.items)
+    def __iter__(self):
+        return iter(self.items)
+    def __getitem__(self, i):
+        return self.items[i]
+    def add(self, e):
+        insort(self.items, e, key=_y)
+    def span(self, y_lo, y_hi):
+        """(start, stop) positions of the entities with y_lo <= y < y_hi."""
+        items = self.items
+        return bisect_left(items, y_lo, key=_y), bisect_left(items, y_hi, key=_y)
+    def around(self, y, k):
+        """Up to k entities on each side of y -- a superset of the k nearest in y."""
+        items = self.items
+        i = bisect_left(items, y, key=_y)
+        return items[max(0, i - k):i + k]
+    def top_y(self):
+        return self.items[0].y
+    def cull(self, limit):
+        """Drop every entity with y >= limit."""
+        del self.items[bisect_left(self.items, limit, key=_y):]
+
+# -------------------- Collision phases --------------------
+# slots in the optional `stats` counter list (a StepProfiler's counts, see doodle_jump_profile.COUNTERS)
+STAT_LANDING_TESTS, STAT_COIN_TESTS = 0, 3
+
+def collides(a, b, top=0):
+    """AABB overlap of two entities with x/y/w/h slots (pygame.Rect.colliderect semantics)."""
+    ax, ay, bx, by = int(a.x), int(a.y - top), int(b.x), int(b.y - top)
+    return ax < bx + b.w and bx < ax + a.w and ay < by + b.h and by < ay + a.h
+
+def move_player(pl):
+    """Friction, gravity, cooldown, motion and horizontal wrap for one frame."""
+    vx = pl.vx * FRICTION
+    pl.vx = vx = -MAX_VX if vx < -MAX_VX else (MAX_VX if vx > MAX_VX else vx)
+    pl.vy += GRAVITY
+    if pl.cooldown > 0:
+        pl.cooldown -= 1
+    pl.x += vx
+    pl.y += pl.vy
+    if pl.x < -pl.w:
+        pl.x = SCREEN_W
+    elif pl.x > SCREEN_W:
+        pl.x = -pl.w
+
+def find_landing(pl, platforms, top, stats=None):
+    """Oldest platform (lowest pid) the descending player lands on, or None."""
+    ax, ay, aw, ah = int(pl.x), int(pl.y - top), pl.w, pl.h
+    feet_before = pl.y + pl.h - pl.vy
+    start, stop = platforms.span(top + ay - PLATFORM_H - 1, top + ay + ah + 1)
+    if stats is not None:
+        stats[STAT_LANDING_TESTS] += stop - start
+    best = None
+    for p in platforms.items[start:stop]:
+        bx, by = int(p.x), int(p.y - top)
+        if ax < bx + p.w and bx < ax + aw and ay < by + p.h and by < ay + ah and feet_before <= p.y + 4:
+            if best is None or p.pid < best.pid:
+                best = p
+    return best
+
+def is_standing(pl, platforms, top, stats=None):
+    """True if the player's feet rest (within 2px) on top of an overlapping platform."""
+    ax, ay, aw, ah = int(pl.x), int(pl.y - top), pl.w, pl.h
+    feet = pl.y + pl.h
+    start, stop = platforms.span(feet - 2, feet + 3)
+    if stats is not None:
+        stats[STAT_LANDING_TESTS] += stop - start
+    for p in platforms.items[start:stop]:
+        if abs(feet - p.y) <= 2:
+            bx, by = int(p.x), int(p.y - top)
+            if ax < bx + p.w and bx < ax + aw and ay < by + p.h and by < ay + ah:
+                return True
+    return False
+
+def advance_pellets(pellets, enemies, top):
+    """Move pellets up; each one kills the first enemy it hits. Returns (surviving pellets, kills)."""
+    kept = []
+    kills = 0
+    for pe in pellets:
+        pe.y += pe.vy
+        if pe.y + pe.h < top:
+            continue
+        ax, ay, aw, ah = int(pe.x), int(pe.y - top), pe.w, pe.h
+        for ei, en in enumerate(enemies):
+            bx, by = int(en.x), int(en.y - top)
+            if ax < bx + en.w and bx < ax + aw and ay < by + en.h and by < ay + ah:
+                kills += 1
+                enemies.pop(ei)
+                break
+        else:
+            kept.append(pe)
+    return kept, kills
+
+def advance_enemies(enemies, pl, top):
+    """Move/wrap enemies in order; stops at (and returns True on) the first one touching the player."""
+    ax, ay, aw, ah = int(pl.x), int(pl.y - top), pl.w, pl.h
+    for en in enemies:
+        en.x += en.vx
+        if en.x < -en.w:
+            en.x = SCREEN_W
+        elif en.x > SCREEN_W:
+            en.x = -en.w
+        bx, by = int(en.x), int(en.y - top)
+        if ax < bx + en.w and bx < ax + aw and ay < by + en.h and by < ay + ah:
+            return True
+    return False
+
+def collect_coins(pl, coins, top, stats=None):
+    """Removes the coins touching the player from the index and returns how many there were."""
+    ax, ay, aw, ah = int(pl.x), int(pl.y - top), pl.w, pl.h
+    start, stop = coins.span(top + ay - 2*COIN_SIZE, top + ay + ah + 2*COIN_SIZE)
+    if stats is not None:
+        stats[STAT_COIN_TESTS] += stop - start
+    items = coins.items
+    got = 0
+    for i in range(stop - 1, start - 1, -1):
+        c = items[i]
+        r = c.r
+        bx, by = int(c.x - r), int(c.y - top - r)
+        if ax < bx + 2*r and bx < ax + aw and ay < by + 2*r and by < ay + ah:
+            del items[i]
+            got += 1
+    return got
+
+def cull(platforms, coins, enemies, pellets, top):
+    """Culls the indexed platforms/coins in place; returns the surviving (enemies, pellets) lists."""
+    limit = top + SCREEN_H + CULL_MARGIN
+    platforms.cull(limit)
+    coins.cull(limit)
+    return ([e for e in enemies if e.y < limit],
+            [pe for pe in pellets if pe.y + pe.h > top - 20])
@@ -0,0 +1,107 @@
+"""
+Opt-in per-phase profiling for DoodleJumpEnv.step.
+An env built with profile=True (or after enable_profiling()) holds a StepProfiler; step() laps a
+perf_counter_ns clock at each phase boundary and bumps a few counters (collision candidates tested, entities
+spawned and culled). With profiling off, the profiler is None and every hook is a single `is not None` test.
+Profiles are plain dicts, so they cross process boundaries (env_method) and can simply be summed.
+"""
+import time
+
+from envs.doodle_jump_physics import STAT_LANDING_TESTS, STAT_COIN_TESTS
+
+# step() phases, in execution order
+PHASES = ("action", "physics", "landing", "combat", "scroll", "coins", "spawn", "cull", "obs")
+(PH_ACTION, PH_PHYSICS, PH_LANDING, PH_COMBAT, PH_SCROLL, PH_COINS, PH_SPAWN, PH_CULL, PH_OBS) = range(len(PHASES))
+
+COUNTERS = (
+    "landing_tests",    # platforms scanned by find_landing / is_standing
+    "pellet_tests",     # pellet x enemy pairs considered
+    "enemy_tests",      # enemy x player pairs considered
+    "coin_tests",       # coins scanned by collect_coins
+    "spawned_platforms", "spawned_coins", "spawned_enemies", "spawned_pellets",
+    "culled_platforms", "culled_coins", "culled_enemies", "culled_pellets",
+)
+(C_LANDING_TESTS, C_PELLET_TESTS, C_ENEMY_TESTS, C_COIN_TESTS,
+ C_SPAWNED_PLATFORMS, C_SPAWNED_COINS, C_SPAWNED_ENEMIES, C_SPAWNED_PELLETS,
+ C_CULLED_PLATFORMS, C_CULLED_COINS, C_CULLED_ENEMIES, C_CULLED_PELLETS) = range(len(COUNTERS))
+# the physics helpers bump their own counters through the same list
+assert (C_LANDING_TESTS, C_COIN_TESTS) == (STAT_LANDING_TESTS, STAT_COIN_TESTS)
+
+
+class StepProfiler:
+    """Accumulated phase times (ns) and counters over all profiled steps."""
+    __slots__ = ("steps", "times", "counts", "_t")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.steps = 0
+        self.times = [0] * len(PHASES)
+        self.counts = [0] * len(COUNTERS)
+        self._t = 0
+
+    def begin(self):
+        self.steps += 1
+        self._t = time.perf_counter_ns()
+
+    def lap(self, phase):
+        """Charge the time since the previous begin/lap to `phase`."""
+        t = time.perf_counter_ns()
+        self.times[phase] += t - self._t
+        self._t = t
+
+    def as_dict(self):
+        return {"steps": self.steps,
+                "time_ns": dict(zip(PHASES, self.times)),
+                "counts": dict(zip(COUNTERS, self.counts))}
+
+
+def empty_profile():
+    return StepProfiler().as_dict()
+
+
+def merge_profiles(profiles):
+    """Sum profile dicts (e.g. one per env of a VecEnv) into one."""
+    total = empty_profile()
+    for p in profiles:
+        total["steps"] += p["steps"]
+        for k, v in p["time_ns"].items():
+            total["time_ns"][k] += v
+        for k, v in p["counts"].items():
+            total["counts"][k] += v
+    return total
+
+
+def summarize_profile(profile, prefix="profile/"):
+    """
+    Flat {name: value} for loggers: mean us per step and % share of each phase, counters per step,
+    and the profiled steps/sec (env time only).
+    """
+    steps = max(profile["steps"], 1)
+    total_ns = sum(profile["time_ns"].values())
+    out = {f"{prefix}steps": profile["steps"],
+           f"{prefix}step_us": total_ns / steps / 1e3,
+           f"{prefix}steps_per_sec": steps / (total_ns / 1e9) if total_ns else 0.0}
+    for phase, ns in profile["time_ns"].items():
+        out[f"{prefix}{phase}_us"] = ns / steps / 1e3
+        out[f"{prefix}{phase}_pct"] = 100.0 * ns / total_ns if total_ns else 0.0
+    for name, n in profile["counts"].items():
+        out[f"{prefix}{name}_per_step"] = n / steps
+    return out
+
+
+def vec_profile(vec_env, reset=True):
+    """Merged profile of every env in an SB3 VecEnv (DummyVecEnv, SubprocVecEnv, DoodleJumpShmVecEnv)."""
+    return merge_profiles(vec_env.env_method("get_profile", reset=reset))
+
+
+def format_profile(profile):
+    """Human-readable table of a (merged) profile."""
+    s = summarize_profile(profile, prefix="")
+    lines = [f"{profile['steps']} steps, {s['step_us']:.2f} us/step ({s['steps_per_sec']:.0f} steps/s in step())"]
+    for phase in PHASES:
+        lines.append(f"  {phase:<8s} {s[phase + '_us']:8.2f} us  {s[phase + '_pct']:5.1f}%")
+    for name in COUNTERS:
+        lines.append(f"  {name:<18s} {s[name + '_per_step']:8.3f} / step")
+    return "\n".join(lines)
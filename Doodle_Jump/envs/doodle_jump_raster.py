@@ -0,0 +1,144 @@
+"""
+Pure-NumPy rasterizer for rgb_array frames and pixel observations (no pygame / SDL).
+Shapes are filled straight into a caller-provided (H, W, 3) uint8 buffer -- or an (H, W) one with
+GRAY_COLORS -- and `scale` draws at 1/scale resolution (SCREEN_H//scale x SCREEN_W//scale). Rounded
+rectangles and circles use cached boolean masks, so a frame costs one background fill plus one masked
+write per entity.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from envs.doodle_jump_physics import SCREEN_W, SCREEN_H
+
+COL_BG = (20, 20, 28)
+COL_PLAT = (60, 200, 120)
+COL_PLAYER = (240, 230, 80)
+COL_COIN = (255, 200, 0)
+COL_ENEMY = (220, 70, 70)
+COL_PELLET = (200, 220, 255)
+# (background, platform, coin, enemy, pellet, player)
+RGB_COLORS = (COL_BG, COL_PLAT, COL_COIN, COL_ENEMY, COL_PELLET, COL_PLAYER)
+# pixel observations: evenly spaced levels rather than luma (pellet and player luma differ by 2)
+GRAY_COLORS = (0, 80, 160, 120, 200, 255)
+
+# border radii used by the pygame renderer
+RADIUS_PLAT, RADIUS_ENEMY, RADIUS_PELLET, RADIUS_PLAYER = 4, 4, 2, 6
+# pixel-centre distance test against (r - _EDGE); 0.2 best matches pygame's circles and rounded corners
+_EDGE = 0.2
+
+
+def frame_shape(scale=1, gray=False):
+    return (SCREEN_H // scale, SCREEN_W // scale) if gray else (SCREEN_H // scale, SCREEN_W // scale, 3)
+
+
+def new_frame(scale=1, n=None, gray=False):
+    """Preallocated frame buffer (or a batch of n) for the given downscale factor."""
+    shape = frame_shape(scale, gray)
+    return np.empty(shape if n is None else (n, *shape), dtype=np.uint8)
+
+
+@lru_cache(maxsize=None)
+def _background(shape, color):
+    bg = np.empty(shape, dtype=np.uint8)
+    bg[...] = color
+    bg.flags.writeable = False
+    return bg
+
+
+@lru_cache(maxsize=None)
+def _rounded_mask(w, h, r):
+    r = min(r, w // 2, h // 2)
+    mask = np.ones((h, w), dtype=bool)
+    if r > 0:
+        # quarter-disc test on pixel centres, mirrored into all four corners
+        d = np.arange(r) + 0.5 - r
+        corner = d[:, None] ** 2 + d[None, :] ** 2 > (r - _EDGE) ** 2
+        mask[:r, :r] &= ~corner
+        mask[:r, w - r:] &= ~corner[:, ::-1]
+        mask[h - r:, :r] &= ~corner[::-1, :]
+        mask[h - r:, w - r:] &= ~corner[::-1, ::-1]
+    mask.flags.writeable = False
+    return mask
+
+
+@lru_cache(maxsize=None)
+def _disc_mask(r):
+    d = np.arange(-r, r) + 0.5
+    mask = d[:, None] ** 2 + d[None, :] ** 2 <= (r - _EDGE) ** 2
+    mask.flags.writeable = False
+    return mask
+
+
+def _blit(buf, x, y, mask, color):
+    """Write `color` where `mask` is set, with the mask's top-left at (x, y); clipped to buf."""
+    h, w = mask.shape
+    H, W = buf.shape[:2]
+    x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, W), min(y + h, H)
+    if x0 >= x1 or y0 >= y1:
+        return
+    region, m = buf[y0:y1, x0:x1], mask[y0 - y:y1 - y, x0 - x:x1 - x]
+    if buf.ndim == 2:
+        region[m] = color
+        return
+    # one scalar write per channel is several times faster than broadcasting an RGB triple through a mask
+    for k in range(3):
+        region[..., k][m] = color[k]
+
+
+def _fill_rect(buf, rect, radius, color, scale):
+    x, y, w, h = rect
+    if scale != 1:
+        x, y, w, h, radius = x // scale, y // scale, max(1, w // scale), max(1, h // scale), radius // scale
+    if radius <= 0:
+        H, W = buf.shape[:2]
+        buf[max(y, 0):min(y + h, H), max(x, 0):min(x + w, W)] = color
+    else:
+        _blit(buf, x, y, _rounded_mask(w, h, radius), color)
+
+
+def draw_frame(out, player, platforms=(), coins=(), enemies=(), pellets=(), scale=1, colors=RGB_COLORS):
+    """
+    Fill `out` (frame_shape(scale), uint8) with one scene. Rects are (x, y, w, h) and coins
+    (cx, cy, r), all in integer screen pixels at full resolution. Returns `out`.
+    """
+    bg, plat, coin, enemy, pellet, player_col = colors
+    np.copyto(out, _background(out.shape, bg))
+    for rect in platforms:
+        _fill_rect(out, rect, RADIUS_PLAT, plat, scale)
+    for cx, cy, r in coins:
+        if scale != 1:
+            cx, cy, r = cx // scale, cy // scale, max(1, r // scale)
+        _blit(out, cx - r, cy - r, _disc_mask(r), coin)
+    for rect in enemies:
+        _fill_rect(out, rect, RADIUS_ENEMY, enemy, scale)
+    for rect in pellets:
+        _fill_rect(out, rect, RADIUS_PELLET, pellet, scale)
+    _fill_rect(out, player, RADIUS_PLAYER, player_col, scale)
+    return out
+
+
+def render_env(env, out=None, scale=1, colors=RGB_COLORS):
+    """Rasterize a DoodleJumpEnv into `out` (allocated if None)."""
+    if out is None:
+        out = new_frame(scale, gray=colors is GRAY_COLORS)
+    top = env._camera_top()
+    return draw_frame(
+        out,
+        env.player.bounds(top),
+        platforms=[p.bounds(top) for p in env.platforms],
+        coins=[(int(c.x), int(c.y - top), c.r) for c in env.coins],
+        enemies=[e.bounds(top) for e in env.enemies],
+        pellets=[pe.bounds(top) for pe in env.pellets],
+        scale=scale,
+        colors=colors,
+    )
+
+
+def render_envs(envs, out=None, scale=1):
+    """Rasterize several DoodleJumpEnvs into one (N, H, W, 3) batch buffer."""
+    if out is None:
+        out = new_frame(scale, len(envs))
+    for i, env in enumerate(envs):
+        render_env(env, out[i], scale)
+    return out
@@ -0,0 +1,177 @@
+"""
+Deterministic episode recording and headless replay for DoodleJumpEnv.
+An episode is stored as (start, persona, actions). The start is the reset seed, or a get_state() snapshot
+when the episode did not begin with a plain seeded reset (reset without a seed, ResetPool). The 2-bit actions
+are packed four per byte, so a seeded 3000-step episode takes ~0.8 KB and thousands fit in one .npz.
+replay() re-simulates an episode with no policy and no observation building; it can dump the per-step
+snapshots or reward components (for re-scoring under other personas) or rasterize selected frames.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from envs.doodle_jump_raster import render_env
+from envs.doodle_jump_state import STATE_DTYPE, pack_state
+
+RECORD_VERSION = 1
+
+
+# -------------------- Actions --------------------
+def pack_actions(actions):
+    """Actions in 0..3 -> uint8 array holding four per byte (first action in the low bits)."""
+    a = np.asarray(actions, dtype=np.uint8)
+    a = np.concatenate([a, np.zeros(-len(a) % 4, dtype=np.uint8)]).reshape(-1, 4)
+    return a[:, 0] | (a[:, 1] << 2) | (a[:, 2] << 4) | (a[:, 3] << 6)
+
+
+def unpack_actions(packed, n):
+    packed = np.asarray(packed, dtype=np.uint8)
+    return ((packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).reshape(-1)[:n]
+
+
+# -------------------- Records --------------------
+@dataclass
+class EpisodeRecord:
+    """One recorded episode; `seed` is -1 when it starts from `start_state` instead."""
+    persona: str
+    seed: int
+    actions: np.ndarray                 # uint8, one per step
+    start_state: np.void | None = None  # STATE_DTYPE record
+    return_: float = 0.0
+    death: int = 0
+    max_height: float = 0.0
+    tag: str = ""                       # free-form origin, e.g. the model path that played it
+
+    @property
+    def steps(self):
+        return len(self.actions)
+
+
+class EpisodeRecorder:
+    """Held by a DoodleJumpEnv built with record=True; fed by reset() and step()."""
+    __slots__ = ("seed", "start_state", "actions", "return_", "death")
+
+    def __init__(self):
+        self.begin(None)
+
+    def begin(self, seed, start_state=None):
+        self.seed = -1 if seed is None else int(seed)
+        self.start_state = start_state
+        self.actions = bytearray()
+        self.return_ = 0.0
+        self.death = 0
+
+    def step(self, action, reward, terminated):
+        self.actions.append(action)
+        self.return_ += reward
+        self.death = int(terminated)
+
+    def record(self, env, tag=""):
+        return EpisodeRecord(env.preset_name, self.seed, np.frombuffer(bytes(self.actions), dtype=np.uint8),
+                             self.start_state, self.return_, self.death, float(env.max_height), tag)
+
+
+# -------------------- Files --------------------
+def save_episodes(path, records):
+    """Write records to one compressed .npz (no pickles); returns the file size in bytes."""
+    packed = [pack_actions(r.actions) for r in records]
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in packed])
+    with_state = [i for i, r in enumerate(records) if r.start_state is not None]
+    state_index = np.full(len(records), -1, dtype=np.int32)
+    state_index[with_state] = np.arange(len(with_state))
+    np.savez_compressed(
+        path,
+        version=RECORD_VERSION,
+        persona=np.array([r.persona for r in records], dtype="U16"),
+        seed=np.array([r.seed for r in records], dtype=np.int64),
+        steps=np.array([r.steps for r in records], dtype=np.int32),
+        action_offsets=offsets,
+        actions=np.concatenate(packed) if packed else np.zeros(0, dtype=np.uint8),
+        state_index=state_index,
+        states=np.array([records[i].start_state for i in with_state], dtype=STATE_DTYPE),
+        return_=np.array([r.return_ for r in records], dtype=np.float64),
+        death=np.array([r.death for r in records], dtype=np.int8),
+        max_height=np.array([r.max_height for r in records], dtype=np.float64),
+        tag=np.array([r.tag for r in records], dtype=str),
+    )
+    return os.path.getsize(path if path.endswith(".npz") else path + ".npz")
+
+
+def load_episodes(path):
+    with np.load(path, allow_pickle=False) as f:
+        if int(f["version"]) != RECORD_VERSION:
+            raise ValueError(f"{path}: episode file version {int(f['version'])}, expected {RECORD_VERSION}")
+        offsets, actions, states = f["action_offsets"], f["actions"], f["states"]
+        records = []
+        for i in range(len(f["seed"])):
+            si = int(f["state_index"][i])
+            records.append(EpisodeRecord(
+                persona=str(f["persona"][i]),
+                seed=int(f["seed"][i]),
+                actions=unpack_actions(actions[offsets[i]:offsets[i + 1]], int(f["steps"][i])),
+                start_state=states[si] if si >= 0 else None,
+                return_=float(f["return_"][i]),
+                death=int(f["death"][i]),
+                max_height=float(f["max_height"][i]),
+                tag=str(f["tag"][i]),
+            ))
+    return records
+
+
+# -------------------- Replay --------------------
+def _no_obs(on_platform=False):
+    return None
+
+
+def replay(record, states=False, frames=(), render_scale=1, components=False):
+    """
+    Re-simulate `record` headlessly. Returns its outcome (return_, steps, death, max_height, truncated),
+    plus "states" (STATE_DTYPE array, entry t = state after t actions) when `states`, "components"
+    ((steps, len(REWARD_COMPONENTS)) reward terms of each step) when `components`, and "frames"
+    {t: rgb array} for each t in `frames` (negative t counts from the end, -1 = final state).
+    """
+    from envs.doodle_jump_env import DoodleJumpEnv, REWARD_COMPONENTS
+
+    env = DoodleJumpEnv(reward_preset=record.persona)
+    if record.start_state is not None:
+        env.set_state(record.start_state)
+    else:
+        env.reset(seed=record.seed)
+    env._get_obs = _no_obs  # observations do not affect the simulation; skipping them halves step cost
+
+    n = record.steps
+    want = {t % (n + 1) for t in frames}
+    snaps = np.zeros(n + 1, dtype=STATE_DTYPE) if states else None
+    comps = np.zeros((n, len(REWARD_COMPONENTS))) if components else None
+    shots = {}
+    ret, terminated, truncated = 0.0, False, False
+    for t, action in enumerate(record.actions.tolist()):
+        if states:
+            pack_state(env, snaps[t])
+        if t in want:
+            shots[t] = render_env(env, scale=render_scale)
+        _, reward, terminated, truncated, _ = env.step(action)
+        ret += reward
+        if components:
+            comps[t] = env.reward_components
+    if states:
+        pack_state(env, snaps[n])
+    if n in want:
+        shots[n] = render_env(env, scale=render_scale)
+    out = dict(return_=ret, steps=n, death=int(terminated), max_height=float(env.max_height), truncated=truncated)
+    if states:
+        out["states"] = snaps
+    if components:
+        out["components"] = comps
+    if frames:
+        out["frames"] = shots
+    env.close()
+    return out
+
+
+def matches(record, result):
+    """True when a replay reproduced the recorded outcome exactly."""
+    return (result["steps"] == record.steps and result["death"] == record.death
+            and result["return_"] == record.return_ and result["max_height"] == record.max_height)
@@ -0,0 +1,131 @@
+"""
+Pre-generated initial worlds for DoodleJumpEnv.reset().
+A ResetPool holds `size` initial layouts (platform stack, coins and the matching first observation)
+for one (seed, persona) key in a read-only shared-memory block. Pickling a pool only sends its name,
+so SubprocVecEnv workers attach to the same block instead of regenerating it.
+
+    pool = ResetPool.get(seed=0, persona="survivor", size=4096)
+    env = DoodleJumpEnv(seed=1, reward_preset="survivor", reset_pool=pool)
+
+On reset the env draws a world index from its own RNG and copies that world in, so episodes stay
+deterministic per env seed; everything after the initial layout is still generated live.
+"""
+import atexit
+import os
+import random
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from envs.doodle_jump_physics import INITIAL_PLATFORMS, Platform, Coin, YIndex
+from envs.doodle_jump_env import DoodleJumpEnv, persona_config
+
+_N_PLATFORMS = INITIAL_PLATFORMS + 1  # ground stack + safe platform under the player
+
+WORLD_DTYPE = np.dtype([
+    ("platforms", [("x", "f8"), ("y", "f8"), ("w", "i4")], (_N_PLATFORMS,)),
+    ("n_coins", "u1"),
+    ("coins", [("x", "f8"), ("y", "f8")], (INITIAL_PLATFORMS,)),
+    ("last_spawn_x", "f8"),
+    ("obs", "f4", (13,)),
+])
+
+_POOLS = {}  # (seed, persona, size) -> ResetPool owned by this process
+
+
+def _block_name(seed, persona, size):
+    # pid keeps concurrent runs (e.g. parallel train.py jobs) from colliding on the same key
+    return f"doodle_pool_{os.getpid()}_{persona}_{seed}_{size}"
+
+
+def _open_untracked(name):
+    # Only the creating process may unlink the block. Before Python 3.13 every attach registers the
+    # block with the (possibly shared) resource tracker, which then unlinks it when a worker exits.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class ResetPool:
+    def __init__(self, shm, seed, persona, size, owner):
+        self._shm = shm
+        self.seed, self.persona, self.size = seed, persona, size
+        self._owner = owner
+        self.worlds = np.ndarray((size,), dtype=WORLD_DTYPE, buffer=shm.buf)
+        self.worlds.flags.writeable = False
+        self._decoded = [None] * size  # per-process cache of worlds as plain tuples
+
+    # ------------- Construction -------------
+    @classmethod
+    def get(cls, seed, persona="survivor", size=1024):
+        """The pool for (seed, persona): generated on first use, then cached for this process."""
+        persona = persona_config(persona).name
+        key = (seed, persona, size)
+        if key not in _POOLS:
+            _POOLS[key] = cls._create(seed, persona, size)
+        return _POOLS[key]
+
+    @classmethod
+    def _create(cls, seed, persona, size):
+        shm = shared_memory.SharedMemory(
+            name=_block_name(seed, persona, size), create=True, size=size * WORLD_DTYPE.itemsize)
+        worlds = np.ndarray((size,), dtype=WORLD_DTYPE, buffer=shm.buf)
+        env = DoodleJumpEnv(reward_preset=persona)
+        env._rnd = random.Random(seed)
+        for w in worlds:
+            env._reset_game_state()
+            plats, coins = env.platforms.items, env.coins.items
+            w["platforms"] = [(p.x, p.y, p.w) for p in sorted(plats, key=lambda p: p.pid)]
+            w["n_coins"] = len(coins)
+            w["coins"][:len(coins)] = [(c.x, c.y) for c in coins]
+            w["last_spawn_x"] = env._last_spawn_x
+            w["obs"] = env._reset_obs()
+        del worlds
+        pool = cls(shm, seed, persona, size, owner=True)
+        atexit.register(pool.close)
+        return pool
+
+    @classmethod
+    def _attach(cls, name, seed, persona, size):
+        return cls(_open_untracked(name), seed, persona, size, owner=False)
+
+    def __reduce__(self):
+        return ResetPool._attach, (self._shm.name, self.seed, self.persona, self.size)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self.worlds = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            _POOLS.pop((self.seed, self.persona, self.size), None)
+        self._shm = None
+
+    # ------------- Reset -------------
+    def __len__(self):
+        return self.size
+
+    def _decode(self, i):
+        w = self.worlds[i]
+        world = (w["platforms"].tolist(), w["coins"][:w["n_coins"]].tolist(),
+                 float(w["last_spawn_x"]), w["obs"])
+        self._decoded[i] = world
+        return world
+
+    def load(self, env, i):
+        """Copy world i into `env` (as _reset_game_state would build it) and return the first obs."""
+        plats, coins, last_spawn_x, obs = self._decoded[i] or self._decode(i)
+        env._clear_game_state()
+        env.platforms = YIndex(Platform(x, y, w=w, pid=pid) for pid, (x, y, w) in enumerate(plats))
+        env.coins = YIndex(Coin(x, y) for x, y in coins)
+        env._next_pid = len(plats)
+        env._last_spawn_x = last_spawn_x
+        return obs.copy()
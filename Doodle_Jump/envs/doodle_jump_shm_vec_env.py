@@ -0,0 +1,227 @@
+"""
+Subprocess VecEnv whose workers exchange step data through shared memory.
+Unlike SB3's SubprocVecEnv nothing is pickled per step: actions, observations, rewards and dones live
+in preallocated shared NumPy buffers, and each step is one semaphore release per worker plus one shared
+"done" semaphore. Workers host a contiguous slice of the envs. Only episode ends go through the pipe
+(terminal observation plus a few info keys); reset/get_attr/env_method are rare pipe RPCs.
+"""
+import multiprocessing as mp
+import os
+import traceback
+
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+# Keys copied from the final step's info dict; all other step infos are dropped
+INFO_KEYS = ("max_height", "platforms", "death")
+
+_STEP, _RPC = 0, 1
+_OK, _ENDED, _ERROR = 0, 1, 2
+_SHARED_TYPES = {np.dtype(np.float32): "f", np.dtype(np.float64): "d", np.dtype(np.int64): "q",
+                 np.dtype(np.bool_): "b", np.dtype(np.uint8): "B"}
+
+
+def _shared(ctx, dtype, shape):
+    dtype = np.dtype(dtype)
+    raw = ctx.RawArray(_SHARED_TYPES[dtype], int(np.prod(shape)))
+    return raw, dtype, shape
+
+
+def _view(buf):
+    raw, dtype, shape = buf
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+def _worker(w, lo, conn, env_fns, bufs, ctrl, status, start, done, info_keys):
+    from stable_baselines3.common.env_util import is_wrapped
+
+    envs = [fn() for fn in env_fns.var]
+    obs, rews, dones, actions = (_view(b) for b in bufs)
+    hi = lo + len(envs)
+    while True:
+        start.acquire()
+        if ctrl[w] == _STEP:
+            try:
+                acts = actions[lo:hi].tolist()
+                ended = []
+                for j, env in enumerate(envs):
+                    o, r, terminated, truncated, info = env.step(acts[j])
+                    i = lo + j
+                    rews[i] = r
+                    dones[i] = terminated or truncated
+                    if terminated or truncated:
+                        kept = {k: info[k] for k in info_keys if k in info}
+                        ended.append((i, o, truncated and not terminated, kept))
+                        o, _ = env.reset()
+                    obs[i] = o
+                status[w] = _ENDED if ended else _OK
+                if ended:
+                    conn.send(ended)
+            except Exception:
+                status[w] = _ERROR
+                conn.send(traceback.format_exc())
+            done.release()
+            continue
+
+        cmd, data = conn.recv()
+        try:
+            if cmd == "reset":
+                reset_infos = []
+                for j, (seed, options) in enumerate(data):
+                    o, info = envs[j].reset(seed=seed, options=options)
+                    obs[lo + j] = o
+                    reset_infos.append(info)
+                result = reset_infos
+            elif cmd == "get_attr":
+                name, idx = data
+                result = [getattr(envs[j], name) for j in idx]
+            elif cmd == "set_attr":
+                name, value, idx = data
+                result = [setattr(envs[j], name, value) for j in idx]
+            elif cmd == "env_method":
+                name, args, kwargs, idx = data
+                result = [getattr(envs[j], name)(*args, **kwargs) for j in idx]
+            elif cmd == "is_wrapped":
+                cls, idx = data
+                result = [is_wrapped(envs[j], cls) for j in idx]
+            elif cmd == "close":
+                for env in envs:
+                    env.close()
+                conn.send((True, None))
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+            conn.send((True, result))
+        except Exception:
+            conn.send((False, traceback.format_exc()))
+    conn.close()
+
+
+class DoodleJumpShmVecEnv(VecEnv):
+    """
+    Drop-in replacement for SubprocVecEnv(env_fns). `n_workers` processes (default: one per core, at
+    most one per env) each step a contiguous slice of the envs. Step infos are only filled for envs whose
+    episode ended (`info_keys` + terminal_observation + TimeLimit.truncated), which is all VecMonitor needs.
+    """
+
+    def __init__(self, env_fns, n_workers=None, start_method=None, info_keys=INFO_KEYS):
+        n = len(env_fns)
+        probe = env_fns[0]()
+        observation_space, action_space = probe.observation_space, probe.action_space
+        probe.close()
+
+        if start_method is None:
+            # same default as SubprocVecEnv: forkserver is safe with threads and faster than spawn
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        bufs = (_shared(ctx, observation_space.dtype, (n, *observation_space.shape)),
+                _shared(ctx, np.float32, (n,)),
+                _shared(ctx, np.bool_, (n,)),
+                _shared(ctx, np.int64, (n,)))
+        self._obs, self._rews, self._dones, self._actions = (_view(b) for b in bufs)
+
+        n_workers = max(1, min(n, n_workers or os.cpu_count() or 1))
+        self._bounds = np.linspace(0, n, n_workers + 1).astype(int).tolist()
+        self._ctrl = ctx.RawArray("b", n_workers)
+        self._status = ctx.RawArray("b", n_workers)
+        self._start = [ctx.Semaphore(0) for _ in range(n_workers)]
+        self._done = ctx.Semaphore(0)
+        self._remotes, self._processes = [], []
+        for w in range(n_workers):
+            lo, hi = self._bounds[w], self._bounds[w + 1]
+            remote, work_remote = ctx.Pipe()
+            args = (w, lo, work_remote, CloudpickleWrapper(env_fns[lo:hi]), bufs, self._ctrl,
+                    self._status, self._start[w], self._done, tuple(info_keys))
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            work_remote.close()
+            self._remotes.append(remote)
+            self._processes.append(process)
+        self.closed = False
+        super().__init__(n, observation_space, action_space)
+
+    # ------------- VecEnv API -------------
+    def reset(self):
+        for w, (lo, hi) in enumerate(zip(self._bounds, self._bounds[1:])):
+            data = [(self._seeds[i], self._options[i]) for i in range(lo, hi)]
+            self._send(w, "reset", data)
+        for w, lo in enumerate(self._bounds[:-1]):
+            for j, info in enumerate(self._recv(w)):
+                self.reset_infos[lo + j] = info
+        self._reset_seeds()
+        self._reset_options()
+        return self._obs.copy()
+
+    def step_async(self, actions):
+        self._actions[:] = np.asarray(actions).reshape(self.num_envs)
+        for w, start in enumerate(self._start):
+            self._ctrl[w] = _STEP
+            start.release()
+
+    def step_wait(self):
+        for _ in self._start:
+            while not self._done.acquire(timeout=5.0):
+                self._check_alive()
+        infos = [{} for _ in range(self.num_envs)]
+        for w, remote in enumerate(self._remotes):
+            status = self._status[w]
+            if status == _ERROR:
+                raise RuntimeError(f"worker {w} failed:\n{remote.recv()}")
+            if status == _ENDED:
+                for i, terminal_obs, time_limit, info in remote.recv():
+                    info["terminal_observation"] = terminal_obs
+                    info["TimeLimit.truncated"] = time_limit
+                    infos[i] = info
+        return self._obs.copy(), self._rews.copy(), self._dones.copy(), infos
+
+    def close(self):
+        if self.closed:
+            return
+        for w, process in enumerate(self._processes):
+            if process.is_alive():
+                self._send(w, "close", None)
+                self._recv(w)
+        for process in self._processes:
+            process.join()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        return self._call("get_attr", lambda idx: (attr_name, idx), indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._call("set_attr", lambda idx: (attr_name, value, idx), indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._call("env_method", lambda idx: (method_name, method_args, method_kwargs, idx), indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return self._call("is_wrapped", lambda idx: (wrapper_class, idx), indices)
+
+    # ------------- Internal Helpers -------------
+    def _send(self, w, cmd, data):
+        self._remotes[w].send((cmd, data))
+        self._ctrl[w] = _RPC
+        self._start[w].release()
+
+    def _recv(self, w):
+        ok, result = self._remotes[w].recv()
+        if not ok:
+            raise RuntimeError(f"worker {w} failed:\n{result}")
+        return result
+
+    def _call(self, cmd, make_data, indices):
+        """Run one RPC per worker owning any of `indices`; results come back in `indices` order."""
+        indices = list(self._get_indices(indices))
+        owner = np.searchsorted(self._bounds, indices, side="right") - 1
+        workers = sorted(set(owner.tolist()))
+        for w in workers:
+            local = [i - self._bounds[w] for i, o in zip(indices, owner) if o == w]
+            self._send(w, cmd, make_data(local))
+        results = {w: iter(self._recv(w)) for w in workers}
+        return [next(results[o]) for o in owner.tolist()]
+
+    def _check_alive(self):
+        for w, process in enumerate(self._processes):
+            if not process.is_alive():
+                raise EOFError(f"worker {w} exited with code {process.exitcode}")
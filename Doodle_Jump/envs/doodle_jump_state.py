@@ -0,0 +1,138 @@
+"""
+Compact snapshot records for DoodleJumpEnv (see DoodleJumpEnv.get_state / set_state).
+A snapshot is one fixed-size NumPy structured record (~3 KB, most of it the Mersenne Twister state),
+so many envs pack into one structured array and `.tobytes()` / `np.frombuffer(buf, STATE_DTYPE)`
+round-trip through bytes. Entity y values are world coordinates, as stored by the env.
+"""
+import numpy as np
+
+from envs.doodle_jump_physics import (
+    MAX_PLATFORMS, MAX_COINS, MAX_ENEMIES, MAX_PELLETS, Platform, Player, Coin, Enemy, Pellet, YIndex,
+)
+
+STATE_VERSION = 1
+
+_PLATFORM = np.dtype([("x", "f8"), ("y", "f8"), ("w", "i4"), ("pid", "i8"), ("visited", "?")])
+_COIN = np.dtype([("x", "f8"), ("y", "f8")])
+_ENEMY = np.dtype([("x", "f8"), ("y", "f8"), ("vx", "f8")])
+_PELLET = np.dtype([("x", "f8"), ("y", "f8")])
+
+STATE_DTYPE = np.dtype([
+    ("version", "u1"),
+    ("persona", "S16"),
+    ("player", [("x", "f8"), ("y", "f8"), ("vx", "f8"), ("vy", "f8"), ("cooldown", "i4")]),
+    ("steps", "i4"),
+    ("landings", "i4"),
+    ("platform_time", "i4"),
+    ("last_pid", "i8"),  # -1 == None
+    ("next_pid", "i8"),
+    ("camera_y", "f8"),
+    ("max_height", "f8"),
+    ("last_spawn_x", "f8"),
+    ("n_platforms", "u1"), ("platforms", _PLATFORM, (MAX_PLATFORMS,)),
+    ("n_coins", "u1"), ("coins", _COIN, (MAX_COINS,)),
+    ("n_enemies", "u1"), ("enemies", _ENEMY, (MAX_ENEMIES,)),
+    ("n_pellets", "u1"), ("pellets", _PELLET, (MAX_PELLETS,)),
+    ("rng_key", "u4", (624,)),
+    ("rng_pos", "u4"),
+    ("rng_gauss", "f8"),
+    ("rng_has_gauss", "?"),
+])
+
+
+def as_record(state):
+    """Accept a record, a 0-d/1-element array or raw bytes and return a single STATE_DTYPE record."""
+    if isinstance(state, (bytes, bytearray, memoryview)):
+        state = np.frombuffer(state, dtype=STATE_DTYPE)
+    state = np.asarray(state)
+    if state.dtype != STATE_DTYPE:
+        raise ValueError(f"expected a DoodleJumpEnv state record, got dtype {state.dtype}")
+    return state.reshape(-1)[0] if state.ndim else state[()]
+
+
+def pack_state(env, rec):
+    """Write `env`'s full simulation state into the record `rec` (a STATE_DTYPE scalar or row)."""
+    plats, coins, enemies, pellets = env.platforms.items, env.coins.items, env.enemies, env.pellets
+    if len(pellets) > MAX_PELLETS:
+        raise ValueError(f"{len(pellets)} pellets in flight exceeds the snapshot capacity {MAX_PELLETS}")
+    pl = env.player
+    visited = env.visited_platforms
+
+    rec["version"] = STATE_VERSION
+    rec["persona"] = env.preset_name.encode()
+    rec["player"] = (pl.x, pl.y, pl.vx, pl.vy, pl.cooldown)
+    rec["steps"] = env.steps
+    rec["landings"] = env.landings
+    rec["platform_time"] = env.platform_time
+    rec["last_pid"] = -1 if env.last_platform_pid is None else env.last_platform_pid
+    rec["next_pid"] = env._next_pid
+    rec["camera_y"] = env.global_camera_y
+    rec["max_height"] = env.max_height
+    rec["last_spawn_x"] = env._last_spawn_x
+
+    # culled platforms never come back, so only the live ones need a visited flag
+    rec["n_platforms"] = len(plats)
+    rec["platforms"][:len(plats)] = [(p.x, p.y, p.w, p.pid, p.pid in visited) for p in plats]
+    rec["n_coins"] = len(coins)
+    rec["coins"][:len(coins)] = [(c.x, c.y) for c in coins]
+    rec["n_enemies"] = len(enemies)
+    rec["enemies"][:len(enemies)] = [(e.x, e.y, e.vx) for e in enemies]
+    rec["n_pellets"] = len(pellets)
+    rec["pellets"][:len(pellets)] = [(pe.x, pe.y) for pe in pellets]
+
+    _, internal, gauss = env._rnd.getstate()
+    rec["rng_key"] = internal[:624]
+    rec["rng_pos"] = internal[624]
+    rec["rng_has_gauss"] = gauss is not None
+    rec["rng_gauss"] = 0.0 if gauss is None else gauss
+    return rec
+
+
+def unpack_state(env, rec):
+    """Restore `env` from a record written by pack_state."""
+    if rec["version"] != STATE_VERSION:
+        raise ValueError(f"unsupported state version {rec['version']}")
+    persona = rec["persona"].decode()
+    if persona != env.preset_name:
+        env.set_persona(persona)
+
+    x, y, vx, vy, cooldown = rec["player"].tolist()
+    pl = env.player = Player(x, y)
+    pl.vx, pl.vy, pl.cooldown = vx, vy, cooldown
+    env.steps = int(rec["steps"])
+    env.landings = int(rec["landings"])
+    env.platform_time = int(rec["platform_time"])
+    last_pid = int(rec["last_pid"])
+    env.last_platform_pid = None if last_pid < 0 else last_pid
+    env._next_pid = int(rec["next_pid"])
+    env.global_camera_y = float(rec["camera_y"])
+    env.max_height = float(rec["max_height"])
+    env._last_spawn_x = float(rec["last_spawn_x"])
+
+    plats = rec["platforms"][:rec["n_platforms"]].tolist()
+    env.platforms = YIndex(Platform(px, py, w=pw, pid=pid) for px, py, pw, pid, _ in plats)
+    env.visited_platforms = {pid for _, _, _, pid, seen in plats if seen}
+    env.coins = YIndex(Coin(cx, cy) for cx, cy in rec["coins"][:rec["n_coins"]].tolist())
+    env.enemies = [Enemy(ex, ey, vx=evx) for ex, ey, evx in rec["enemies"][:rec["n_enemies"]].tolist()]
+    env.pellets = [Pellet(px, py) for px, py in rec["pellets"][:rec["n_pellets"]].tolist()]
+
+    gauss = float(rec["rng_gauss"]) if rec["rng_has_gauss"] else None
+    env._rnd.setstate((3, (*rec["rng_key"].tolist(), int(rec["rng_pos"])), gauss))
+
+
+def get_states(envs):
+    """Snapshot many envs into one structured array (one STATE_DTYPE row per env)."""
+    out = np.zeros(len(envs), dtype=STATE_DTYPE)
+    for i, env in enumerate(envs):
+        pack_state(env, out[i])
+    return out
+
+
+def set_states(envs, states):
+    """Restore each env from the matching row of `states` (array or concatenated bytes)."""
+    if isinstance(states, (bytes, bytearray, memoryview)):
+        states = np.frombuffer(states, dtype=STATE_DTYPE)
+    if len(states) != len(envs):
+        raise ValueError(f"got {len(states)} states for {len(envs)} envs")
+    for env, rec in zip(envs, states):
+        unpack_state(env, rec)
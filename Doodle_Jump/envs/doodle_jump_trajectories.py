@@ -0,0 +1,235 @@
+"""
+Append-only trajectory store for DoodleJumpEnv rollouts (train.py --record-traj, eval.py --record_traj).
+One row per env step: the observation the action was taken on, the action, reward, terminated/truncated,
+the env slot and episode id, and a few info fields. Each column is a raw binary file per shard
+(<field>.<shard>.bin) and index.json holds the dtypes/shapes and the committed row count of every shard.
+The writer stages rows in a fixed-size buffer and appends it to the shard files when full, so RAM stays at
+one buffer no matter how many steps are recorded. The index is rewritten atomically after every flush:
+rows past a shard's committed count (a killed run) are ignored by readers and cut off when appending.
+TrajectoryStore memory-maps the shards; iter_batches() yields views, nothing is copied until used.
+"""
+import json
+import os
+
+import numpy as np
+
+TRAJ_VERSION = 1
+
+# info key -> (dtype, value stored when a step's info lacks it, e.g. mid-episode steps of DoodleJumpShmVecEnv)
+INFO_FIELDS = {
+    "max_height": (np.float32, np.nan),
+    "steps": (np.int32, -1),
+    "platforms": (np.int32, -1),
+    "death": (np.int8, -1),
+}
+
+
+def _fields(obs_shape, obs_dtype):
+    fields = {
+        "obs": (np.dtype(obs_dtype), tuple(obs_shape)),
+        "action": (np.dtype(np.uint8), ()),
+        "reward": (np.dtype(np.float32), ()),
+        "terminated": (np.dtype(np.bool_), ()),
+        "truncated": (np.dtype(np.bool_), ()),
+        "env": (np.dtype(np.int32), ()),
+        "episode": (np.dtype(np.int64), ()),
+    }
+    for key, (dtype, _) in INFO_FIELDS.items():
+        fields[key] = (np.dtype(dtype), ())
+    return fields
+
+
+def _shard_path(root, field, shard):
+    return os.path.join(root, f"{field}.{shard:05d}.bin")
+
+
+def _read_index(root):
+    with open(os.path.join(root, "index.json")) as f:
+        index = json.load(f)
+    if index["version"] != TRAJ_VERSION:
+        raise ValueError(f"{root}: trajectory store version {index['version']}, expected {TRAJ_VERSION}")
+    return index
+
+
+# -------------------- Writer --------------------
+class TrajectoryWriter:
+    """
+    Appends rows to the store at `root`, creating it or continuing an existing one with the same fields.
+    Shards hold up to `shard_rows` rows; `buffer_rows` rows are staged in RAM between flushes.
+    """
+
+    def __init__(self, root, obs_shape, obs_dtype=np.float32, shard_rows=1 << 20, buffer_rows=1 << 14, meta=None):
+        self.root = root
+        self.fields = _fields(obs_shape, obs_dtype)
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(os.path.join(root, "index.json")):
+            index = _read_index(root)
+            stored = {k: (np.dtype(d), tuple(s)) for k, (d, s) in index["fields"].items()}
+            if stored != self.fields:
+                raise ValueError(f"{root} holds trajectories with other fields/observations; pick a new directory")
+            self.shard_rows = index["shard_rows"]
+            self.shards = index["shards"]
+            self.n_episodes = index["episodes"]
+            self.meta = index["meta"]
+        else:
+            self.shard_rows = shard_rows
+            self.shards = []
+            self.n_episodes = 0
+            self.meta = dict(meta or {})
+        self._buf = {k: np.empty((buffer_rows, *shape), dtype=dtype) for k, (dtype, shape) in self.fields.items()}
+        self._n = 0
+        self._files = None
+        self._open_shard()
+
+    def _open_shard(self):
+        if not self.shards or self.shards[-1] >= self.shard_rows:
+            self.shards.append(0)
+        shard, rows = len(self.shards) - 1, self.shards[-1]
+        self._files = {}
+        for k, (dtype, shape) in self.fields.items():
+            f = open(_shard_path(self.root, k, shard), "ab")
+            f.truncate(rows * dtype.itemsize * int(np.prod(shape)))  # drop rows a killed writer never committed
+            self._files[k] = f
+
+    def new_episodes(self, n):
+        """Ids for `n` episodes starting now."""
+        ids = np.arange(self.n_episodes, self.n_episodes + n)
+        self.n_episodes += n
+        return ids
+
+    def append(self, obs, action, reward, terminated, truncated, env, episode, infos):
+        """Add one row per entry: arrays of length n (obs: (n, *obs_shape)) and n step info dicts."""
+        cols = dict(obs=obs, action=action, reward=reward, terminated=terminated, truncated=truncated,
+                    env=env, episode=episode)
+        for key, (dtype, missing) in INFO_FIELDS.items():
+            cols[key] = np.fromiter((info.get(key, missing) for info in infos), dtype=dtype, count=len(infos))
+        n, lo = len(infos), 0
+        while lo < n:
+            k = min(n - lo, len(self._buf["obs"]) - self._n)
+            for name, col in cols.items():
+                self._buf[name][self._n:self._n + k] = col[lo:lo + k]
+            self._n += k
+            lo += k
+            if self._n == len(self._buf["obs"]):
+                self.flush()
+
+    def flush(self):
+        """Append the staged rows to the shard files and commit them in the index."""
+        lo = 0
+        while lo < self._n:
+            k = min(self._n - lo, self.shard_rows - self.shards[-1])
+            for name, f in self._files.items():
+                f.write(self._buf[name][lo:lo + k].tobytes())
+                f.flush()
+            self.shards[-1] += k
+            lo += k
+            if self.shards[-1] >= self.shard_rows:
+                self._close_files()
+                self._open_shard()
+        self._n = 0
+        self._write_index()
+
+    def _write_index(self):
+        index = dict(version=TRAJ_VERSION, shard_rows=self.shard_rows, shards=self.shards, episodes=self.n_episodes,
+                     fields={k: [dtype.str, list(shape)] for k, (dtype, shape) in self.fields.items()}, meta=self.meta)
+        path = os.path.join(self.root, "index.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(path + ".tmp", path)
+
+    def _close_files(self):
+        for f in self._files.values():
+            f.close()
+        self._files = None
+
+    def close(self):
+        if self._files is not None:
+            self.flush()
+            self._close_files()
+
+    @property
+    def rows(self):
+        return sum(self.shards) + self._n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -------------------- Reader --------------------
+class TrajectoryStore:
+    """Read-only view of a trajectory store: committed rows only, memory-mapped per shard."""
+
+    def __init__(self, root):
+        self.root = root
+        index = _read_index(root)
+        self.fields = {k: (np.dtype(d), tuple(s)) for k, (d, s) in index["fields"].items()}
+        self.shards = index["shards"]
+        self.n_episodes = index["episodes"]
+        self.meta = index["meta"]
+
+    def __len__(self):
+        return sum(self.shards)
+
+    def shard(self, i, fields=None):
+        """{field: read-only memmap} over the committed rows of shard i."""
+        rows = self.shards[i]
+        return {k: np.memmap(_shard_path(self.root, k, i), dtype=self.fields[k][0], mode="r",
+                             shape=(rows, *self.fields[k][1]))
+                for k in (fields or self.fields)}
+
+    def iter_batches(self, batch_size=4096, fields=None):
+        """
+        {field: array} batches of up to `batch_size` rows, in order. Batches are slices of the shard memmaps
+        (never copies), so they do not span shards: the last batch of each shard can be shorter.
+        """
+        for i, rows in enumerate(self.shards):
+            if rows == 0:
+                continue  # mmap cannot map an empty file
+            cols = self.shard(i, fields)
+            for lo in range(0, rows, batch_size):
+                yield {k: v[lo:lo + batch_size] for k, v in cols.items()}
+
+
+# -------------------- Recording VecEnvs --------------------
+def trajectory_recorder(venv, root, meta=None, **writer_kwargs):
+    """VecEnvWrapper around `venv` appending every step to the store at `root`; closing it closes the store."""
+    from stable_baselines3.common.vec_env import VecEnvWrapper
+
+    class TrajectoryRecorder(VecEnvWrapper):
+        def __init__(self):
+            super().__init__(venv)
+            space = venv.observation_space
+            self.writer = TrajectoryWriter(root, space.shape, space.dtype, meta=meta, **writer_kwargs)
+            self._env_ids = np.arange(venv.num_envs, dtype=np.int32)
+            self._obs = self._episode = self._actions = None
+
+        def reset(self):
+            self._obs = self.venv.reset()
+            self._episode = self.writer.new_episodes(self.num_envs)
+            return self._obs
+
+        def step_async(self, actions):
+            self._actions = np.asarray(actions).reshape(self.num_envs)
+            self.venv.step_async(actions)
+
+        def step_wait(self):
+            obs, rewards, dones, infos = self.venv.step_wait()
+            truncated = np.fromiter((info.get("TimeLimit.truncated", False) for info in infos), dtype=bool,
+                                    count=self.num_envs)
+            self.writer.append(self._obs, self._actions, rewards, dones & ~truncated, truncated, self._env_ids,
+                               self._episode, infos)
+            if dones.any():
+                idx = np.flatnonzero(dones)
+                self._episode = self._episode.copy()
+                self._episode[idx] = self.writer.new_episodes(len(idx))
+            self._obs = obs
+            return obs, rewards, dones, infos
+
+        def close(self):
+            self.writer.close()
+            self.venv.close()
+
+    return TrajectoryRecorder()
@@ -0,0 +1,497 @@
+"""
+Batched Doodle Jump environment implementing SB3's VecEnv interface.
+All N games live in fixed-capacity NumPy arrays (struct-of-arrays) and every phase of
+DoodleJumpEnv.step is done as array operations over the whole batch, with built-in autoreset.
+As in DoodleJumpEnv, entity y values are world coordinates and rectangles are truncated on screen
+(trunc(y - top)), so a 1-game batch drawing from the same RNG stream computes the same floats step for step
+(src/vec_parity_check.py).
+Rewards are (N, len(REWARD_COMPONENTS)) component rows in `reward_components`, weighted per game.
+"""
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from envs.doodle_jump_env import (
+    REWARD_COMPONENTS, R_ACTIVITY, R_IDLE, R_LAND, R_NOVELTY, R_RELAND, R_CAMPING, R_LEAVE_CAMP, R_KILL, R_DEATH,
+    R_UPWARD, R_CLIMB, R_HEIGHT_BONUS, R_COIN, climb_clip, persona_config, reward_weights,
+)
+from envs.doodle_jump_raster import draw_frame, new_frame
+from envs.doodle_jump_physics import (
+    SCREEN_W, SCREEN_H, GRAVITY, MOVE_ACCEL, FRICTION, JUMP_VELOCITY, MAX_VX,
+    PLAYER_W, PLAYER_H, PLATFORM_H, MAX_PLATFORMS, INITIAL_PLATFORMS, PLATFORM_HORIZONTAL_VAR,
+    TIME_LIMIT, MAX_COINS, COIN_SIZE, COIN_VERTICAL_OFFSET, MAX_ENEMIES, ENEMY_W, ENEMY_H,
+    ENEMY_SPEED, ENEMY_MIN_HEIGHT, PELLET_W, PELLET_H, PELLET_SPEED, PELLET_COOLDOWN, CULL_MARGIN,
+    MAX_PELLETS,
+)
+
+# PersonaConfig field -> (array attribute, dtype); reward weights live in _reward_w
+_PERSONA_FIELDS = {
+    "coin_spawn_p": ("_coin_p", np.float64),
+    "enemy_spawn_p": ("_enemy_p", np.float64),
+    "platform_w": ("_plat_w", np.int64),
+    "gap_min": ("_gap_min", np.int64),
+    "gap_max": ("_gap_max", np.int64),
+}
+
+
+def _overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    # pygame.Rect.colliderect on already int-truncated coordinates
+    return (ax < bx + bw) & (ax + aw > bx) & (ay < by + bh) & (ay + ah > by)
+
+
+def _first_free(alive):
+    # index of the first empty slot per row (rows are assumed to have one)
+    return np.argmin(alive, axis=1)
+
+
+class DoodleJumpVecEnv(VecEnv):
+    """
+    N Doodle Jump games stepped together. Reward semantics match DoodleJumpEnv per persona;
+    `reward_preset` may be a single persona name or one name per game.
+    Per-game methods (e.g. `reset_games`) take an `indices` argument so they work through `env_method`.
+    """
+    metadata = {"render_modes": ["rgb_array"]}
+
+    def __init__(self, num_envs, seed=None, reward_preset="survivor", render_mode=None, render_scale=1):
+        self.render_mode = render_mode
+        self.render_scale = render_scale
+        n = int(num_envs)
+        observation_space = spaces.Box(low=-np.ones((13,), dtype=np.float32),
+                                       high=np.ones((13,), dtype=np.float32), dtype=np.float32)
+        self._rng = np.random.default_rng(seed)
+        self._alloc(n)
+        presets = [reward_preset] * n if isinstance(reward_preset, str) else list(reward_preset)
+        assert len(presets) == n, "reward_preset needs one persona per env"
+        for attr, dtype in _PERSONA_FIELDS.values():
+            setattr(self, attr, np.zeros(n, dtype=dtype))
+        self._reward_w = np.zeros((n, len(REWARD_COMPONENTS)))
+        self._climb_clip = np.zeros(n)
+        # this step's unweighted reward terms per game; overwritten in place every step
+        self.reward_components = np.zeros((n, len(REWARD_COMPONENTS)))
+        self.preset_names = [None] * n
+        for i, name in enumerate(presets):
+            self._apply_persona(i, name)
+        super().__init__(n, observation_space, spaces.Discrete(4))
+        self.actions = np.zeros(n, dtype=np.int64)
+        self._reset_rows(self._rows)
+
+    # ------------- VecEnv API -------------
+    def reset(self):
+        seeds = [s for s in self._seeds if s is not None]
+        if seeds:
+            self._rng = np.random.default_rng(seeds)
+        obs = self._reset_rows(self._rows)
+        self._reset_seeds()
+        self._reset_options()
+        return obs
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions).reshape(self.num_envs).astype(np.int64)
+
+    def step_wait(self):
+        rew, on_plat, terminated = self._step_batch(self.actions)
+        truncated = self.steps >= TIME_LIMIT
+        obs = self._get_obs(on_plat)
+        dones = terminated | truncated
+
+        mh, st, pl = self.max_height.tolist(), self.steps.tolist(), self.landings.tolist()
+        term, trunc = terminated.tolist(), (truncated & ~terminated).tolist()
+        infos = [
+            {"max_height": mh[i], "steps": st[i], "persona": self.preset_names[i],
+             "death": int(term[i]), "platforms": pl[i], "TimeLimit.truncated": trunc[i]}
+            for i in range(self.num_envs)
+        ]
+        if dones.any():
+            idx = np.flatnonzero(dones)
+            for i in idx:
+                infos[i]["terminal_observation"] = obs[i].copy()
+            obs[idx] = self._reset_rows(idx)
+        return obs, rew.astype(np.float32), dones, infos
+
+    def close(self):
+        pass
+
+    def get_images(self):
+        return list(self.render_frames())
+
+    def render_frames(self, out=None):
+        """Rasterize every game into an (N, H, W, 3) uint8 buffer (allocated if None) with the NumPy renderer."""
+        scale = self.render_scale
+        if out is None:
+            out = new_frame(scale, self.num_envs)
+        # int() truncation of the screen coordinates, as DoodleJumpEnv's rects do
+        top = self._camera_top()
+        col = top[:, None]
+        px, py = self.px.astype(np.int64).tolist(), (self.py - top).astype(np.int64).tolist()
+        plat_x, plat_y = self.plat_x.astype(np.int64), (self.plat_y - col).astype(np.int64)
+        coin_x, coin_y = self.coin_x.astype(np.int64), (self.coin_y - col).astype(np.int64)
+        enemy_x, enemy_y = self.enemy_x.astype(np.int64), (self.enemy_y - col).astype(np.int64)
+        pellet_x, pellet_y = self.pellet_x.astype(np.int64), (self.pellet_y - col).astype(np.int64)
+        for i in range(self.num_envs):
+            pw = int(self._plat_w[i])
+            pa, ca, ea, ka = self.plat_alive[i], self.coin_alive[i], self.enemy_alive[i], self.pellet_alive[i]
+            draw_frame(
+                out[i],
+                (px[i], py[i], PLAYER_W, PLAYER_H),
+                platforms=[(x, y, pw, PLATFORM_H) for x, y in zip(plat_x[i, pa].tolist(), plat_y[i, pa].tolist())],
+                coins=[(x, y, COIN_SIZE) for x, y in zip(coin_x[i, ca].tolist(), coin_y[i, ca].tolist())],
+                enemies=[(x, y, ENEMY_W, ENEMY_H) for x, y in zip(enemy_x[i, ea].tolist(), enemy_y[i, ea].tolist())],
+                pellets=[(x, y, PELLET_W, PELLET_H)
+                         for x, y in zip(pellet_x[i, ka].tolist(), pellet_y[i, ka].tolist())],
+                scale=scale,
+            )
+        return out
+
+    def get_attr(self, attr_name, indices=None):
+        indices = list(self._get_indices(indices))
+        value = getattr(self, attr_name)
+        if isinstance(value, np.ndarray) and value.ndim > 0 and value.shape[0] == self.num_envs:
+            return [value[i] for i in indices]
+        if isinstance(value, list) and len(value) == self.num_envs:
+            return [value[i] for i in indices]
+        return [value for _ in indices]
+
+    def set_attr(self, attr_name, value, indices=None):
+        indices = list(self._get_indices(indices))
+        current = getattr(self, attr_name, None)
+        if isinstance(current, np.ndarray) and current.ndim > 0 and current.shape[0] == self.num_envs:
+            current[indices] = value
+        elif isinstance(current, list) and len(current) == self.num_envs:
+            for i in indices:
+                current[i] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        indices = list(self._get_indices(indices))
+        return getattr(self, method_name)(*method_args, indices=indices, **method_kwargs)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    # ------------- Per-game methods -------------
+    def set_persona(self, name, indices=None):
+        """Switch the given games to another persona (takes effect immediately, like DoodleJumpEnv.set_persona)."""
+        indices = list(self._get_indices(indices))
+        for i in indices:
+            self._apply_persona(i, name)
+        return [None for _ in indices]
+
+    def reset_games(self, indices=None):
+        return list(self._reset_rows(np.asarray(list(self._get_indices(indices)), dtype=np.int64)))
+
+    # ------------- Internal Helpers -------------
+    def _alloc(self, n):
+        P, C, E, K = MAX_PLATFORMS, MAX_COINS, MAX_ENEMIES, MAX_PELLETS
+        # player + counters
+        self.px = np.zeros(n); self.py = np.zeros(n)
+        self.pvx = np.zeros(n); self.pvy = np.zeros(n)
+        self.cooldown = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.landings = np.zeros(n, dtype=np.int64)
+        self.last_pid = np.full(n, -1, dtype=np.int64)
+        self.next_pid = np.zeros(n, dtype=np.int64)
+        self.platform_time = np.zeros(n, dtype=np.int64)
+        self.global_camera_y = np.zeros(n)
+        self.max_height = np.zeros(n)
+        # platforms (visited replaces the per-env pid set: a culled platform never comes back)
+        self.plat_x = np.zeros((n, P)); self.plat_y = np.zeros((n, P))
+        self.plat_pid = np.zeros((n, P), dtype=np.int64)
+        self.plat_alive = np.zeros((n, P), dtype=bool)
+        self.plat_visited = np.zeros((n, P), dtype=bool)
+        # coins / enemies / pellets
+        self.coin_x = np.zeros((n, C)); self.coin_y = np.zeros((n, C))
+        self.coin_alive = np.zeros((n, C), dtype=bool)
+        self.enemy_x = np.zeros((n, E)); self.enemy_y = np.zeros((n, E)); self.enemy_vx = np.zeros((n, E))
+        # spawn order (DoodleJumpEnv's list order): the pid of the platform spawned with it, one enemy per platform
+        self.enemy_seq = np.zeros((n, E), dtype=np.int64)
+        self.enemy_alive = np.zeros((n, E), dtype=bool)
+        self.pellet_x = np.zeros((n, K)); self.pellet_y = np.zeros((n, K))
+        self.pellet_alive = np.zeros((n, K), dtype=bool)
+        self._rows = np.arange(n)
+
+    def _apply_persona(self, i, name):
+        cfg = persona_config(name)
+        self.preset_names[i] = cfg.name
+        for field, (attr, _) in _PERSONA_FIELDS.items():
+            getattr(self, attr)[i] = getattr(cfg, field)
+        self._reward_w[i] = reward_weights(cfg)
+        self._climb_clip[i] = climb_clip(cfg)
+
+    def _spawn_platform(self, rows, x, y):
+        slot = _first_free(self.plat_alive[rows])
+        self.plat_x[rows, slot] = x
+        self.plat_y[rows, slot] = y
+        self.plat_pid[rows, slot] = self.next_pid[rows]
+        self.plat_alive[rows, slot] = True
+        self.plat_visited[rows, slot] = False
+        self.next_pid[rows] += 1
+
+    def _maybe_spawn_coin_near(self, rows, px, py):
+        # draws only for rows with room, in DoodleJumpEnv's order, so a 1-game batch replays its RNG stream
+        room = self.coin_alive[rows].sum(1) < MAX_COINS
+        rows, px, py = rows[room], px[room], py[room]
+        ok = self._rng.random(rows.size) < self._coin_p[rows]
+        if ok.any():
+            w = self._plat_w[rows[ok]]
+            offset = self._rng.integers(-(w // 3), w // 3 + 1)
+            rows = rows[ok]
+            slot = _first_free(self.coin_alive[rows])
+            self.coin_x[rows, slot] = np.trunc(px[ok] + w // 2 + offset)
+            top = self._camera_top(rows)
+            self.coin_y[rows, slot] = np.trunc(py[ok] - COIN_VERTICAL_OFFSET - top) + top
+            self.coin_alive[rows, slot] = True
+
+    def _maybe_spawn_enemy_near(self, rows, py):
+        room = ((self.enemy_alive[rows].sum(1) < MAX_ENEMIES)
+                & (self.global_camera_y[rows] <= SCREEN_H - (ENEMY_MIN_HEIGHT // 2)))
+        rows, py = rows[room], py[room]
+        ok = self._rng.random(rows.size) < self._enemy_p[rows]
+        if ok.any():
+            rows, k = rows[ok], int(ok.sum())
+            slot = _first_free(self.enemy_alive[rows])
+            self.enemy_x[rows, slot] = self._rng.integers(0, SCREEN_W - ENEMY_W + 1, size=k)
+            top = self._camera_top(rows)
+            self.enemy_y[rows, slot] = np.trunc(py[ok] - self._rng.integers(30, 91, size=k) - top) + top
+            self.enemy_vx[rows, slot] = np.where(self._rng.random(k) < 0.5, ENEMY_SPEED, -ENEMY_SPEED)
+            self.enemy_seq[rows, slot] = self.next_pid[rows] - 1
+            self.enemy_alive[rows, slot] = True
+
+    def _reset_rows(self, rows):
+        """Start fresh games in `rows` and return their observations."""
+        self.px[rows] = SCREEN_W // 2 - 13
+        self.py[rows] = SCREEN_H - 120
+        self.pvx[rows] = 0.0
+        self.pvy[rows] = 0.0
+        self.cooldown[rows] = 0
+        self.global_camera_y[rows] = SCREEN_H
+        self.max_height[rows] = SCREEN_H
+        self.steps[rows] = 0
+        self.landings[rows] = 0
+        self.last_pid[rows] = -1
+        self.platform_time[rows] = 0
+        for alive in (self.plat_alive, self.coin_alive, self.enemy_alive, self.pellet_alive):
+            alive[rows] = False
+
+        # Seed ground stack
+        w = self._plat_w[rows]
+        y = np.full(rows.size, SCREEN_H - 20.0)
+        for _ in range(INITIAL_PLATFORMS):
+            x = self._rng.integers(0, SCREEN_W - w + 1).astype(np.float64)
+            self._spawn_platform(rows, x, y)
+            half = self._rng.random(rows.size) < 0.5
+            self._maybe_spawn_coin_near(rows[half], x[half], y[half])
+            y = y - self._rng.integers(self._gap_min[rows], self._gap_max[rows] + 1)
+
+        # Safe platform under player
+        safe_y = np.trunc(self.py[rows] + PLAYER_H + 6)
+        center_x = np.clip(np.trunc(self.px[rows] + PLAYER_W / 2 - w / 2), 0, SCREEN_W - w)
+        self._spawn_platform(rows, center_x, safe_y)
+
+        # detect if starting exactly on a platform
+        on_plat = (self._platform_hits(rows)
+                   & (np.abs((self.py[rows] + PLAYER_H)[:, None] - self.plat_y[rows]) <= 2)).any(1)
+        for i in rows.tolist():
+            self.reset_infos[i] = {"max_height": float(self.max_height[i]), "persona": self.preset_names[i]}
+        return self._get_obs(on_plat, rows)
+
+    def _camera_top(self, rows=slice(None)):
+        # world y of the top screen edge: screen_y = world_y - _camera_top()
+        return self.global_camera_y[rows] - SCREEN_H
+
+    def _player_rect(self, rows=slice(None)):
+        return np.trunc(self.px[rows])[:, None], np.trunc(self.py[rows] - self._camera_top(rows))[:, None]
+
+    def _platform_hits(self, rows=slice(None)):
+        prx, pry = self._player_rect(rows)
+        top = self._camera_top(rows)[:, None]
+        return self.plat_alive[rows] & _overlap(prx, pry, PLAYER_W, PLAYER_H,
+                                                np.trunc(self.plat_x[rows]), np.trunc(self.plat_y[rows] - top),
+                                                self._plat_w[rows, None], PLATFORM_H)
+
+    def _step_batch(self, action):
+        n = self.num_envs
+        self.steps += 1
+        rc = self.reward_components
+        rc.fill(0.0)
+
+        # Tiny activity bonus to prevent freezing
+        rc[:, R_ACTIVITY] = np.abs(self.pvx) > 0.2
+
+        # --- Action handling ---
+        self.pvx -= MOVE_ACCEL * (action == 0)
+        self.pvx += MOVE_ACCEL * (action == 1)
+        rc[:, R_IDLE] = action == 2
+        shoot = (action == 3) & (self.cooldown <= 0) & ~self.pellet_alive.all(1)
+        if shoot.any():
+            sr = np.flatnonzero(shoot)
+            slot = _first_free(self.pellet_alive[sr])
+            self.pellet_x[sr, slot] = self.px[sr] + PLAYER_W // 2 - PELLET_W // 2
+            self.pellet_y[sr, slot] = self.py[sr] - PELLET_H
+            self.pellet_alive[sr, slot] = True
+            self.cooldown[sr] = PELLET_COOLDOWN
+
+        # Physics
+        self.pvx *= FRICTION
+        np.clip(self.pvx, -MAX_VX, MAX_VX, out=self.pvx)
+        self.pvy += GRAVITY
+        self.cooldown -= self.cooldown > 0
+
+        # Apply motion + wrap horizontally
+        self.px += self.pvx
+        self.py += self.pvy
+        self.px = np.where(self.px < -PLAYER_W, SCREEN_W, np.where(self.px > SCREEN_W, -PLAYER_W, self.px))
+
+        # --- Land on platforms (first platform in spawn order wins, like the list scan) ---
+        hits = self._platform_hits()
+        descending = self.pvy > 0
+        land_ok = hits & descending[:, None] & ((self.py + PLAYER_H - self.pvy)[:, None] <= self.plat_y + 4)
+        landed = land_ok.any(1)
+        standing = ~descending & (hits & (np.abs((self.py + PLAYER_H)[:, None] - self.plat_y) <= 2)).any(1)
+        on_platform_now = landed | standing
+        if landed.any():
+            lr = np.flatnonzero(landed)
+            j = np.argmin(np.where(land_ok[lr], self.plat_pid[lr], np.iinfo(np.int64).max), axis=1)
+            pid = self.plat_pid[lr, j]
+            self.py[lr] = self.plat_y[lr, j] - PLAYER_H
+            self.pvy[lr] = JUMP_VELOCITY
+            self.landings[lr] += 1
+            new_plat = self.last_pid[lr] != pid
+            novel = new_plat & ~self.plat_visited[lr, j]
+            rc[lr, R_LAND] = new_plat
+            rc[lr, R_RELAND] = ~new_plat
+            rc[lr, R_NOVELTY] = novel
+            self.plat_visited[lr, j] |= novel
+            self.last_pid[lr] = pid
+
+        # On-platform time (escalating penalty + leaving bonus)
+        camping = on_platform_now & (np.abs(self.pvy) < 0.1)
+        rc[:, R_CAMPING] = np.where(camping, np.minimum(self.platform_time + 1, 150), 0)
+        rc[:, R_LEAVE_CAMP] = ~camping & (self.platform_time >= 20)
+        self.platform_time = np.where(camping, self.platform_time + 1, 0)
+
+        # --- Pellets & enemies ---
+        top = self._camera_top()
+        col = top[:, None]
+        self.pellet_y += PELLET_SPEED
+        self.pellet_alive &= ~(self.pellet_y + PELLET_H < col)
+        kills = np.zeros(n)
+        ex, ey = np.trunc(self.enemy_x), np.trunc(self.enemy_y - col)
+        for k in range(MAX_PELLETS):
+            hit = self.pellet_alive[:, k, None] & self.enemy_alive & _overlap(
+                np.trunc(self.pellet_x[:, k, None]), np.trunc(self.pellet_y[:, k, None] - col), PELLET_W, PELLET_H,
+                ex, ey, ENEMY_W, ENEMY_H)
+            any_hit = hit.any(1)
+            if any_hit.any():
+                hr = np.flatnonzero(any_hit)
+                # the first enemy in spawn order dies, as in DoodleJumpEnv's list scan
+                first = np.argmin(np.where(hit[hr], self.enemy_seq[hr], np.iinfo(np.int64).max), axis=1)
+                self.enemy_alive[hr, first] = False
+                self.pellet_alive[hr, k] = False
+                kills += any_hit
+        rc[:, R_KILL] = kills
+
+        self.enemy_x += self.enemy_vx
+        self.enemy_x = np.where(self.enemy_x < -ENEMY_W, SCREEN_W,
+                                np.where(self.enemy_x > SCREEN_W, -ENEMY_W, self.enemy_x))
+        prx, pry = self._player_rect()
+        terminated = (self.enemy_alive & _overlap(prx, pry, PLAYER_W, PLAYER_H, np.trunc(self.enemy_x),
+                                                  np.trunc(self.enemy_y - col), ENEMY_W, ENEMY_H)).any(1)
+        rc[:, R_DEATH] = terminated
+
+        # --- Camera scroll / honest climb reward ---
+        rc[:, R_UPWARD] = self.pvy < -0.1
+        self.global_camera_y -= np.maximum(SCREEN_H * 0.4 - (self.py - top), 0.0)
+
+        new_max = np.minimum(self.max_height, self.global_camera_y)
+        delta = self.max_height - new_max
+        rc[:, R_CLIMB] = np.minimum(delta, self._climb_clip)  # delta is 0 unless a new max was reached
+        rc[:, R_HEIGHT_BONUS] = delta > 0
+        self.max_height = new_max
+
+        # --- Coin collection ---
+        prx, pry = self._player_rect()
+        col = self._camera_top()[:, None]
+        got = self.coin_alive & _overlap(prx, pry, PLAYER_W, PLAYER_H, np.trunc(self.coin_x - COIN_SIZE),
+                                         np.trunc(self.coin_y - col - COIN_SIZE), 2 * COIN_SIZE, 2 * COIN_SIZE)
+        rc[:, R_COIN] = got.sum(1)
+        self.coin_alive &= ~got
+
+        # Maintain world & spawn
+        self._ensure_platforms_and_objects()
+
+        # --- Death by falling ---
+        fell = ~terminated & (self.py - self._camera_top() > SCREEN_H)
+        rc[:, R_DEATH] += fell
+        terminated |= fell
+        reward = np.einsum("nk,nk->n", rc, self._reward_w)
+        return reward, on_platform_now, terminated
+
+    def _ensure_platforms_and_objects(self):
+        need = MAX_PLATFORMS - self.plat_alive.sum(1)
+        rows = np.flatnonzero(need)
+        if rows.size:
+            need = need[rows]
+            alive = self.plat_alive[rows]
+            top_y = np.where(alive, self.plat_y[rows], np.inf).min(1)
+            top_y = np.where(np.isfinite(top_y), top_y, self.global_camera_y[rows])
+            last = np.argmax(np.where(alive, self.plat_pid[rows], -1), axis=1)
+            prev_x = np.where(alive.any(1), self.plat_x[rows, last], SCREEN_W / 2)
+            max_x_diff = int(SCREEN_W * PLATFORM_HORIZONTAL_VAR)
+            while rows.size:
+                new_y = top_y - self._rng.integers(self._gap_min[rows], self._gap_max[rows] + 1)
+                x_offset = self._rng.integers(-max_x_diff, max_x_diff + 1, size=rows.size)
+                x = np.clip(prev_x + x_offset, 0, SCREEN_W - self._plat_w[rows])
+                self._spawn_platform(rows, x, new_y)
+                self._maybe_spawn_coin_near(rows, x, new_y)
+                self._maybe_spawn_enemy_near(rows, new_y)
+                more = need > 1
+                rows, need, top_y, prev_x = rows[more], need[more] - 1, new_y[more], x[more]
+
+        # Cull off-screen objects
+        top = self._camera_top()[:, None]
+        limit = top + SCREEN_H + CULL_MARGIN
+        self.plat_alive &= self.plat_y < limit
+        self.coin_alive &= self.coin_y < limit
+        self.enemy_alive &= self.enemy_y < limit
+        self.pellet_alive &= self.pellet_y + PELLET_H > top - 20
+
+    def _get_obs(self, on_platform, rows=None):
+        rows = self._rows if rows is None else rows
+        n = rows.size
+        idx = np.arange(n)
+        obs = np.empty((n, 13), dtype=np.float32)
+        px_center = self.px[rows] + PLAYER_W / 2
+        py_top = self.py[rows]
+
+        # player (4)
+        obs[:, 0] = (px_center - SCREEN_W / 2) / (SCREEN_W / 2)
+        obs[:, 1] = (py_top - self._camera_top(rows) - SCREEN_H / 2) / (SCREEN_H / 2)
+        obs[:, 2] = np.clip(self.pvx[rows] / 6.0, -1.0, 1.0)
+        obs[:, 3] = np.clip(self.pvy[rows] / 12.0, -1.0, 1.0)
+
+        def rel(alive, x_center, y, ties, cols):
+            # nearest in y first; equal distances are ordered by `ties` (ascending), as DoodleJumpEnv orders them
+            dist = np.where(alive, np.abs(y - py_top[:, None]), np.inf)
+            order = np.lexsort((ties, dist), axis=1)[:, :len(cols) // 2]
+            for k in range(order.shape[1]):
+                j = order[:, k]
+                valid = np.isfinite(dist[idx, j])
+                relx = np.clip((x_center[idx, j] - px_center) / (SCREEN_W / 2), -1.0, 1.0)
+                rely = np.clip((y[idx, j] - py_top) / (SCREEN_H / 2), -1.0, 1.0)
+                obs[:, cols[2 * k]] = np.where(valid, relx, 0.0)
+                obs[:, cols[2 * k + 1]] = np.where(valid, rely, 1.0)
+
+        # 2 plats (4), coin (2), enemy (2); missing entries pad with [0, 1]
+        # ties: older platform first, lower coin first (coins come one per platform, so their y never repeat),
+        # enemies in spawn order
+        plat_y, coin_y = self.plat_y[rows], self.coin_y[rows]
+        rel(self.plat_alive[rows], self.plat_x[rows] + self._plat_w[rows, None] / 2, plat_y, self.plat_pid[rows],
+            (4, 5, 6, 7))
+        rel(self.coin_alive[rows], self.coin_x[rows], coin_y, -coin_y, (8, 9))
+        rel(self.enemy_alive[rows], self.enemy_x[rows] + ENEMY_W / 2, self.enemy_y[rows], self.enemy_seq[rows],
+            (10, 11))
+
+        # on-platform (1)
+        obs[:, 12] = np.where(on_platform, 1.0, -1.0)
+        return obs
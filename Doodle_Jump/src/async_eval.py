@@ -0,0 +1,172 @@
+"""
+Evaluation in a separate process, so training never stops for it (train.py --async-eval).
+Every eval_freq calls the trainer saves a policy snapshot (model.save to a temp .zip, then an atomic rename)
+and queues its path. The worker process loads the newest snapshot, plays n_eval_episodes deterministic
+episodes on a fixed seed bank (episode i is seeded seed + i, see eval.py), and appends them to
+evaluations.npz in EvalCallback's format. A new best snapshot is copied to best_model.zip. If the worker
+falls behind, it skips to the newest snapshot and drops the stale ones. Results go back over a queue and
+are logged as eval/* at the end of the next rollout.
+"""
+import os
+import queue
+import shutil
+import sys
+import time
+import numpy as np
+
+# Add the root directory to Python path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+# -------------------- Worker --------------------
+def _replace_npz(path, **arrays):
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)  # readers (plot scripts, a resumed run) never see a half-written file
+
+def eval_worker(jobs, results, persona: str, n_episodes: int, seed: int, log_path: str, best_model_path: str,
+                n_envs: int = 8):
+    """
+    Process main: evaluate (timesteps, snapshot path) jobs until a None arrives. Writes `log_path`
+    (evaluations.npz) after every evaluation and copies new best snapshots to `best_model_path`.
+    """
+    # one core's worth of eval: keep torch from spreading over the trainer's cores, and yield to the trainer
+    os.environ["OMP_NUM_THREADS"] = "1"
+    if hasattr(os, "nice"):
+        os.nice(5)
+    from eval import infer_algo_from_path, load_model, run_episodes
+    import torch
+    torch.set_num_threads(1)
+
+    timesteps, returns, lengths = [], [], []
+    best = -np.inf
+    stop = False
+    while not stop:
+        job = jobs.get()
+        # skip to the newest snapshot; the stale ones are never evaluated
+        pending = [job]
+        while True:
+            try:
+                pending.append(jobs.get_nowait())
+            except queue.Empty:
+                break
+        if None in pending:
+            stop = True
+            pending = pending[:pending.index(None)]
+        for stale_steps, stale_path in pending[:-1]:
+            os.remove(stale_path)
+            results.put({"timesteps": stale_steps, "skipped": True})
+        if not pending:
+            continue
+        steps, path = pending[-1]
+
+        t0 = time.perf_counter()
+        model = load_model(path, infer_algo_from_path(path))
+        eps = run_episodes(model, n_episodes, persona, n_envs, base_seed=seed)
+        ep_returns = [r["return_"] for r in eps]
+        ep_lengths = [r["steps"] for r in eps]
+        timesteps.append(steps)
+        returns.append(ep_returns)
+        lengths.append(ep_lengths)
+        _replace_npz(log_path, timesteps=np.array(timesteps), results=np.array(returns), ep_lengths=np.array(lengths))
+
+        mean = float(np.mean(ep_returns))
+        new_best = mean > best
+        if new_best:
+            best = mean
+            tmp = f"{best_model_path}.{os.getpid()}.tmp"
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, best_model_path)
+        os.remove(path)
+        results.put({"timesteps": steps, "mean_reward": mean, "std_reward": float(np.std(ep_returns)),
+                     "mean_ep_length": float(np.mean(ep_lengths)), "new_best": new_best,
+                     "eval_seconds": time.perf_counter() - t0})
+
+# -------------------- Trainer side --------------------
+def async_eval_callback(persona: str, n_episodes: int, eval_freq: int, seed: int, log_dir: str, model_dir: str,
+                        snapshot_dir: str, verbose: int = 1):
+    """
+    SB3 callback replacing EvalCallback(eval_freq, n_eval_episodes, deterministic=True, best_model_save_path,
+    log_path): the same output files, but the evaluation runs in a spawned worker process.
+    """
+    import multiprocessing as mp
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    class AsyncEvalCallback(BaseCallback):
+        def _init_callback(self):
+            os.makedirs(snapshot_dir, exist_ok=True)
+            os.makedirs(log_dir, exist_ok=True)
+            os.makedirs(model_dir, exist_ok=True)
+            ctx = mp.get_context("spawn")  # torch is not fork-safe once its thread pool is up
+            self.jobs, self.results = ctx.Queue(), ctx.Queue()
+            self.proc = ctx.Process(
+                target=eval_worker, daemon=True,
+                args=(self.jobs, self.results, persona, n_episodes, seed, os.path.join(log_dir, "evaluations.npz"),
+                      os.path.join(model_dir, "best_model.zip")))
+            self.proc.start()
+            self.publish_seconds = 0.0
+            self.worker_dead = False
+
+        def _on_step(self):
+            if self.n_calls % eval_freq == 0:
+                self._publish()
+            return True
+
+        def _on_rollout_end(self):
+            self._drain()
+
+        def _on_training_end(self):
+            self.jobs.put(None)
+            if verbose:
+                print("[async-eval] waiting for the eval worker to finish its last snapshot")
+            # poll instead of a bare join, so a crashed worker cannot hang the trainer
+            while self.proc.is_alive():
+                self._drain()
+                self.proc.join(timeout=0.5)
+            self._drain()
+            self.logger.dump(self.num_timesteps)  # the last results arrive after SB3's final rollout dump
+            if self.proc.exitcode and not self.worker_dead:
+                print(f"[async-eval] eval worker exited with code {self.proc.exitcode}")
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            if verbose:
+                print(f"[async-eval] trainer spent {self.publish_seconds:.2f} s publishing snapshots")
+
+        def _publish(self):
+            if self.worker_dead:
+                return
+            if not self.proc.is_alive():
+                # nobody would consume the snapshot: say so once and stop publishing for the rest of the run
+                self.worker_dead = True
+                self._drain()
+                print(f"[async-eval] eval worker died (exit code {self.proc.exitcode}) at {self.num_timesteps} steps; "
+                      f"no further evaluations this run")
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+                return
+            t0 = time.perf_counter()
+            path = os.path.join(snapshot_dir, f"snapshot_{self.num_timesteps}.zip")
+            tmp = path + ".tmp.zip"
+            self.model.save(tmp)
+            os.replace(tmp, path)
+            self.jobs.put((self.num_timesteps, path))
+            self.publish_seconds += time.perf_counter() - t0
+
+        def _drain(self):
+            while True:
+                try:
+                    r = self.results.get_nowait()
+                except queue.Empty:
+                    return
+                if r.get("skipped"):
+                    if verbose:
+                        print(f"[async-eval] skipped snapshot at {r['timesteps']} steps (worker behind)")
+                    continue
+                self.logger.record("eval/mean_reward", r["mean_reward"])
+                self.logger.record("eval/mean_ep_length", r["mean_ep_length"])
+                self.logger.record("eval/timesteps", r["timesteps"])
+                self.logger.record("eval/eval_seconds", r["eval_seconds"])
+                if verbose:
+                    print(f"[async-eval] num_timesteps={r['timesteps']}, episode_reward={r['mean_reward']:.2f} "
+                          f"+/- {r['std_reward']:.2f}, length {r['mean_ep_length']:.1f} ({r['eval_seconds']:.1f} s)"
+                          + (" - new best" if r["new_best"] else ""))
+
+    return AsyncEvalCallback()
@@ -0,0 +1,247 @@
+"""
+Throughput benchmark for DoodleJumpEnv.
+Times step(), reset(), _get_obs() and render("rgb_array") for every persona x entity density; step() also
+runs under two action streams: uniform random, and a policy (a scripted climber, or --model). Each case
+reports calls/sec and p50/p99 latency. Step cases also report tracemalloc bytes per step: the transient
+peak, plus whatever the step leaves behind. Results go to JSON; with --baseline, the run fails when any
+case's throughput drops by more than --max-regression percent.
+
+    python src/bench_env.py --out logs/bench_env.json
+    python src/bench_env.py --baseline logs/bench_env.json --max-regression 10 --out logs/bench_env_new.json
+"""
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# Add the root directory to Python path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from envs.doodle_jump_env import DoodleJumpEnv, load_personas, persona_config
+
+PERSONAS = list(load_personas())  # as defined in configs/personas.yaml (unknown names would run survivor)
+# entity density -> (coin_spawn_p, enemy_spawn_p) overriding the persona's; None keeps the persona's own
+DENSITIES = {"sparse": (0.0, 0.0), "default": None, "dense": (0.8, 0.6)}
+STREAMS = ["random", "policy"]
+
+# -------------------- Setup --------------------
+def make_env(persona: str, density: str, seed: int, render_mode=None) -> DoodleJumpEnv:
+    env = DoodleJumpEnv(render_mode=render_mode, seed=seed, reward_preset=persona)
+    if DENSITIES[density] is not None:
+        coin_p, enemy_p = DENSITIES[density]
+        env.cfg = dataclasses.replace(persona_config(persona), coin_spawn_p=coin_p, enemy_spawn_p=enemy_p)
+    return env
+
+def climber(obs):
+    """Scripted policy: steer under the nearest platform above, shoot when an enemy is overhead."""
+    if obs[12] < 0 and abs(obs[10]) < 0.1 and obs[11] < 0:
+        return 3
+    for relx, rely in (obs[4:6], obs[6:8]):
+        if rely < 0:
+            return 0 if relx < -0.05 else 1 if relx > 0.05 else 2
+    return 2
+
+def action_source(stream: str, seed: int, model=None):
+    """fn(obs) -> action for one of STREAMS; random actions come from a fixed-seed block."""
+    if stream == "policy":
+        if model is None:
+            return climber
+        return lambda obs: int(model.predict(obs, deterministic=True)[0])
+    rng = np.random.default_rng(seed)
+    block = iter(())
+    def random_action(obs):
+        nonlocal block
+        try:
+            return next(block)
+        except StopIteration:
+            block = iter(rng.integers(0, 4, size=4096).tolist())
+            return next(block)
+    return random_action
+
+def summarize(times_ns) -> dict:
+    t = np.asarray(times_ns, dtype=np.float64) / 1e3  # us
+    return {
+        "n": int(t.size),
+        "per_sec": float(t.size / (t.sum() / 1e6)),
+        "mean_us": float(t.mean()),
+        "p50_us": float(np.percentile(t, 50)),
+        "p99_us": float(np.percentile(t, 99)),
+    }
+
+# -------------------- Cases --------------------
+def bench_step(env, act, n: int, warmup: int) -> dict:
+    """Time env.step alone: choosing actions and resetting finished episodes happen off the clock."""
+    obs, _ = env.reset()
+    times = np.empty(warmup + n, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(warmup + n):
+        a = act(obs)
+        t0 = clock()
+        obs, _, done, trunc, _ = env.step(a)
+        times[i] = clock() - t0
+        if done or trunc:
+            obs, _ = env.reset()
+    return summarize(times[warmup:])
+
+def bench_step_alloc(env, act, n: int) -> dict:
+    """tracemalloc bytes per step: mean transient peak, and net bytes still held after n steps."""
+    obs, _ = env.reset()
+    peaks = np.empty(n, dtype=np.int64)
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for i in range(n):
+        a = act(obs)
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        obs, _, done, trunc, _ = env.step(a)
+        peaks[i] = tracemalloc.get_traced_memory()[1] - before
+        if done or trunc:
+            obs, _ = env.reset()
+    retained = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return {"alloc_peak_bytes_per_step": float(peaks.mean()), "retained_bytes_per_step": float(retained / n)}
+
+def bench_reset(env, n: int) -> dict:
+    times = np.empty(n, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(n):
+        t0 = clock()
+        env.reset(seed=i)
+        times[i] = clock() - t0
+    return summarize(times)
+
+def bench_along_trajectory(env, act, n: int, call) -> dict:
+    """Time `call()` on n successive states of a random-action trajectory (the steps are not timed)."""
+    obs, _ = env.reset()
+    times = np.empty(n, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(n):
+        obs, _, done, trunc, _ = env.step(act(obs))
+        if done or trunc:
+            obs, _ = env.reset()
+        t0 = clock()
+        call()
+        times[i] = clock() - t0
+    return summarize(times)
+
+def run_suite(personas, densities, streams, steps: int, repeat: int = 3, seed: int = 0, model=None,
+              verbose: bool = True) -> dict:
+    """{case name: metrics}; throughput cases keep the fastest of `repeat` runs."""
+    results = {}
+    def record(name, runs, extra=None):
+        best = max(runs, key=lambda r: r["per_sec"])
+        results[name] = {**best, **(extra or {})}
+        if verbose:
+            r = results[name]
+            alloc = f"  alloc {r['alloc_peak_bytes_per_step']:7.0f} B/step" if "alloc_peak_bytes_per_step" in r else ""
+            print(f"[bench] {name:<36s} {r['per_sec']:10.0f}/s  p50 {r['p50_us']:7.1f} us  "
+                  f"p99 {r['p99_us']:7.1f} us{alloc}")
+
+    warmup = max(steps // 20, 100)
+    light = max(steps // 10, 200)  # reset / obs / render are far slower per call than step
+    for persona in personas:
+        for density in densities:
+            for stream in streams:
+                env = make_env(persona, density, seed)
+                runs = [bench_step(env, action_source(stream, seed + k, model), steps, warmup) for k in range(repeat)]
+                alloc = bench_step_alloc(env, action_source(stream, seed, model), light)
+                record(f"step/{persona}/{density}/{stream}", runs, alloc)
+                env.close()
+
+            env = make_env(persona, density, seed)
+            record(f"reset/{persona}/{density}", [bench_reset(env, light) for _ in range(repeat)])
+            record(f"get_obs/{persona}/{density}",
+                   [bench_along_trajectory(env, action_source("random", seed + k), steps, env._get_obs)
+                    for k in range(repeat)])
+            env.close()
+
+            env = make_env(persona, density, seed, render_mode="rgb_array")
+            record(f"render_rgb/{persona}/{density}",
+                   [bench_along_trajectory(env, action_source("random", seed + k), light, env.render)
+                    for k in range(repeat)])
+            env.close()
+    return results
+
+# -------------------- Baseline comparison --------------------
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """[(case, baseline per_sec, current per_sec, change %)] for cases slower than the baseline by > max_regression %."""
+    failures = []
+    for name, base in baseline.items():
+        if name not in results:
+            continue
+        old, new = base["per_sec"], results[name]["per_sec"]
+        change = 100.0 * (new - old) / old
+        flag = "REGRESSION" if change < -max_regression else ""
+        print(f"[bench] {name:<36s} {old:10.0f} -> {new:10.0f}/s  {change:+6.1f}%  {flag}")
+        if flag:
+            failures.append((name, old, new, change))
+    return failures
+
+def _same_file(a: str, b: str) -> bool:
+    if os.path.exists(a) and os.path.exists(b):
+        return os.path.samefile(a, b)
+    return os.path.abspath(a) == os.path.abspath(b)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--personas", nargs="+", choices=PERSONAS, default=PERSONAS)
+    ap.add_argument("--densities", nargs="+", choices=list(DENSITIES), default=list(DENSITIES))
+    ap.add_argument("--streams", nargs="+", choices=STREAMS, default=STREAMS)
+    ap.add_argument("--steps", type=int, default=10_000, help="Timed step()/_get_obs() calls per case")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", type=str, default=None,
+                    help="Checkpoint (.zip/.npz) driving the policy stream instead of the scripted climber")
+    ap.add_argument("--out", type=str, default="logs/bench_env.json")
+    ap.add_argument("--baseline", type=str, default=None, help="Earlier --out JSON to compare against")
+    ap.add_argument("--max-regression", type=float, default=10.0,
+                    help="Fail if any case is this many percent slower than the baseline")
+    args = ap.parse_args()
+    if args.baseline and _same_file(args.out, args.baseline):
+        ap.error(f"--out {args.out} would overwrite the --baseline it is compared against; pick another --out")
+    # read the baseline up front: a missing or broken one should fail before minutes of benchmarking
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    model = None
+    if args.model:
+        from eval import load_model
+        model = load_model(args.model)
+
+    results = run_suite(args.personas, args.densities, args.streams, args.steps, args.repeat, args.seed, model)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "steps": args.steps,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "model": args.model,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] wrote -> {args.out}")
+
+    if baseline is not None:
+        failures = compare(results, baseline, args.max_regression)
+        if failures:
+            print(f"[bench] {len(failures)} case(s) regressed by more than {args.max_regression:.0f}%")
+            sys.exit(1)
+        print(f"[bench] no case regressed by more than {args.max_regression:.0f}%")
+
+if __name__ == "__main__":
+    main()
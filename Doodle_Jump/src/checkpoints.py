@@ -0,0 +1,303 @@
+"""
+Background checkpointing for train.py --ckpt-async, with retention and optional delta storage.
+Saving happens in two halves. On the training thread, snapshot() copies what model.save() would write:
+the SB3 "data" JSON and every tensor of the policy, the optimizer state and the torch variables (a few ms).
+A writer thread then encodes that copy as <run>_<N>_steps.ckpt.npz. Tensors are stored as byte planes
+(byte k of every element together), which deflates better than raw floats. With delta=True each tensor is
+first XORed with the same tensor of the previous checkpoint, so its sign/exponent planes are mostly zeros
+(policy weights only: the optimizer moments change too much to gain from it). A full keyframe is written
+every `keyframe_every` checkpoints. Both are bit-exact. weights_only=True drops the Adam moments (about
+2/3 of a checkpoint); such checkpoints load with a fresh optimizer state, fine for evaluation.
+Retention keeps the last N, every Kth and the best (by training episode return), plus the delta bases
+those need; everything else this writer wrote is deleted. materialize() turns a checkpoint back into an
+SB3 zip for PPO.load / A2C.load, and eval.load_model() reads .ckpt.npz files directly.
+
+    python src/checkpoints.py models/ppo_survivor_algo_comp_s7_500000_steps.ckpt.npz   # -> ..._steps.zip
+"""
+import argparse
+import copy
+import io
+import json
+import os
+import queue
+import threading
+import time
+import zipfile
+import numpy as np
+
+CKPT_SUFFIX = ".ckpt.npz"
+CKPT_VERSION = 1
+PYTORCH_VARIABLES = "pytorch_variables"  # group holding model._get_torch_save_params()'s torch variables
+_TENSOR = "__ckpt_tensor__"              # skeleton placeholder: (_TENSOR, index into the group's arrays)
+
+# -------------------- Snapshot (training thread) --------------------
+def _split(obj, arrays):
+    """Copy of nested dicts/lists/tuples with every tensor moved (as a NumPy copy) into `arrays`."""
+    import torch
+    if isinstance(obj, torch.Tensor):
+        arrays.append(obj.detach().cpu().numpy().copy())
+        return (_TENSOR, len(arrays) - 1)
+    if isinstance(obj, dict):
+        return type(obj)((k, _split(v, arrays)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_split(v, arrays) for v in obj)
+    return copy.deepcopy(obj)
+
+def _join(obj, tensors):
+    if isinstance(obj, tuple) and len(obj) == 2 and obj[0] == _TENSOR:
+        return tensors[obj[1]]
+    if isinstance(obj, dict):
+        return type(obj)((k, _join(v, tensors)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_join(v, tensors) for v in obj)
+    return obj
+
+def snapshot(model, weights_only: bool = False) -> dict:
+    """
+    Everything model.save() would write, copied so training can go on while it is encoded. With
+    `weights_only`, optimizer states keep their param_groups but not the per-parameter moments.
+    """
+    from stable_baselines3.common.save_util import data_to_json
+    from stable_baselines3.common.utils import safe_mean
+
+    # the "data" part exactly as BaseAlgorithm.save builds it
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dict_names, torch_variable_names = model._get_torch_save_params()
+    for name in state_dict_names + torch_variable_names:
+        exclude.add(name.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+
+    objects = dict(model.get_parameters())
+    if weights_only:
+        objects = {name: dict(state, state={}) if name.endswith("optimizer") else state
+                   for name, state in objects.items()}
+    variables = {}
+    for name in torch_variable_names:
+        obj = model
+        for attr in name.split("."):
+            obj = getattr(obj, attr)
+        variables[name] = obj
+    objects[PYTORCH_VARIABLES] = variables
+
+    groups = {}
+    for name, obj in objects.items():
+        arrays = []
+        groups[name] = (_split(obj, arrays), arrays)
+    infos = model.ep_info_buffer
+    return dict(
+        algo=type(model).__name__.lower(),
+        num_timesteps=int(model.num_timesteps),
+        data=data_to_json(data),
+        groups=groups,
+        score=float(safe_mean([ep["r"] for ep in infos])) if infos else None,
+    )
+
+# -------------------- Encoding --------------------
+def _planes(a, base=None):
+    """(itemsize, n) byte planes of `a`, XORed with `base` (same dtype and shape) when given."""
+    x = a.reshape(-1).view(np.uint8)
+    if base is not None:
+        x = np.bitwise_xor(x, base.reshape(-1).view(np.uint8))
+    return np.ascontiguousarray(x.reshape(-1, a.dtype.itemsize).T)
+
+def _unplanes(planes, dtype, shape, base=None):
+    x = np.ascontiguousarray(planes.T).reshape(-1)
+    if base is not None:
+        x = np.bitwise_xor(x, base.reshape(-1).view(np.uint8))
+    return x.view(dtype).reshape(shape)
+
+def _torch_bytes(obj):
+    import torch
+    buf = io.BytesIO()
+    torch.save(obj, buf)
+    return np.frombuffer(buf.getvalue(), dtype=np.uint8)
+
+# -------------------- Writer --------------------
+class CheckpointWriter:
+    """Encodes and writes snapshots on a background thread, then applies the retention policy."""
+
+    def __init__(self, save_dir: str, name_prefix: str, keep_last: int = 3, keep_every: int = 0,
+                 keep_best: bool = False, delta: bool = False, keyframe_every: int = 10, verbose: int = 1):
+        self.save_dir = save_dir
+        self.name_prefix = name_prefix
+        self.keep_last = max(keep_last, 1)  # the newest checkpoint is the next one's delta base
+        self.keep_every = keep_every
+        self.keep_best = keep_best
+        self.delta = delta
+        self.keyframe_every = max(keyframe_every, 1)
+        self.verbose = verbose
+        self.entries = []   # per checkpoint written: path, timesteps, score, base (entry index or None), depth, deleted
+        self._prev = None   # {group: arrays} of the last checkpoint written, the next delta base
+        self.bytes_written = 0
+        self.write_seconds = 0.0
+        os.makedirs(save_dir, exist_ok=True)
+        self._queue = queue.Queue(maxsize=2)  # at most two snapshots held in memory; beyond that submit() waits
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, snap: dict):
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+        self._queue.put(snap)
+
+    def close(self):
+        """Write everything still queued, then stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+
+    def _run(self):
+        while (snap := self._queue.get()) is not None:
+            if self._error is not None:
+                continue  # keep draining after a failure so submit()/close() never block
+            try:
+                t0 = time.perf_counter()
+                self._write(snap)
+                self._retain()
+                self.write_seconds += time.perf_counter() - t0
+            except Exception as e:  # surfaced to the trainer on the next submit()/close()
+                self._error = e
+
+    def _write(self, snap):
+        path = os.path.join(self.save_dir, f"{self.name_prefix}_{snap['num_timesteps']}_steps{CKPT_SUFFIX}")
+        prev = self.entries[-1] if self.entries else None
+        use_delta = self.delta and prev is not None and prev["depth"] + 1 < self.keyframe_every
+        out, layout = {}, {}
+        for group, (skeleton, arrays) in snap["groups"].items():
+            # Adam moments are running averages of noisy gradients: XOR with the previous ones only adds entropy
+            bases = self._prev.get(group, []) if use_delta and not group.endswith("optimizer") else []
+            layout[group] = []
+            for i, a in enumerate(arrays):
+                base = bases[i] if i < len(bases) else None
+                xor = base is not None and base.dtype == a.dtype and base.shape == a.shape
+                layout[group].append([a.dtype.str, list(a.shape), xor])
+                out[f"{group}/{i}"] = _planes(a, base if xor else None)
+            out[f"{group}/skeleton"] = _torch_bytes(skeleton)
+        manifest = dict(version=CKPT_VERSION, algo=snap["algo"], num_timesteps=snap["num_timesteps"],
+                        score=snap["score"], base=os.path.basename(prev["path"]) if use_delta else None,
+                        layout=layout)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, manifest=np.frombuffer(json.dumps(manifest).encode(), dtype=np.uint8),
+                            algo=snap["algo"],  # read by eval.infer_algo_from_path
+                            data=np.frombuffer(snap["data"].encode(), dtype=np.uint8), **out)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        self.bytes_written += size
+        self._prev = {group: arrays for group, (_, arrays) in snap["groups"].items()}
+        self.entries.append(dict(path=path, timesteps=snap["num_timesteps"], score=snap["score"],
+                                 base=len(self.entries) - 1 if use_delta else None,
+                                 depth=prev["depth"] + 1 if use_delta else 0, deleted=False))
+        if self.verbose:
+            print(f"[ckpt] {path} ({size / 1024:.0f} KB, {'delta' if use_delta else 'keyframe'})")
+
+    def keep(self) -> set:
+        """Indices of the checkpoints the policy retains, before adding the delta bases they need."""
+        n = len(self.entries)
+        keep = set(range(max(n - self.keep_last, 0), n))
+        if self.keep_every:
+            keep |= {i for i in range(n) if (i + 1) % self.keep_every == 0}
+        scored = [i for i in range(n) if self.entries[i]["score"] is not None]
+        if self.keep_best and scored:
+            keep.add(max(scored, key=lambda i: self.entries[i]["score"]))
+        return keep
+
+    def _retain(self):
+        needed = set()
+        for i in self.keep():
+            while i is not None and i not in needed:
+                needed.add(i)
+                i = self.entries[i]["base"]
+        for i, e in enumerate(self.entries):
+            if i not in needed and not e["deleted"]:
+                os.remove(e["path"])
+                e["deleted"] = True
+                if self.verbose:
+                    print(f"[ckpt] retention: removed {e['path']}")
+
+# -------------------- Reading --------------------
+def read_checkpoint(path: str) -> dict:
+    """Decode a checkpoint, following its delta chain: manifest, data JSON and {group: (skeleton bytes, arrays)}."""
+    with np.load(path, allow_pickle=False) as f:
+        manifest = json.loads(f["manifest"].tobytes())
+        if manifest["version"] != CKPT_VERSION:
+            raise ValueError(f"{path}: checkpoint version {manifest['version']}, expected {CKPT_VERSION}")
+        raw = {k: f[k] for k in f.files}
+    base = None
+    if manifest["base"] is not None:
+        base = read_checkpoint(os.path.join(os.path.dirname(path), manifest["base"]))["groups"]
+    groups = {}
+    for group, layout in manifest["layout"].items():
+        arrays = [_unplanes(raw[f"{group}/{i}"], np.dtype(dtype), shape, base[group][1][i] if xor else None)
+                  for i, (dtype, shape, xor) in enumerate(layout)]
+        groups[group] = (raw[f"{group}/skeleton"], arrays)
+    return dict(manifest=manifest, data=raw["data"].tobytes().decode(), groups=groups)
+
+def materialize(path: str, out=None):
+    """
+    Rebuild the SB3 zip model.save() would have written, into `out` (a path or a binary file object,
+    e.g. io.BytesIO to load without touching disk; default: the checkpoint path with .zip). Returns `out`.
+    """
+    import torch
+    import stable_baselines3 as sb3
+    from stable_baselines3.common.utils import get_system_info
+
+    ckpt = read_checkpoint(path)
+    if out is None:
+        out = path[:-len(CKPT_SUFFIX)] + ".zip"
+    # same entries as stable_baselines3.common.save_util.save_to_zip_file
+    with zipfile.ZipFile(out, mode="w") as archive:
+        archive.writestr("data", ckpt["data"])
+        for group, (skeleton, arrays) in ckpt["groups"].items():
+            obj = _join(torch.load(io.BytesIO(skeleton.tobytes()), weights_only=False),
+                        [torch.from_numpy(a.copy()) for a in arrays])
+            with archive.open(group + ".pth", mode="w", force_zip64=True) as f:
+                torch.save(obj, f)
+        archive.writestr("_stable_baselines3_version", sb3.__version__)
+        archive.writestr("system_info.txt", get_system_info(print_info=False)[1])
+    return out
+
+# -------------------- Training callback --------------------
+def checkpoint_callback(save_freq: int, save_dir: str, name_prefix: str, weights_only: bool = False,
+                        **writer_kwargs):
+    """SB3 callback replacing CheckpointCallback: snapshot every save_freq calls, write in the background."""
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    class AsyncCheckpointCallback(BaseCallback):
+        def _init_callback(self):
+            self.writer = CheckpointWriter(save_dir, name_prefix, **writer_kwargs)
+            self.snapshot_seconds = 0.0
+
+        def _on_step(self):
+            if self.n_calls % save_freq == 0:
+                t0 = time.perf_counter()
+                snap = snapshot(self.model, weights_only)
+                self.snapshot_seconds += time.perf_counter() - t0
+                self.writer.submit(snap)
+            return True
+
+        def _on_training_end(self):
+            self.writer.close()
+            w = self.writer
+            kept = sum(not e["deleted"] for e in w.entries)
+            print(f"[ckpt] {len(w.entries)} checkpoint(s), {kept} kept, {w.bytes_written / 1024:.0f} KB written; "
+                  f"training thread spent {self.snapshot_seconds:.2f} s snapshotting, "
+                  f"writer {w.write_seconds:.2f} s encoding/writing")
+
+    return AsyncCheckpointCallback()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="+", help=f"{CKPT_SUFFIX} checkpoints to turn into SB3 .zip files")
+    ap.add_argument("--out", type=str, default=None, help="Output path (single checkpoint only)")
+    args = ap.parse_args()
+    if args.out and len(args.paths) > 1:
+        ap.error("--out only works with a single checkpoint")
+    for p in args.paths:
+        print(f"[ckpt] {p} -> {materialize(p, args.out)}")
+
+if __name__ == "__main__":
+    main()
@@ -2,89 +2,328 @@ import argparse
 import csv
 import os
 import sys
+import time
+import zipfile
 import numpy as np
-from stable_baselines3 import PPO, A2C
 
 # Add the root directory to Python path
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
-from envs.doodle_jump_env import DoodleJumpEnv
+from eval_stats import EvalStats, StopRule, steps_saved
 
-ALGOS = {"ppo": PPO, "a2c": A2C}
+ALGOS = ("ppo", "a2c")
 
 def infer_algo_from_path(path: str) -> str:
-    lower = path.lower()
+    if path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as f:
+            return str(f["algo"])
+    lower = os.path.basename(path).lower()
     if "a2c" in lower:
         return "a2c"
-    return "ppo"
-
-def evaluate(model_path: str, algo: str, episodes: int, render: bool, persona: str, out_csv: str|None):
-    env = DoodleJumpEnv(render_mode="human" if render else None, seed=123, reward_preset=persona)
-    Model = ALGOS[algo]
-    model = Model.load(model_path, device="cpu")
-
-    rows = []
-    returns, lengths, heights, platforms_landed, deaths = [], [], [], [], []
-
-    for ep in range(episodes):
-        obs, info = env.reset()
-        done, trunc = False, False
-        ep_return, ep_len = 0.0, 0
-        best_height = 0.0
-        ep_platforms, ep_death = 0, 0
-
-        while not (done or trunc):
-            action, _ = model.predict(obs, deterministic=True)
-            obs, reward, done, trunc, info = env.step(int(action))
-            ep_return += reward
-            ep_len += 1
-            best_height = min(best_height, info.get("max_height", best_height))
-            ep_death = info.get("death", ep_death)
-            ep_platforms = info.get("platforms", ep_platforms)
-
-        returns.append(ep_return)
-        lengths.append(ep_len)
-        heights.append(best_height)
-        platforms_landed.append(ep_platforms)
-        deaths.append(ep_death)
-
-        print(f"Episode {ep+1}: return={ep_return:.2f}, steps={ep_len}, best_height={-best_height:.1f}, platforms={ep_platforms}, death={ep_death}")
-        rows.append(dict(
-            episode=ep+1, return_=ep_return, steps=ep_len,
-            best_height=-best_height, platforms=ep_platforms, death=ep_death,
-            algo=algo, persona=persona, model_path=model_path
-        ))
-
-    env.close()
-    print("\n=== Aggregate Metrics ===")
-    print(f"Mean return: {np.mean(returns):.2f} ± {np.std(returns):.2f}")
-    print(f"Mean steps: {np.mean(lengths):.1f}")
-    print(f"Mean best height: {-np.mean(heights):.1f}")
-    print(f"Mean platforms landed: {np.mean(platforms_landed):.1f}")
-    print(f"Deaths: {sum(deaths)}/{episodes} episodes ({100*sum(deaths)/episodes:.1f}%)")
+    if "ppo" in lower:
+        return "ppo"
+    # e.g. EvalCallback's best_model.zip: only PPO saves a clip_range
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return "ppo" if '"clip_range"' in zf.read("data").decode() else "a2c"
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return "ppo"
+
+def load_model(model_path: str, algo: str | None = None):
+    """
+    SB3 model for a .zip or a .ckpt.npz from checkpoints.py (materialized in memory), or a torch-free
+    NumpyPolicy for an .npz from np_policy.py (SB3 is then never imported).
+    """
+    if model_path.endswith(".ckpt.npz"):
+        import io
+        from checkpoints import materialize
+        from stable_baselines3 import PPO, A2C
+        Model = {"ppo": PPO, "a2c": A2C}[algo or infer_algo_from_path(model_path)]
+        return Model.load(materialize(model_path, io.BytesIO()), device="cpu")
+    if model_path.endswith(".npz"):
+        from np_policy import NumpyPolicy
+        return NumpyPolicy.load(model_path)
+    from stable_baselines3 import PPO, A2C
+    Model = {"ppo": PPO, "a2c": A2C}[algo or infer_algo_from_path(model_path)]
+    return Model.load(model_path, device="cpu")
+
+EVAL_SEED = 123
+
+def episode_seed(base_seed: int, ep: int) -> int:
+    # fixed per episode index, so results do not depend on how episodes are spread over envs
+    return base_seed + ep
+
+def iter_episodes(model, episode_ids, persona: str, n_envs: int = 8, render: bool = False,
+                  base_seed: int = EVAL_SEED, record: bool = False, traj=None):
+    """
+    Play the episodes in `episode_ids` on up to n_envs envs at once, with one batched model.predict per step,
+    yielding (episode, stats dict) as each one finishes (not necessarily in order). Episode i is reset with
+    episode_seed(base_seed, i). With `record`, stats also hold "record": an EpisodeRecord for src/replay.py.
+    Every step is also appended to `traj` (a TrajectoryWriter) when given, under a fresh store episode id per
+    episode (traj.new_episodes), so recording into a non-empty store never reuses ids.
+    """
+    from envs.doodle_jump_env import DoodleJumpEnv, obs_kwargs
+
+    ids = list(episode_ids)
+    if not ids:
+        return
+    n_envs = 1 if render else max(1, min(n_envs, len(ids)))
+    traj_ids = dict(zip(ids, traj.new_episodes(len(ids)).tolist())) if traj is not None else None
+    env_kwargs = obs_kwargs(model.observation_space)
+    envs = [DoodleJumpEnv(render_mode="human" if render else None, seed=base_seed, reward_preset=persona,
+                          record=record, **env_kwargs) for _ in range(n_envs)]
+    try:
+        slots = []  # per running env: [env, episode, return, steps, best_height, platforms, death]
+        obs = []
+        for ep, env in zip(ids, envs):
+            o, _ = env.reset(seed=episode_seed(base_seed, ep))
+            slots.append([env, ep, 0.0, 0, 0.0, 0, 0])
+            obs.append(o)
+        pending = iter(ids[len(envs):])
+
+        env_index = {env: i for i, env in enumerate(envs)}
+        while slots:
+            batch = np.stack(obs)
+            actions, _ = model.predict(batch, deterministic=True)
+            if traj is not None:
+                traj_env = np.array([env_index[slot[0]] for slot in slots], dtype=np.int32)
+                traj_ep = np.array([traj_ids[slot[1]] for slot in slots], dtype=np.int64)
+                traj_steps = []
+            keep_slots, keep_obs = [], []
+            for slot, action in zip(slots, actions):
+                env = slot[0]
+                o, reward, done, trunc, info = env.step(int(action))
+                if traj is not None:
+                    traj_steps.append((reward, done, trunc and not done, info))
+                slot[2] += reward
+                slot[3] += 1
+                slot[4] = min(slot[4], info.get("max_height", slot[4]))
+                slot[6] = info.get("death", slot[6])
+                slot[5] = info.get("platforms", slot[5])
+                if done or trunc:
+                    _, ep, ep_return, ep_len, best_height, ep_platforms, ep_death = slot
+                    res = dict(return_=ep_return, steps=ep_len, best_height=best_height,
+                               platforms=ep_platforms, death=ep_death)
+                    if record:
+                        res["record"] = env.episode_record()
+                    yield ep, res
+                    next_ep = next(pending, None)
+                    if next_ep is None:
+                        continue
+                    o, _ = env.reset(seed=episode_seed(base_seed, next_ep))
+                    slot[1:] = [next_ep, 0.0, 0, 0.0, 0, 0]
+                keep_slots.append(slot)
+                keep_obs.append(o)
+            if traj is not None:
+                rewards, terms, truncs, infos = zip(*traj_steps)
+                traj.append(batch, actions, np.array(rewards), np.array(terms), np.array(truncs), traj_env, traj_ep,
+                            infos)
+            slots, obs = keep_slots, keep_obs
+    finally:
+        for env in envs:
+            env.close()
+
+def run_episodes(model, episodes: int, persona: str, n_envs: int = 8, render: bool = False,
+                 base_seed: int = EVAL_SEED, record: bool = False):
+    """iter_episodes over episodes 0..episodes-1, collected into one stats dict per episode, in order."""
+    results = [None] * episodes
+    for ep, res in iter_episodes(model, range(episodes), persona, n_envs, render, base_seed, record):
+        results[ep] = res
+    return results
+
+def kept_records(results, which: str, tag: str = ""):
+    """EpisodeRecords of run_episodes(record=True) results (in episode order): "all" episodes or only "deaths"."""
+    kept = [r["record"] for r in results if which == "all" or r["death"]]
+    for rec in kept:
+        rec.tag = tag
+    return kept
+
+# -------------------- Streaming CSV --------------------
+CSV_FIELDS = ["episode", "return_", "steps", "best_height", "platforms", "death", "algo", "persona", "model_path",
+              "seed"]
+
+def read_done_rows(out_csv: str, model_path: str, persona: str, seed: int) -> list:
+    """
+    Rows already in `out_csv` for this model/persona/seed bank, for --resume. A torn last line (the eval was
+    killed mid-write) is cut off so appending continues cleanly.
+    """
+    if not os.path.exists(out_csv):
+        return []
+    with open(out_csv, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+    with open(out_csv, newline="") as f:
+        rows = list(csv.DictReader(f))
+    for r in rows:
+        if (r.get("model_path"), r.get("persona"), r.get("seed")) != (model_path, persona, str(seed)):
+            raise SystemExit(f"[eval] {out_csv} holds episodes of another model/persona/seed; "
+                             f"pick a new --out_csv or drop --resume")
+    return rows
+
+# -------------------- Adaptive eval --------------------
+def add_stop_args(ap):
+    """--adaptive and the StopRule knobs, shared by eval.py and eval_sweep.py."""
+    ap.add_argument("--adaptive", action="store_true",
+                    help="Play episodes in batches and stop once the CIs are tight (--episodes becomes the budget)")
+    ap.add_argument("--batch", type=int, default=16, help="Episodes per adaptive batch")
+    ap.add_argument("--min_episodes", type=int, default=16, help="Never stop before this many episodes")
+    ap.add_argument("--return_tol", type=float, default=50.0, help="Stop when the mean-return CI half-width is below this")
+    ap.add_argument("--crash_tol", type=float, default=0.05, help="Stop when the crash-rate CI half-width is below this")
+    ap.add_argument("--confidence", type=float, default=0.95)
 
+def stop_rule_from_args(args) -> StopRule | None:
+    if not args.adaptive:
+        return None
+    return StopRule(args.batch, args.min_episodes, args.return_tol, args.crash_tol, args.confidence)
+
+def evaluate(model_path: str, algo: str, episodes: int, render: bool, persona: str, out_csv: str|None,
+             n_envs: int = 8, seed: int = EVAL_SEED, save_episodes: str|None = None, save_which: str = "deaths",
+             resume: bool = False, progress_every: float = 5.0, stop_rule: StopRule | None = None,
+             record_traj: str | None = None):
+    """
+    Rows are appended to `out_csv` (flushed) in episode order as soon as they are known, so a killed eval keeps
+    everything up to the last row. With `resume`, episodes already in `out_csv` are skipped and folded into the
+    aggregates; since episode i is always seeded seed + i, the finished CSV matches an uninterrupted run.
+    With a `stop_rule`, episodes are played in batches and `episodes` is only the budget: the eval stops as soon
+    as the rule is satisfied. With `record_traj`, every step is appended to that trajectory store
+    (envs/doodle_jump_trajectories.py).
+    """
+    model = load_model(model_path, algo)
+    stats = EvalStats(episodes)
+
+    def report(ep, row):
+        stats.add(ep, row)
+        print(f"Episode {ep+1}: return={row['return_']:.2f}, steps={row['steps']}, best_height={row['best_height']:.1f}, "
+              f"platforms={row['platforms']}, death={row['death']}")
+
+    done_rows = read_done_rows(out_csv, model_path, persona, seed) if (resume and out_csv) else []
+    done = set()
+    for r in done_rows:
+        ep = int(r["episode"]) - 1
+        if 0 <= ep < episodes and ep not in done:
+            done.add(ep)
+            stats.add(ep, {m: float(r[m]) for m in EvalStats.METRICS})
+    if done:
+        print(f"[eval] resuming: {len(done)}/{episodes} episodes already in {out_csv}")
+    todo = [ep for ep in range(episodes) if ep not in done]
+
+    f = writer = None
+    if out_csv:
+        os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+        f = open(out_csv, "a" if done_rows else "w", newline="")
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        if not done_rows:
+            writer.writeheader()
+            f.flush()
+
+    traj = None
+    if record_traj:
+        from envs.doodle_jump_trajectories import TrajectoryWriter
+        space = model.observation_space
+        traj = TrajectoryWriter(record_traj, space.shape, space.dtype,
+                                meta=dict(source="eval", model_path=model_path, persona=persona, seed=seed))
+
+    results = {}  # episode -> stats, filled in completion order
+    buffered, order = {}, iter(todo)
+    next_ep = next(order, None)
+    stop = ""
+
+    def played():
+        # with a stop rule, batches are contiguous runs of `todo`, so every batch is fully in `stats` before the check
+        nonlocal stop
+        step = stop_rule.batch if stop_rule else max(len(todo), 1)
+        for i in range(0, len(todo), step):
+            if stop_rule and (stop := stop_rule.check(stats)):
+                return
+            yield from iter_episodes(model, todo[i:i + step], persona, n_envs, render, seed,
+                                     record=save_episodes is not None, traj=traj)
+
+    t0 = last_report = time.perf_counter()
+    try:
+        for ep, res in played():
+            results[ep] = res
+            buffered[ep] = res
+            # rows go out in episode order: hold finished episodes until all earlier ones are written
+            while next_ep in buffered:
+                res = buffered.pop(next_ep)
+                row = dict(episode=next_ep + 1, return_=res["return_"], steps=res["steps"],
+                           best_height=-res["best_height"], platforms=res["platforms"], death=res["death"],
+                           algo=algo, persona=persona, model_path=model_path, seed=seed)
+                report(next_ep, row)
+                if writer:
+                    writer.writerow(row)
+                    f.flush()
+                next_ep = next(order, None)
+            now = time.perf_counter()
+            if now - last_report >= progress_every:
+                last_report = now
+                n_played = len(results)
+                rate = n_played / (now - t0)
+                r, c = stats.acc["return_"], stats.acc["death"]
+                print(f"[eval] {stats.n}/{episodes} episodes | return {r.mean:.2f} ± {r.std:.2f} | "
+                      f"crash {100 * c.mean:.1f}% | {rate:.2f} ep/s | ETA {(len(todo) - n_played) / rate:.0f}s")
+    finally:
+        if f:
+            f.close()
+        if traj is not None:
+            traj.close()
+
+    ret, steps, height = stats.acc["return_"], stats.acc["steps"], stats.acc["best_height"]
+    platforms, deaths = stats.acc["platforms"], stats.acc["death"]
+    ci = stats.ci()
+    print("\n=== Aggregate Metrics ===")
+    print(f"Mean return: {ret.mean:.2f} ± {ret.std:.2f}  (95% CI {ci['return_'][0]:.2f} .. {ci['return_'][1]:.2f})")
+    print(f"Mean steps: {steps.mean:.1f}")
+    print(f"Mean best height: {height.mean:.1f}  (95% CI {ci['best_height'][0]:.1f} .. {ci['best_height'][1]:.1f})")
+    print(f"Mean platforms landed: {platforms.mean:.1f}")
+    print(f"Deaths: {round(deaths.mean * deaths.n)}/{deaths.n} episodes ({100*deaths.mean:.1f}%, "
+          f"95% CI {100*ci['death'][0]:.1f} .. {100*ci['death'][1]:.1f}%)")
+    if stop_rule:
+        saved = steps_saved(stats, episodes)
+        fixed = steps.mean * stats.n + saved
+        print(f"[eval] {stats.n}/{episodes} episodes, stopped on {stop or 'budget'}; "
+              f"~{saved:.0f} env steps saved vs the fixed budget ({100 * saved / max(fixed, 1):.0f}%)")
     if out_csv:
-        fieldnames = list(rows[0].keys()) if rows else ["episode","return_","steps","best_height","platforms","death","algo","persona","model_path"]
-        with open(out_csv, "w", newline="") as f:
-            w = csv.DictWriter(f, fieldnames=fieldnames)
-            w.writeheader()
-            for r in rows:
-                w.writerow(r)
         print(f"[eval] wrote metrics -> {out_csv}")
 
+    if traj is not None:
+        print(f"[eval] trajectory store {record_traj}: {traj.rows} steps")
+    if save_episodes:
+        from envs.doodle_jump_replay import save_episodes as save_records
+        # in episode order, so a replay.py index names the same episode for any --n_envs or timing
+        records = kept_records([results[ep] for ep in sorted(results)], save_which, model_path)
+        size = save_records(save_episodes, records)
+        print(f"[eval] saved {len(records)} episode(s) -> {save_episodes} ({size / 1024:.1f} KB); "
+              f"replay with src/replay.py")
+    return stats
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--model_path", default="models/ppo_survivor_final.zip")
-    ap.add_argument("--algo", choices=ALGOS.keys(), help="If omitted, inferred from model filename")
+    ap.add_argument("--algo", choices=ALGOS, help="If omitted, inferred from model filename")
     ap.add_argument("--episodes", type=int, default=20)
     ap.add_argument("--render", action="store_true")
     ap.add_argument("--persona", choices=["survivor", "greedy", "hunter"], default="survivor")
     ap.add_argument("--out_csv", type=str, default="logs/eval_metrics.csv")
+    ap.add_argument("--n_envs", type=int, default=8, help="Episodes played concurrently (rows do not depend on it)")
+    ap.add_argument("--seed", type=int, default=EVAL_SEED, help="Episode i is seeded seed + i")
+    ap.add_argument("--save_episodes", type=str, default=None,
+                    help="Record episodes (seed + packed actions) to this .npz for src/replay.py")
+    ap.add_argument("--save_which", choices=["deaths", "all"], default="deaths")
+    ap.add_argument("--resume", action="store_true",
+                    help="Skip episodes already in --out_csv (same model/persona/seed) and append the rest")
+    ap.add_argument("--progress_every", type=float, default=5.0, help="Seconds between live progress lines")
+    ap.add_argument("--record_traj", type=str, default=None,
+                    help="Append every step (obs, action, reward, done, info) to this trajectory store directory")
+    add_stop_args(ap)
     args = ap.parse_args()
 
     algo = args.algo or infer_algo_from_path(args.model_path)
-    evaluate(args.model_path, algo, args.episodes, args.render, args.persona, args.out_csv)
+    evaluate(args.model_path, algo, args.episodes, args.render, args.persona, args.out_csv, args.n_envs, args.seed,
+             args.save_episodes, args.save_which, args.resume, args.progress_every, stop_rule_from_args(args),
+             args.record_traj)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,129 @@
+"""
+Streaming statistics for eval.py: Welford running mean/std per metric, plus bootstrap confidence
+intervals whose resamples are drawn as per-episode count vectors, so every resampled mean is one matrix product.
+The crash rate gets a Wilson score interval instead: a bootstrap of all-0 or all-1 samples has zero width.
+StopRule decides when an adaptive eval has seen enough episodes.
+"""
+import math
+from statistics import NormalDist
+import numpy as np
+
+class Welford:
+    """Running mean / population std (ddof=0, like np.std) without keeping the samples."""
+    __slots__ = ("n", "mean", "_m2")
+
+    def __init__(self):
+        self.n, self.mean, self._m2 = 0, 0.0, 0.0
+
+    def add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self._m2 += d * (x - self.mean)
+
+    @property
+    def var(self):
+        return self._m2 / self.n if self.n else float("nan")
+
+    @property
+    def std(self):
+        return math.sqrt(self.var) if self.n else float("nan")
+
+def bootstrap_ci(samples, n_boot: int = 10_000, confidence: float = 0.95, seed: int = 0,
+                 chunk_elems: int = 4_000_000):
+    """
+    Percentile bootstrap CI of the mean for each row of `samples` (k, n), resampling the episodes jointly.
+    Returns a (k, 2) array of [low, high]. A fixed `seed` makes the interval reproducible.
+    """
+    x = np.atleast_2d(np.asarray(samples, dtype=np.float64))
+    k, n = x.shape
+    if n == 0:
+        return np.full((k, 2), np.nan)
+    rng = np.random.default_rng(seed)
+    means = np.empty((n_boot, k))
+    step = max(1, chunk_elems // n)
+    for lo in range(0, n_boot, step):
+        hi = min(lo + step, n_boot)
+        # counts[b, i] = how often episode i appears in resample b: one bincount over row-offset indices
+        idx = rng.integers(0, n, size=(hi - lo, n)) + (np.arange(hi - lo) * n)[:, None]
+        counts = np.bincount(idx.ravel(), minlength=(hi - lo) * n).reshape(hi - lo, n)
+        means[lo:hi] = counts @ x.T / n
+    alpha = (1.0 - confidence) / 2
+    return np.quantile(means, [alpha, 1.0 - alpha], axis=0).T
+
+def wilson_ci(successes: float, n: int, confidence: float = 0.95):
+    """Wilson score interval (low, high) of a binomial proportion; stays wide at 0/n and n/n, unlike the bootstrap."""
+    if n == 0:
+        return (float("nan"), float("nan"))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return (max(0.0, center - half), min(1.0, center + half))
+
+class EvalStats:
+    """Per-metric Welford accumulators, plus the per-episode arrays the bootstrap needs."""
+    METRICS = ("return_", "steps", "best_height", "platforms", "death")
+
+    def __init__(self, episodes: int):
+        self.acc = {m: Welford() for m in self.METRICS}
+        self.samples = np.full((len(self.METRICS), episodes), np.nan)
+        self.n = 0
+
+    def add(self, ep: int, row: dict):
+        """`row` holds the METRICS as written to the CSV (best_height >= 0 is height climbed)."""
+        for j, m in enumerate(self.METRICS):
+            v = float(row[m])
+            self.acc[m].add(v)
+            self.samples[j, ep] = v
+        self.n += 1
+
+    def ci(self, metrics=("return_", "best_height", "death"), **kwargs):
+        """{metric: (low, high)} CIs of the mean over the episodes seen so far: Wilson for death, else bootstrap."""
+        boot = [m for m in metrics if m != "death"]
+        x = self.samples[[self.METRICS.index(m) for m in boot]]
+        x = x[:, ~np.isnan(x).any(axis=0)]
+        out = dict(zip(boot, map(tuple, bootstrap_ci(x, **kwargs)))) if boot else {}
+        if "death" in metrics:
+            d = self.samples[self.METRICS.index("death")]
+            d = d[~np.isnan(d)]
+            out["death"] = wilson_ci(float(d.sum()), d.size, kwargs.get("confidence", 0.95))
+        return {m: out[m] for m in metrics}
+
+# -------------------- Sequential stopping --------------------
+class StopRule:
+    """
+    When to stop an adaptive eval that plays episodes in batches of `batch`, up to the fixed episode budget.
+    After at least `min_episodes`, a model stops once the CI half-width of its mean return is <= return_tol or that
+    of its crash rate (Wilson) is <= crash_tol, or once it is dominated: the paired CI of mean(return - best's return)
+    over their shared seeds lies entirely below 0. The CIs are re-checked after every batch without correction
+    for the repeated looks, so treat `confidence` as nominal.
+    """
+
+    def __init__(self, batch: int = 16, min_episodes: int = 16, return_tol: float = 50.0, crash_tol: float = 0.05,
+                 confidence: float = 0.95):
+        self.batch = batch
+        self.min_episodes = max(min_episodes, 2)
+        self.return_tol = return_tol
+        self.crash_tol = crash_tol
+        self.confidence = confidence
+
+    def check(self, stats: EvalStats, best_returns=None) -> str:
+        """Stop reason ("return_ci", "crash_ci", "dominated"), or "" to keep playing."""
+        if stats.n < self.min_episodes:
+            return ""
+        ci = stats.ci(("return_", "death"), confidence=self.confidence)
+        if (ci["return_"][1] - ci["return_"][0]) / 2 <= self.return_tol:
+            return "return_ci"
+        if (ci["death"][1] - ci["death"][0]) / 2 <= self.crash_tol:
+            return "crash_ci"
+        if best_returns is not None:
+            diff = stats.samples[0] - best_returns
+            diff = diff[~np.isnan(diff)]
+            if diff.size >= self.min_episodes and bootstrap_ci(diff, confidence=self.confidence)[0, 1] < 0:
+                return "dominated"
+        return ""
+
+def steps_saved(stats: EvalStats, budget: int) -> float:
+    """Estimated env steps the episodes left unplayed (budget - played) would have cost, at the mean episode length."""
+    return max(budget - stats.n, 0) * stats.acc["steps"].mean if stats.n else 0.0
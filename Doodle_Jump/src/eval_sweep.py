@@ -0,0 +1,184 @@
+"""
+Evaluate every checkpoint matching a glob and write one leaderboard CSV.
+Checkpoints are fanned out over a process pool; every model plays the same seed bank (episode i is
+seeded seed + i, as in eval.py), so differences between rows come from the policies, not the levels.
+With --adaptive, checkpoints race in rounds of --batch episodes. After each round, every checkpoint still in
+the race is checked against eval_stats.StopRule: its CIs are tight enough, or its paired returns on the
+shared seeds are significantly below the current leader's. Rounds wait for every checkpoint, so which
+checkpoints stop, and when, does not depend on worker timing.
+"""
+import argparse
+import csv
+import functools
+import glob
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+import numpy as np
+
+# Add the root directory to Python path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from eval import (EVAL_SEED, add_stop_args, infer_algo_from_path, iter_episodes, kept_records, load_model,
+                  run_episodes, stop_rule_from_args)
+from eval_stats import EvalStats, StopRule, bootstrap_ci, steps_saved
+
+# <run>_<N>_steps.zip (CheckpointCallback), <run>_<N>_steps.ckpt.npz (checkpoints.py) or <run>_final.zip (train.py)
+CKPT_RE = re.compile(r"^(?P<run>.+?)_(?:(?P<steps>\d+)_steps|final)$")
+
+FIELDS = ["rank", "model_path", "run", "algo", "persona", "timesteps", "episodes", "mean_return", "std_return",
+          "return_ci_low", "return_ci_high", "mean_steps", "mean_best_height", "mean_platforms", "crash_rate", "stop"]
+
+def _init_worker():
+    # one process per checkpoint already saturates the cores; stop torch from oversubscribing them
+    # (read when torch is first imported, which .npz checkpoints never do)
+    os.environ["OMP_NUM_THREADS"] = "1"
+
+def evaluate_checkpoint(model_path: str, persona: str, episodes: int, n_envs: int, seed: int,
+                        save_which: str | None = None) -> dict:
+    algo = infer_algo_from_path(model_path)
+    model = load_model(model_path, algo)
+    results = run_episodes(model, episodes, persona, n_envs, base_seed=seed, record=save_which is not None)
+    return checkpoint_row(model_path, algo, persona, int(model.num_timesteps), results, save_which)
+
+def checkpoint_row(model_path: str, algo: str, persona: str, timesteps: int, results: list,
+                   save_which: str | None = None, stop: str = "") -> dict:
+    name = os.path.basename(model_path).removesuffix(".ckpt.npz")
+    name = os.path.splitext(name)[0]
+    m = CKPT_RE.match(name)
+    returns = np.array([r["return_"] for r in results])
+    ci_low, ci_high = bootstrap_ci(returns)[0]
+    return dict(
+        model_path=model_path,
+        run=m.group("run") if m else name,
+        algo=algo,
+        persona=persona,
+        timesteps=timesteps,
+        episodes=len(results),
+        mean_return=float(returns.mean()),
+        std_return=float(returns.std()),
+        return_ci_low=float(ci_low),
+        return_ci_high=float(ci_high),
+        mean_steps=float(np.mean([r["steps"] for r in results])),
+        mean_best_height=float(-np.mean([r["best_height"] for r in results])),
+        mean_platforms=float(np.mean([r["platforms"] for r in results])),
+        crash_rate=float(np.mean([r["death"] for r in results])),
+        stop=stop,
+        records=kept_records(results, save_which, model_path) if save_which else [],
+    )
+
+# -------------------- Adaptive race --------------------
+@functools.lru_cache(maxsize=8)
+def _cached_model(model_path: str):
+    # a worker usually plays several rounds of the same checkpoints; keep them loaded between batches
+    algo = infer_algo_from_path(model_path)
+    return algo, load_model(model_path, algo)
+
+def play_batch(model_path: str, persona: str, episode_ids: list, n_envs: int, seed: int, record: bool):
+    """(algo, timesteps, [(episode, stats dict)] in episode order) for one round of one checkpoint."""
+    algo, model = _cached_model(model_path)
+    played = sorted(iter_episodes(model, episode_ids, persona, n_envs, base_seed=seed, record=record),
+                    key=lambda x: x[0])
+    return algo, int(model.num_timesteps), played
+
+def race(pool, paths: list, persona: str, episodes: int, n_envs: int, seed: int, rule: StopRule,
+         save_which: str | None = None) -> list:
+    """Rows for `paths`, each evaluated until `rule` stops it or it plays `episodes` episodes."""
+    state = {p: dict(stats=EvalStats(episodes), results=[], algo="", timesteps=0, stop="") for p in paths}
+    active, lo, rounds = list(paths), 0, 0
+    while active and lo < episodes:
+        rounds += 1
+        ids = list(range(lo, min(lo + rule.batch, episodes)))
+        futures = {pool.submit(play_batch, p, persona, ids, n_envs, seed, save_which is not None): p for p in active}
+        for fut in as_completed(futures):
+            st = state[futures[fut]]
+            st["algo"], st["timesteps"], played = fut.result()
+            for ep, res in played:
+                st["stats"].add(ep, dict(res, best_height=-res["best_height"]))
+                st["results"].append(res)
+        lo = ids[-1] + 1
+
+        leader = max(paths, key=lambda p: state[p]["stats"].acc["return_"].mean)  # every path played round 1
+        best_returns = state[leader]["stats"].samples[0]
+        for p in active:
+            st = state[p]
+            st["stop"] = rule.check(st["stats"], None if p == leader else best_returns)
+        stopped = [p for p in active if state[p]["stop"]]
+        active = [p for p in active if not state[p]["stop"]]
+        print(f"[sweep] round {rounds}: {lo} episodes, leader {leader} "
+              f"({state[leader]['stats'].acc['return_'].mean:.2f}), stopped {len(stopped)}, {len(active)} still racing")
+        for p in stopped:
+            print(f"[sweep]   {p}: {state[p]['stop']} after {state[p]['stats'].n} episodes")
+    for p in active:
+        state[p]["stop"] = "budget"
+
+    played = sum(st["stats"].acc["steps"].mean * st["stats"].n for st in state.values())
+    saved = sum(steps_saved(st["stats"], episodes) for st in state.values())
+    print(f"[sweep] adaptive: {played:.0f} env steps played; the fixed {episodes}-episode budget would have taken "
+          f"~{played + saved:.0f} (~{saved:.0f} saved, {100 * saved / max(played + saved, 1):.0f}%)")
+    return [checkpoint_row(p, st["algo"], persona, st["timesteps"], st["results"], save_which, st["stop"])
+            for p, st in state.items()]
+
+def sweep(pattern: str, persona: str, episodes: int, workers: int, n_envs: int, seed: int, out_csv: str,
+          save_episodes: str | None = None, save_which: str = "deaths", stop_rule: StopRule | None = None):
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise SystemExit(f"[sweep] no checkpoints match {pattern!r}")
+    workers = max(1, min(workers, len(paths)))
+    print(f"[sweep] {len(paths)} checkpoints x {'up to ' if stop_rule else ''}{episodes} episodes, {workers} workers, "
+          f"seeds {seed}..{seed + episodes - 1}")
+
+    rows = []
+    ctx = mp.get_context("spawn")  # torch is not fork-safe once its thread pool is up
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        if stop_rule:
+            rows = race(pool, paths, persona, episodes, n_envs, seed, stop_rule, save_which if save_episodes else None)
+        else:
+            futures = {pool.submit(evaluate_checkpoint, p, persona, episodes, n_envs, seed,
+                                   save_which if save_episodes else None): p for p in paths}
+            for fut in as_completed(futures):
+                rows.append(fut.result())
+        for row in rows:
+            print(f"[sweep] {row['model_path']}: return={row['mean_return']:.2f} height={row['mean_best_height']:.1f} "
+                  f"platforms={row['mean_platforms']:.1f} crash={100*row['crash_rate']:.0f}%")
+
+    rows.sort(key=lambda r: (-r["mean_return"], r["model_path"]))
+    records = [rec for row in rows for rec in row.pop("records")]
+    for i, row in enumerate(rows):
+        row["rank"] = i + 1
+    os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+    with open(out_csv, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"[sweep] wrote leaderboard -> {out_csv}")
+    if save_episodes:
+        from envs.doodle_jump_replay import save_episodes as save_records
+        size = save_records(save_episodes, records)
+        print(f"[sweep] saved {len(records)} episode(s) -> {save_episodes} ({size / 1024:.1f} KB)")
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--glob", default="models/*.zip",
+                    help="Checkpoint pattern (.zip, .ckpt.npz from train.py --ckpt-async, or .npz from np_policy.py)")
+    ap.add_argument("--persona", choices=["survivor", "greedy", "hunter"], default="survivor")
+    ap.add_argument("--episodes", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Checkpoints evaluated in parallel")
+    ap.add_argument("--n_envs", type=int, default=8, help="Episodes played concurrently per checkpoint")
+    ap.add_argument("--seed", type=int, default=EVAL_SEED, help="Seed bank: episode i is seeded seed + i")
+    ap.add_argument("--out_csv", type=str, default="logs/leaderboard.csv")
+    ap.add_argument("--save_episodes", type=str, default=None,
+                    help="Record every checkpoint's episodes to one .npz for src/replay.py (tag = model path)")
+    ap.add_argument("--save_which", choices=["deaths", "all"], default="deaths")
+    add_stop_args(ap)
+    args = ap.parse_args()
+
+    sweep(args.glob, args.persona, args.episodes, args.workers, args.n_envs, args.seed, args.out_csv,
+          args.save_episodes, args.save_which, stop_rule_from_args(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Torch-free inference for the MlpPolicy that train.py builds.
+`python src/np_policy.py models/ppo_survivor_final.zip [--fp16]` writes models/ppo_survivor_final.npz holding
+the actor's Linear weights; NumpyPolicy.load() runs that forward pass with plain NumPy and mirrors
+model.predict(obs, deterministic) on single or batched observations. Only the exporter needs torch/SB3.
+"""
+import argparse
+import os
+import numpy as np
+
+ACTIVATIONS = {
+    "ReLU": lambda x: np.maximum(x, 0, out=x),
+    "Tanh": lambda x: np.tanh(x, out=x),
+}
+
+# -------------------- Runner --------------------
+class NumpyPolicy:
+    """Actor MLP + argmax/sampled discrete actions; a drop-in for a loaded PPO/A2C model in eval code."""
+
+    def __init__(self, layers, activations, action_layer, observation_space, algo, num_timesteps, seed=None):
+        self.layers = layers
+        self.activations = [ACTIVATIONS[a] for a in activations]
+        self.action_layer = action_layer
+        self.observation_space = observation_space
+        self.algo = algo
+        self.num_timesteps = num_timesteps
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path, seed=None):
+        from gymnasium import spaces
+        with np.load(path, allow_pickle=False) as f:
+            n = int(f["n_layers"])
+            # float16 exports are only a storage format; matmuls run in float32
+            layers = [(f[f"W{i}"].astype(np.float32), f[f"b{i}"].astype(np.float32)) for i in range(n)]
+            action_layer = (f["W_action"].astype(np.float32), f["b_action"].astype(np.float32))
+            space = spaces.Box(low=f["obs_low"], high=f["obs_high"], dtype=f["obs_low"].dtype)
+            return cls(layers, [str(a) for a in f["activations"]], action_layer, space,
+                       str(f["algo"]), int(f["num_timesteps"]), seed)
+
+    def action_logits(self, obs):
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, self.layers[0][0].shape[0])
+        for (W, b), act in zip(self.layers, self.activations):
+            x = act(x @ W + b)
+        W, b = self.action_layer
+        return x @ W + b
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=False):
+        """Same call/return shape as SB3's model.predict: (actions, None); a single obs gives one action."""
+        obs = np.asarray(obs)
+        logits = self.action_logits(obs)
+        if not deterministic:
+            # Gumbel-max: argmax(logits + Gumbel noise) samples from softmax(logits)
+            logits = logits - np.log(-np.log(self._rng.random(logits.shape)))
+        actions = logits.argmax(axis=1)
+        if obs.shape == self.observation_space.shape:
+            actions = actions[0]
+        return actions, None
+
+# -------------------- Exporter --------------------
+def export(model_path: str, out_path: str | None = None, fp16: bool = False) -> str:
+    """Write the actor weights of a PPO/A2C MlpPolicy zip to an .npz (next to it by default)."""
+    import torch
+    from gymnasium import spaces
+    from eval import infer_algo_from_path
+    from stable_baselines3 import PPO, A2C
+
+    algo = infer_algo_from_path(model_path)
+    model = {"ppo": PPO, "a2c": A2C}[algo].load(model_path, device="cpu")
+    space = model.observation_space
+    if not isinstance(space, spaces.Box) or len(space.shape) != 1:
+        raise ValueError(f"only MlpPolicy models on vector observations can be exported, got {space}")
+
+    dtype = np.float16 if fp16 else np.float32
+    arrays, activations = {}, []
+    linear = [m for m in model.policy.mlp_extractor.policy_net if isinstance(m, torch.nn.Linear)]
+    for m in model.policy.mlp_extractor.policy_net:
+        if not isinstance(m, torch.nn.Linear):
+            name = type(m).__name__
+            if name not in ACTIVATIONS:
+                raise ValueError(f"unsupported activation {name}")
+            activations.append(name)
+    for i, m in enumerate(linear):
+        arrays[f"W{i}"] = m.weight.detach().numpy().T.astype(dtype)
+        arrays[f"b{i}"] = m.bias.detach().numpy().astype(dtype)
+    head = model.policy.action_net
+    arrays["W_action"] = head.weight.detach().numpy().T.astype(dtype)
+    arrays["b_action"] = head.bias.detach().numpy().astype(dtype)
+
+    out_path = out_path or os.path.splitext(model_path)[0] + ".npz"
+    np.savez(out_path, n_layers=len(linear), activations=np.array(activations), algo=algo,
+             num_timesteps=model.num_timesteps, obs_low=space.low, obs_high=space.high, **arrays)
+    print(f"[export] {model_path} -> {out_path} ({os.path.getsize(out_path) / 1024:.0f} KB)")
+    return out_path
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("model_paths", nargs="+", help="PPO/A2C .zip files to export")
+    ap.add_argument("--out", type=str, default=None, help="Output path (single model only)")
+    ap.add_argument("--fp16", action="store_true", help="Store weights as float16 (half the file size)")
+    args = ap.parse_args()
+    if args.out and len(args.model_paths) > 1:
+        ap.error("--out only works with a single model")
+
+    for p in args.model_paths:
+        export(p, args.out, args.fp16)
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,8 @@ All output PNGs are saved under the 'notebooks/' folder.
 import argparse
 import os
 from pathlib import Path
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+# pandas / matplotlib (~1 s to import) are loaded inside the functions that need them, so --help is instant
 
 # ---------- Utility ----------
 def ensure_notebooks_dir():
@@ -22,7 +21,8 @@ def smooth(y, weight=0.9):
         s.append(last)
     return np.array(s)
 
-def _read_sb3_monitor(path: str) -> pd.DataFrame:
+def _read_sb3_monitor(path: str):
+    import pandas as pd
     try:
         df = pd.read_csv(path, comment="#")
     except Exception:
@@ -35,6 +35,7 @@ def _read_sb3_monitor(path: str) -> pd.DataFrame:
     return df
 
 def load_monitor_csv(path):
+    import pandas as pd
     df = _read_sb3_monitor(path)
     if df.empty:
         raise ValueError(f"{path} has no episode rows yet.")
@@ -55,6 +56,7 @@ def load_monitor_csv(path):
     return df
 
 def plot_learning_curves(monitor_paths, labels, out_dir):
+    import matplotlib.pyplot as plt
     out_path = out_dir / "learning_curves.png"
     plt.figure(figsize=(9, 5))
     for path, lab in zip(monitor_paths, labels):
@@ -72,12 +74,14 @@ def plot_learning_curves(monitor_paths, labels, out_dir):
     plt.close()
 
 def load_eval_csv(path):
+    import pandas as pd
     df = pd.read_csv(path)
     rename_map = {"return": "return_", "best_height(+)": "best_height"}
     df.rename(columns=rename_map, inplace=True)
     return df
 
 def plot_eval_distributions(eval_paths, labels, out_dir):
+    import matplotlib.pyplot as plt
     # Return histogram
     ret_path = out_dir / "eval_returns.png"
     plt.figure(figsize=(9, 5))
@@ -0,0 +1,199 @@
+"""
+Behavior-cloning pretraining for train.py --init-from.
+Teacher episodes come from trajectory stores (envs/doodle_jump_trajectories.py): existing ones (--traj, e.g.
+recorded with eval.py --record_traj) and/or ones played here by --teacher (the scripted bench_env.climber or
+checkpoint paths), --episodes each, recorded under --record_dir and reused on the next run. The script builds
+the model train.py would and fits it in large CPU batches:
+- the actor to the teacher's actions (cross-entropy; --label_smoothing keeps some entropy for PPO to explore),
+- the critic to each episode's discounted return-to-go (the algo's gamma), so the first PPO/A2C updates do
+  not compute advantages against a random value function and undo the cloned actor.
+Only complete episodes are used, and those returning less than --min_return are dropped. The output is an
+ordinary SB3 zip: eval.py can score it, and train.py --init-from starts RL from it.
+
+    python src/pretrain_bc.py --algo ppo --teacher climber models/ppo_survivor_algo_comp_s21_final.zip --episodes 200
+    python src/train.py --algo ppo --init-from models/ppo_survivor_bc.zip --tag bc
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add the root directory to Python path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from envs.doodle_jump_env import load_personas
+from eval import iter_episodes, load_model, run_episodes
+from train import build_model, make_vec_env
+
+TEACHER_SEED = 10_000  # teacher episodes never reuse eval.py's seed bank (EVAL_SEED + i)
+
+# -------------------- Teacher episodes --------------------
+class ClimberPolicy:
+    """bench_env.climber behind the model.predict interface eval.iter_episodes expects."""
+    num_timesteps = 0
+
+    def __init__(self):
+        from envs.doodle_jump_env import DoodleJumpEnv
+        env = DoodleJumpEnv()
+        self.observation_space = env.observation_space
+        env.close()
+
+    def predict(self, obs, deterministic=True):
+        from bench_env import climber
+        return np.array([climber(o) for o in obs]), None
+
+def record_teacher(teacher: str, root: str, persona: str, episodes: int, n_envs: int, seed: int) -> str:
+    """Play `episodes` teacher episodes into the store `root`; an existing store is reused as is."""
+    from envs.doodle_jump_trajectories import TrajectoryWriter
+
+    if os.path.exists(os.path.join(root, "index.json")):
+        print(f"[bc] reusing {root}")
+        return root
+    model = ClimberPolicy() if teacher == "climber" else load_model(teacher)
+    space = model.observation_space
+    t0 = time.perf_counter()
+    with TrajectoryWriter(root, space.shape, space.dtype,
+                          meta=dict(source="teacher", teacher=teacher, persona=persona, seed=seed)) as traj:
+        returns = [res["return_"] for _, res in iter_episodes(model, range(episodes), persona, n_envs,
+                                                              base_seed=seed, traj=traj)]
+    print(f"[bc] {teacher}: {episodes} episodes, mean return {np.mean(returns):.1f}, {traj.rows} steps "
+          f"({time.perf_counter() - t0:.1f} s) -> {root}")
+    return root
+
+# -------------------- Dataset --------------------
+def returns_to_go(rewards, starts, lengths, gamma: float):
+    """Discounted return-to-go of every row; episode e is rewards[starts[e]:starts[e] + lengths[e]]."""
+    ep = np.repeat(np.arange(len(starts)), lengths)
+    pos = np.arange(len(rewards)) - np.repeat(starts, lengths)
+    g = np.zeros((len(starts), int(lengths.max()) + 1), dtype=np.float64)
+    g[ep, pos] = rewards
+    for t in range(g.shape[1] - 2, -1, -1):  # all episodes at once, one column per step
+        g[:, t] += gamma * g[:, t + 1]
+    return g[ep, pos].astype(np.float32)
+
+def load_dataset(roots, gamma: float, min_return: float | None = None):
+    """(obs, actions, returns-to-go) from the complete episodes in the stores `roots`."""
+    from envs.doodle_jump_trajectories import TrajectoryStore
+
+    fields = ["obs", "action", "reward", "terminated", "truncated", "episode"]
+    obs, actions, rtg = [], [], []
+    for root in roots:
+        store = TrajectoryStore(root)
+        batches = list(store.iter_batches(1 << 20, fields))
+        if not batches:
+            continue
+        cols = {k: np.concatenate([b[k] for b in batches]) for k in fields}
+        # rows of one episode are in time order but interleaved with other envs: group them
+        order = np.argsort(cols["episode"], kind="stable")
+        ep = cols["episode"][order]
+        starts = np.flatnonzero(np.r_[True, ep[1:] != ep[:-1]])
+        lengths = np.diff(np.r_[starts, len(ep)])
+        ends = (cols["terminated"] | cols["truncated"])[order]
+        merged = np.add.reduceat(ends.astype(np.int64), starts) > 1
+        if merged.any():  # one id per episode: stores from before eval.py used traj.new_episodes() break this
+            raise ValueError(f"{root}: episode ids {ep[starts[merged]][:5].tolist()} hold more than one episode; "
+                             f"re-record the store")
+        complete = ends[starts + lengths - 1]  # a recording can stop mid-episode
+        if min_return is not None:
+            complete &= np.add.reduceat(cols["reward"][order], starts) >= min_return
+        keep = np.repeat(complete, lengths)
+        order = order[keep]
+        starts = np.r_[0, np.cumsum(lengths[complete])[:-1]]
+        rtg.append(returns_to_go(cols["reward"][order], starts, lengths[complete], gamma))
+        obs.append(cols["obs"][order])
+        actions.append(cols["action"][order])
+        print(f"[bc] {root}: {int(complete.sum())}/{len(lengths)} episodes, {len(order)} steps used")
+    if not obs:
+        raise SystemExit("[bc] no complete episodes to learn from")
+    return np.concatenate(obs), np.concatenate(actions).astype(np.int64), np.concatenate(rtg)
+
+# -------------------- Training --------------------
+def pretrain(model, obs, actions, returns, epochs: int = 10, batch_size: int = 4096, lr: float = 1e-3,
+             label_smoothing: float = 0.05, vf_coef: float = 0.5, seed: int = 0):
+    """Fit model.policy's actor to `actions` and critic to `returns` (its own Adam; model.policy.optimizer is untouched)."""
+    import torch
+    import torch.nn.functional as F
+
+    policy = model.policy
+    policy.set_training_mode(True)
+    opt = torch.optim.Adam(policy.parameters(), lr=lr)
+    obs_t = torch.as_tensor(obs, device=policy.device)
+    act_t = torch.as_tensor(actions, device=policy.device)
+    ret_t = torch.as_tensor(returns, device=policy.device)
+    rng = np.random.default_rng(seed)
+    n = len(obs)
+    for epoch in range(epochs):
+        t0 = time.perf_counter()
+        perm = torch.as_tensor(rng.permutation(n), device=policy.device)
+        sums = np.zeros(3)
+        for lo in range(0, n, batch_size):
+            idx = perm[lo:lo + batch_size]
+            logits = policy.get_distribution(obs_t[idx]).distribution.logits
+            values = policy.predict_values(obs_t[idx]).flatten()
+            pi_loss = F.cross_entropy(logits, act_t[idx], label_smoothing=label_smoothing)
+            vf_loss = F.mse_loss(values, ret_t[idx])
+            opt.zero_grad()
+            (pi_loss + vf_coef * vf_loss).backward()
+            opt.step()
+            k = len(idx)
+            sums += [pi_loss.item() * k, vf_loss.item() * k, (logits.argmax(1) == act_t[idx]).sum().item()]
+        print(f"[bc] epoch {epoch + 1}/{epochs}: pi_loss {sums[0] / n:.4f} | vf_loss {sums[1] / n:.3f} | "
+              f"action accuracy {100 * sums[2] / n:.1f}% ({time.perf_counter() - t0:.1f} s)")
+    policy.set_training_mode(False)
+    return model
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--algo", choices=["ppo", "a2c"], default="ppo", help="Model train.py --init-from will train")
+    ap.add_argument("--persona", choices=list(load_personas()), default="survivor",
+                    help="A persona defined in configs/personas.yaml")
+    ap.add_argument("--traj", nargs="*", default=[], help="Existing trajectory stores to learn from")
+    ap.add_argument("--teacher", nargs="*", default=[], help="'climber' and/or checkpoints to record episodes from")
+    ap.add_argument("--episodes", type=int, default=200, help="Episodes recorded per --teacher")
+    ap.add_argument("--record_dir", type=str, default="logs/bc", help="Where --teacher episodes are recorded")
+    ap.add_argument("--n_envs", type=int, default=8, help="Teacher episodes played concurrently")
+    ap.add_argument("--seed", type=int, default=TEACHER_SEED, help="Teacher episode i is seeded seed + i")
+    ap.add_argument("--min_return", type=float, default=None, help="Drop episodes returning less than this")
+    ap.add_argument("--epochs", type=int, default=10)
+    ap.add_argument("--batch_size", type=int, default=4096)
+    ap.add_argument("--lr", type=float, default=1e-3)
+    ap.add_argument("--label_smoothing", type=float, default=0.05)
+    ap.add_argument("--eval_episodes", type=int, default=16, help="Score the cloned policy with eval.py's seed bank")
+    ap.add_argument("--out", type=str, default=None, help="Output .zip (default: models/<algo>_<persona>_bc.zip)")
+    args = ap.parse_args()
+    if not args.traj and not args.teacher:
+        ap.error("give --traj stores and/or --teacher sources")
+
+    import torch
+    torch.set_num_threads(os.cpu_count() or 1)
+
+    roots = list(args.traj)
+    for teacher in args.teacher:
+        name = os.path.splitext(os.path.basename(teacher))[0]
+        root = os.path.join(args.record_dir, f"{name}_{args.persona}_s{args.seed}_n{args.episodes}")
+        roots.append(record_teacher(teacher, root, args.persona, args.episodes, args.n_envs, args.seed))
+
+    env = make_vec_env(1, "dummy", args.seed, args.persona)
+    model = build_model(args.algo, env, args.seed, verbose=0)
+    obs, actions, returns = load_dataset(roots, model.gamma, args.min_return)
+    counts = np.bincount(actions, minlength=4)
+    print(f"[bc] {len(obs)} steps; actions {' '.join(f'{100 * c / len(obs):.0f}%' for c in counts)}; "
+          f"return-to-go {returns.mean():.1f} ± {returns.std():.1f}")
+    pretrain(model, obs, actions, returns, args.epochs, args.batch_size, args.lr, args.label_smoothing,
+             seed=args.seed)
+
+    out = args.out or os.path.join("models", f"{args.algo}_{args.persona}_bc.zip")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    model.save(out)
+    env.close()
+    print(f"[bc] saved -> {out}; train from it with: python src/train.py --algo {args.algo} --init-from {out}")
+    if args.eval_episodes:
+        results = run_episodes(model, args.eval_episodes, args.persona)
+        print(f"[bc] cloned policy over {args.eval_episodes} eval episodes: "
+              f"return {np.mean([r['return_'] for r in results]):.1f}, "
+              f"crash {100 * np.mean([r['death'] for r in results]):.0f}%")
+
+if __name__ == "__main__":
+    main()
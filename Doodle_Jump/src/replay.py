@@ -0,0 +1,78 @@
+"""
+Replay episodes recorded by eval.py / eval_sweep.py --save_episodes, headless and without any policy.
+Every replay is checked against the recorded outcome (steps, return, death, height). Optionally it dumps the
+per-step state snapshots (STATE_DTYPE, see envs/doodle_jump_state.py) or writes selected frames as PNGs.
+--rescore prints each episode's return under other personas' reward weights, from the same simulation.
+
+    python src/replay.py logs/crashes.npz
+    python src/replay.py logs/crashes.npz --episodes 3 --frames -60 -30 -1 --frames_dir notebooks/replay
+    python src/replay.py logs/crashes.npz --rescore survivor
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add the root directory to Python path
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from envs.doodle_jump_env import load_personas, rescore
+from envs.doodle_jump_replay import load_episodes, matches, replay
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", help=".npz written by --save_episodes")
+    ap.add_argument("--episodes", type=int, nargs="*", default=None, help="Indices to replay (default: all)")
+    ap.add_argument("--dump_states", type=str, default=None,
+                    help="Write each replayed episode's per-step snapshots to this .npz (key ep<i>)")
+    ap.add_argument("--frames", type=int, nargs="*", default=[],
+                    help="Steps to render (state after t actions; negative counts from the end, -1 = last)")
+    ap.add_argument("--frames_dir", type=str, default="notebooks/replay")
+    ap.add_argument("--render_scale", type=int, default=1)
+    ap.add_argument("--rescore", nargs="+", default=None, choices=list(load_personas()),
+                    help="Also print each episode's return under these personas' reward weights")
+    ap.add_argument("--quiet", action="store_true", help="Only print the summary and mismatches")
+    args = ap.parse_args()
+
+    records = load_episodes(args.path)
+    indices = args.episodes if args.episodes is not None else range(len(records))
+    if args.frames:
+        import matplotlib.image as mpimg
+        os.makedirs(args.frames_dir, exist_ok=True)
+
+    dumps, mismatches, total_steps = {}, 0, 0
+    t0 = time.perf_counter()
+    for i in indices:
+        rec = records[i]
+        res = replay(rec, states=args.dump_states is not None, frames=args.frames, render_scale=args.render_scale,
+                     components=args.rescore is not None)
+        total_steps += res["steps"]
+        ok = matches(rec, res)
+        mismatches += not ok
+        if not ok or not args.quiet:
+            start = f"seed={rec.seed}" if rec.start_state is None else "snapshot"
+            print(f"[replay] #{i} {rec.tag or '-'} {rec.persona} {start} steps={res['steps']} "
+                  f"return={res['return_']:.2f} max_height={res['max_height']:.1f} death={res['death']} "
+                  f"{'ok' if ok else f'MISMATCH (recorded return={rec.return_:.2f} death={rec.death})'}")
+        if args.rescore:
+            returns = rescore(res["components"].sum(0), args.rescore)
+            print(f"[replay] #{i} rescored: " + " ".join(f"{p}={r:.2f}" for p, r in zip(args.rescore, returns)))
+        if args.dump_states:
+            dumps[f"ep{i}"] = res["states"]
+        for t, frame in res.get("frames", {}).items():
+            mpimg.imsave(os.path.join(args.frames_dir, f"ep{i}_t{t:05d}.png"), frame)
+    elapsed = time.perf_counter() - t0
+
+    if args.dump_states:
+        np.savez_compressed(args.dump_states, **dumps)
+        print(f"[replay] wrote per-step states -> {args.dump_states}")
+    if args.frames:
+        print(f"[replay] wrote frames -> {args.frames_dir}")
+    print(f"[replay] {len(indices)} episode(s), {total_steps} steps in {elapsed:.2f} s "
+          f"({total_steps / max(elapsed, 1e-9):.0f} steps/s), {mismatches} mismatch(es)")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
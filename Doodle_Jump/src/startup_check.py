@@ -0,0 +1,104 @@
+"""
+Cold-start budget check for the command-line entry points.
+Each target runs in a fresh interpreter under `python -X importtime`. The total import cost is compared
+against its budget, and no heavy module (torch, SB3, matplotlib, pandas, pygame, yaml) may be imported just to
+print --help or import the env. The slowest imports are always reported, so a regression names its culprit.
+Exits 1 when any target is over budget or imports a forbidden module.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+
+HEAVY = ("torch", "stable_baselines3", "matplotlib", "pandas", "pygame", "yaml", "tensorboard")
+
+# (name, argv, budget in ms of total import time); argv runs with cwd = repo root.
+# Measured on a dev box: ~100-130 ms for each --help (mostly numpy), ~200 ms for the env.
+TARGETS = [
+    ("train.py --help", ["src/train.py", "--help"], 250),
+    ("eval.py --help", ["src/eval.py", "--help"], 250),
+    ("eval_sweep.py --help", ["src/eval_sweep.py", "--help"], 250),
+    ("visualize.py --help", ["src/visualize.py", "--help"], 250),
+    ("plot_result.py --help", ["src/plot_result.py", "--help"], 250),
+    ("np_policy.py --help", ["src/np_policy.py", "--help"], 250),
+    # the env itself: numpy + gymnasium are unavoidable, yaml is not once the persona cache is warm
+    ("import envs.doodle_jump_env", ["-c", "import envs.doodle_jump_env as e; e.persona_config('survivor')"], 500),
+]
+
+def parse_importtime(stderr: str):
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cum_us), depth))
+    return rows
+
+def _first_party(module: str) -> bool:
+    top = module.split(".")[0]
+    return top == "envs" or os.path.exists(os.path.join(SRC_DIR, top + ".py"))
+
+def slowest_imports(rows, top: int):
+    """
+    Costliest third-party/stdlib imports by cumulative time: top-level imports, looking through our own
+    modules (envs.*, src/*.py) at what they import instead of listing them as a whole.
+    """
+    # importtime prints children before their parent: walking backwards, the parent is on the stack
+    picked, stack = [], []  # stack: (depth, reached only through first-party modules)
+    for module, self_us, cum_us, depth in reversed(rows):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        exposed = not stack or stack[-1][1]
+        if exposed and not _first_party(module):
+            picked.append((module, self_us, cum_us))
+        stack.append((depth, exposed and _first_party(module)))
+    return sorted(picked, key=lambda r: -r[2])[:top]
+
+def measure(argv, repeat: int):
+    """Best-of-`repeat` import profile (lowest total) for one target."""
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=ROOT_DIR, env=env,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} exited with {proc.returncode}:\n{proc.stderr[-2000:]}")
+        rows = parse_importtime(proc.stderr)
+        total = sum(cum for _, _, cum, depth in rows if depth == 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+def check(targets, repeat: int = 3, top: int = 5, scale: float = 1.0) -> bool:
+    ok = True
+    for name, argv, budget_ms in targets:
+        total_us, rows = measure(argv, repeat)
+        budget_ms *= scale
+        heavy = sorted({m for m, *_ in rows if m.split(".")[0] in HEAVY and "." not in m})
+        over = total_us / 1000 > budget_ms
+        status = "FAIL" if over or heavy else "ok"
+        ok &= status == "ok"
+        print(f"[startup] {status:4s} {name:<30s} {total_us / 1000:7.1f} ms  (budget {budget_ms:.0f} ms)")
+        if heavy:
+            print(f"           heavy imports: {', '.join(heavy)}")
+        for module, self_us, cum_us in slowest_imports(rows, top):
+            print(f"           {cum_us / 1000:7.1f} ms  {module}  (self {self_us / 1000:.1f} ms)")
+    return ok
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target; the fastest counts")
+    ap.add_argument("--top", type=int, default=5, help="Slowest top-level imports to list per target")
+    ap.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow CI machines)")
+    args = ap.parse_args()
+
+    ok = check(TARGETS, args.repeat, args.top, args.scale)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
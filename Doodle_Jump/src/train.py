@@ -1,50 +1,97 @@
 import os
 import sys
 import argparse
-import torch
-from stable_baselines3 import PPO, A2C
-from stable_baselines3.common.vec_env import DummyVecEnv, VecMonitor
-from stable_baselines3.common.callbacks import EvalCallback, CheckpointCallback
-from stable_baselines3.common.logger import configure
+import time
+import numpy as np
 
 # Add the root directory to Python path
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
-from envs.doodle_jump_env import DoodleJumpEnv
-
-ALGOS = {"ppo": PPO, "a2c": A2C}
+# torch / stable-baselines3 / the envs are imported where they are used, so --help stays instant
+ALGOS = ("ppo", "a2c")
+VEC_TYPES = ["dummy", "subproc", "shm", "batched"]
+# below this many games a step of DoodleJumpVecEnv costs more than DummyVecEnv stepping DoodleJumpEnvs
+# (dev box: ~1.6k vs ~10k steps/s at 1 env, even around 8-16, ~64k steps/s at 64)
+BATCHED_MIN_ENVS = 16
 
 LOG_DIR = "logs"
 MODEL_DIR = "models"
-os.makedirs(LOG_DIR, exist_ok=True)
-os.makedirs(MODEL_DIR, exist_ok=True)
 
-def make_env(render_mode=None, seed=0, persona="survivor"):
+def make_env(render_mode=None, seed=0, persona="survivor", obs_type="vector", profile=False):
     def _thunk():
-        env = DoodleJumpEnv(render_mode=render_mode, seed=seed, reward_preset=persona)
+        from envs.doodle_jump_env import DoodleJumpEnv
+        env = DoodleJumpEnv(render_mode=render_mode, seed=seed, reward_preset=persona, obs_type=obs_type,
+                            profile=profile)
         return env
     return _thunk
 
-def train_one(algo_name: str, total_timesteps: int, seed: int, persona: str, tag: str):
-    Model = ALGOS[algo_name]
-
-    run_name = f"{algo_name}_{persona}{('_' + tag) if tag else ''}"
-    monitor_csv = os.path.join(LOG_DIR, f"{run_name}_monitor.csv")
-
-    env = DummyVecEnv([make_env(None, seed, persona)])
-    env = VecMonitor(env, filename=monitor_csv)
-
-    eval_env = DummyVecEnv([make_env(None, seed + 1, persona)])
-    eval_env = VecMonitor(eval_env)
-
-    logger = configure(os.path.join(LOG_DIR, run_name), ["stdout", "csv", "tensorboard"])
-
-    model = Model(
-        "MlpPolicy",
+def worker_seed(seed: int, rank: int) -> int:
+    # worker 0 keeps the run seed (so --n-envs 1 reproduces older runs); eval uses seed + 1
+    return seed + 1000 * rank
+
+def make_vec_env(n_envs: int, vec: str, seed: int, persona: str, obs_type: str = "vector", profile: bool = False):
+    if vec == "batched":
+        from envs.doodle_jump_vec_env import DoodleJumpVecEnv
+        return DoodleJumpVecEnv(n_envs, seed=seed, reward_preset=persona)
+    fns = [make_env(None, worker_seed(seed, i), persona, obs_type, profile) for i in range(n_envs)]
+    if vec == "shm":
+        from envs.doodle_jump_shm_vec_env import DoodleJumpShmVecEnv
+        return DoodleJumpShmVecEnv(fns)
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+    return SubprocVecEnv(fns) if vec == "subproc" else DummyVecEnv(fns)
+
+def auto_n_envs(vec: str, seed: int, persona: str, obs_type: str = "vector", seconds: float = 2.0) -> int:
+    """Step each candidate worker count with random actions for `seconds`; return the fastest."""
+    cpus = os.cpu_count() or 1
+    limit = 256 if vec == "batched" else 2 * cpus
+    candidates = sorted({n for n in (1, 2, 4, 8, 16, 32, 64, 128, 256, cpus) if n <= limit})
+    rng = np.random.default_rng(seed)
+    best_n, best_rate = 1, 0.0
+    for n in candidates:
+        env = make_vec_env(n, vec, seed, persona, obs_type)
+        env.reset()
+        for _ in range(10):  # warm up workers before timing
+            env.step(rng.integers(0, 4, size=n))
+        steps, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            env.step(rng.integers(0, 4, size=n))
+            steps += n
+        rate = steps / (time.perf_counter() - t0)
+        env.close()
+        print(f"[auto] vec={vec} n_envs={n:<4d} {rate:10.0f} env steps/s")
+        if rate > best_rate:
+            best_n, best_rate = n, rate
+    print(f"[auto] using n_envs={best_n}")
+    return best_n
+
+def profile_callback():
+    """SB3 callback logging the env profile merged over all training envs (profile/* keys) once per rollout."""
+    from stable_baselines3.common.callbacks import BaseCallback
+    from envs.doodle_jump_profile import summarize_profile, vec_profile
+
+    class ProfileCallback(BaseCallback):
+        def _on_step(self):
+            return True
+
+        def _on_rollout_end(self):
+            # reset=True: each logged point covers the rollout just collected
+            for key, value in summarize_profile(vec_profile(self.training_env)).items():
+                self.logger.record(key, value)
+
+    return ProfileCallback()
+
+def build_model(algo_name: str, env, seed: int, obs_type: str = "vector", tensorboard_log=None, verbose: int = 1):
+    """The PPO/A2C model train.py trains (also what pretrain_bc.py fits, so --init-from weights line up)."""
+    import torch
+    from stable_baselines3 import PPO, A2C
+
+    Model = {"ppo": PPO, "a2c": A2C}[algo_name]
+    return Model(
+        "CnnPolicy" if obs_type == "pixels" else "MlpPolicy",
         env,
-        verbose=1,
-        tensorboard_log=os.path.join(LOG_DIR, "tb"),
+        verbose=verbose,
+        tensorboard_log=tensorboard_log,
         device="cuda" if torch.cuda.is_available() else "cpu",
         learning_rate=2.5e-4,
         ent_coef=0.10,          
@@ -59,50 +106,145 @@ def train_one(algo_name: str, total_timesteps: int, seed: int, persona: str, tag
             ortho_init=True,
         ),
     )
-    model.set_logger(logger)
 
-    eval_cb = EvalCallback(
-        eval_env,
-        best_model_save_path=MODEL_DIR,
-        log_path=LOG_DIR,
-        eval_freq=25_000,
-        deterministic=True,
-        render=False,
-        n_eval_episodes=10,
-    )
-    ckpt_cb = CheckpointCallback(
-        save_freq=100_000,
-        save_path=MODEL_DIR,
-        name_prefix=f"{run_name}",
-        save_replay_buffer=False,
-        save_vecnormalize=False,
-    )
+def train_one(algo_name: str, total_timesteps: int, seed: int, persona: str, tag: str,
+              n_envs: int = 1, vec: str = "dummy", obs_type: str = "vector", profile: bool = False,
+              async_eval: bool = False, ckpt: dict | None = None, record_traj: str | None = None,
+              init_from: str | None = None):
+    from stable_baselines3.common.vec_env import DummyVecEnv, VecMonitor
+    from stable_baselines3.common.callbacks import EvalCallback, CheckpointCallback
+    from stable_baselines3.common.logger import configure
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(MODEL_DIR, exist_ok=True)
 
-    print(f"[train] run={run_name} timesteps={total_timesteps} seed={seed}")
-    model.learn(total_timesteps=total_timesteps, callback=[eval_cb, ckpt_cb])
+    run_name = f"{algo_name}_{persona}{('_' + tag) if tag else ''}"
+    monitor_csv = os.path.join(LOG_DIR, f"{run_name}_monitor.csv")
+
+    # one VecMonitor over all workers -> a single monitor CSV, as plot_result.py expects
+    env = make_vec_env(n_envs, vec, seed, persona, obs_type, profile)
+    if record_traj:
+        from envs.doodle_jump_trajectories import trajectory_recorder
+        env = trajectory_recorder(env, os.path.join(record_traj, run_name),
+                                  meta=dict(source="train", run=run_name, persona=persona, seed=seed))
+    env = VecMonitor(env, filename=monitor_csv)
+
+    eval_env = None
+    if not async_eval:
+        eval_env = DummyVecEnv([make_env(None, seed + 1, persona, obs_type)])
+        eval_env = VecMonitor(eval_env)
+
+    logger = configure(os.path.join(LOG_DIR, run_name), ["stdout", "csv", "tensorboard"])
+
+    model = build_model(algo_name, env, seed, obs_type, tensorboard_log=os.path.join(LOG_DIR, "tb"))
+    if init_from:
+        # policy weights only: the optimizer and the timestep counter start fresh
+        from eval import load_model
+        model.policy.load_state_dict(load_model(init_from).policy.state_dict())
+        print(f"[train] initialized the policy from {init_from}")
+    model.set_logger(logger)
+
+    eval_freq = max(25_000 // n_envs, 1)  # counted in vec steps (n_envs env steps each)
+    if async_eval:
+        from async_eval import async_eval_callback
+        eval_cb = async_eval_callback(persona, n_episodes=10, eval_freq=eval_freq, seed=seed + 1, log_dir=LOG_DIR,
+                                      model_dir=MODEL_DIR, snapshot_dir=os.path.join(LOG_DIR, f"{run_name}_snapshots"))
+    else:
+        eval_cb = EvalCallback(
+            eval_env,
+            best_model_save_path=MODEL_DIR,
+            log_path=LOG_DIR,
+            eval_freq=eval_freq,
+            deterministic=True,
+            render=False,
+            n_eval_episodes=10,
+        )
+    if ckpt is not None:
+        from checkpoints import checkpoint_callback
+        ckpt_cb = checkpoint_callback(max(100_000 // n_envs, 1), MODEL_DIR, run_name, **ckpt)
+    else:
+        ckpt_cb = CheckpointCallback(
+            save_freq=max(100_000 // n_envs, 1),
+            save_path=MODEL_DIR,
+            name_prefix=f"{run_name}",
+            save_replay_buffer=False,
+            save_vecnormalize=False,
+        )
+
+    print(f"[train] run={run_name} timesteps={total_timesteps} seed={seed} n_envs={n_envs} vec={vec}")
+    callbacks = [eval_cb, ckpt_cb] + ([profile_callback()] if profile else [])
+    model.learn(total_timesteps=total_timesteps, callback=callbacks)
     final_path = os.path.join(MODEL_DIR, f"{run_name}_final")
     model.save(final_path)
     print(f"[train] saved -> {final_path}.zip")
 
     env.close()
-    eval_env.close()
+    if eval_env is not None:
+        eval_env.close()
 
 def main():
     p = argparse.ArgumentParser()
     g = p.add_mutually_exclusive_group(required=True)
-    g.add_argument("--algo", choices=ALGOS.keys(), help="Train a single algorithm.")
+    g.add_argument("--algo", choices=ALGOS, help="Train a single algorithm.")
     g.add_argument("--both", action="store_true", help="Train PPO and A2C sequentially.")
     p.add_argument("--persona", choices=["survivor", "greedy", "hunter"], default="survivor")
     p.add_argument("--seed", type=int, default=123, help="Training seed")
     p.add_argument("--steps", type=int, default=3_000_000, help="Total timesteps per run")
     p.add_argument("--tag", type=str, default="", help="Optional label for this run")
+    p.add_argument("--n-envs", type=int, default=1, help="Parallel training envs (each with its own seed)")
+    p.add_argument("--vec", choices=VEC_TYPES, default=None,
+                   help="dummy = in-process, subproc = one process per env, shm = shared-memory workers, "
+                        f"batched = NumPy DoodleJumpVecEnv, slower than dummy below ~{BATCHED_MIN_ENVS} envs "
+                        "(default: subproc when n_envs > 1 or --auto, else dummy)")
+    p.add_argument("--auto", action="store_true", help="Benchmark worker counts briefly and use the fastest")
+    p.add_argument("--obs", choices=["vector", "pixels"], default="vector",
+                   help="13-D feature vector (MlpPolicy) or stacked grayscale frames (CnnPolicy)")
+    p.add_argument("--profile", action="store_true",
+                   help="Log per-phase env step() timings and counters (profile/*) to TensorBoard each rollout")
+    p.add_argument("--async-eval", action="store_true",
+                   help="Evaluate policy snapshots in a separate process instead of pausing training (EvalCallback)")
+    p.add_argument("--ckpt-async", action="store_true",
+                   help="Write checkpoints as .ckpt.npz on a background thread, with retention (see checkpoints.py)")
+    p.add_argument("--ckpt-keep-last", type=int, default=3, help="--ckpt-async: keep the newest N checkpoints")
+    p.add_argument("--ckpt-keep-every", type=int, default=0, help="--ckpt-async: also keep every Kth (0 = off)")
+    p.add_argument("--ckpt-keep-best", action="store_true",
+                   help="--ckpt-async: also keep the one with the best mean training episode return")
+    p.add_argument("--ckpt-delta", action="store_true",
+                   help="--ckpt-async: store policy weights XORed with the previous checkpoint's")
+    p.add_argument("--ckpt-keyframe-every", type=int, default=10, help="--ckpt-delta: full checkpoint every N")
+    p.add_argument("--ckpt-weights-only", action="store_true",
+                   help="--ckpt-async: drop the Adam moments (~3x smaller; resuming restarts the optimizer state)")
+    p.add_argument("--record-traj", type=str, default=None,
+                   help="Append every training step to the trajectory store DIR/<run> "
+                        "(see envs/doodle_jump_trajectories.py)")
+    p.add_argument("--init-from", type=str, default=None,
+                   help="Start from this SB3 model's policy weights (.zip, e.g. a src/pretrain_bc.py output, or "
+                        ".ckpt.npz) instead of random")
     args = p.parse_args()
-
-    if args.both:
-        for a in ["ppo", "a2c"]:
-            train_one(a, total_timesteps=args.steps, seed=args.seed, persona=args.persona, tag=args.tag)
-    else:
-        train_one(args.algo, total_timesteps=args.steps, seed=args.seed, persona=args.persona, tag=args.tag)
+    if args.obs == "pixels" and args.vec == "batched":
+        p.error("--vec batched only provides vector observations")
+    if args.profile and args.vec == "batched":
+        p.error("--profile instruments DoodleJumpEnv.step; --vec batched does not use it")
+    if args.init_from and not args.init_from.endswith((".zip", ".ckpt.npz")):
+        p.error("--init-from takes an SB3 model (.zip or .ckpt.npz); an np_policy.py .npz holds no torch policy")
+
+    vec = args.vec or ("subproc" if args.n_envs > 1 or args.auto else "dummy")
+    n_envs = auto_n_envs(vec, args.seed, args.persona, args.obs) if args.auto else args.n_envs
+    if vec == "batched" and n_envs < BATCHED_MIN_ENVS:
+        print(f"[warn] --vec batched pays its per-step NumPy overhead once per batch: with {n_envs} env(s) it is "
+              f"slower than --vec dummy; use --n-envs {BATCHED_MIN_ENVS} or more (or --auto)")
+
+    ckpt = None
+    if args.ckpt_async:
+        ckpt = dict(keep_last=args.ckpt_keep_last, keep_every=args.ckpt_keep_every, keep_best=args.ckpt_keep_best,
+                    delta=args.ckpt_delta, keyframe_every=args.ckpt_keyframe_every,
+                    weights_only=args.ckpt_weights_only)
+
+    algos = ["ppo", "a2c"] if args.both else [args.algo]
+    for a in algos:
+        train_one(a, total_timesteps=args.steps, seed=args.seed, persona=args.persona, tag=args.tag,
+                  n_envs=n_envs, vec=vec, obs_type=args.obs, profile=args.profile, async_eval=args.async_eval,
+                  ckpt=ckpt, record_traj=args.record_traj, init_from=args.init_from)
 
 if __name__ == "__main__":
     main()
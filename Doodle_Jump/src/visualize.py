@@ -1,26 +1,17 @@
 import os
 import sys
 import argparse
-from stable_baselines3 import PPO, A2C
 
 # Add the root directory to Python path
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
-from envs.doodle_jump_env import DoodleJumpEnv
-
-ALGOS = {"ppo": PPO, "a2c": A2C}
-
-def infer_algo_from_path(path: str) -> str:
-    lower = path.lower()
-    if "a2c" in lower:
-        return "a2c"
-    return "ppo"
+from eval import ALGOS, infer_algo_from_path, load_model
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--model_path", type=str, default="models/ppo_survivor_final.zip")
-    parser.add_argument("--algo", choices=ALGOS.keys(), help="If omitted, inferred from model filename")
+    parser.add_argument("--algo", choices=ALGOS, help="If omitted, inferred from model filename")
     parser.add_argument("--persona", choices=["survivor", "greedy", "hunter"], default="survivor")
     parser.add_argument("--debug", action="store_true", help="Print first 60 steps for debugging")
     parser.add_argument("--seed", type=int, default=123, help="Seed for consistency")
@@ -30,11 +21,12 @@ def main():
     if os.environ.get("SDL_VIDEODRIVER") == "dummy":
         del os.environ["SDL_VIDEODRIVER"]
 
-    algo = args.algo or infer_algo_from_path(args.model_path)
-    Model = ALGOS[algo]
+    from envs.doodle_jump_env import DoodleJumpEnv, obs_kwargs
 
-    env = DoodleJumpEnv(render_mode="human", seed=args.seed, reward_preset=args.persona)
-    model = Model.load(args.model_path)
+    algo = args.algo or infer_algo_from_path(args.model_path)
+    model = load_model(args.model_path, algo)
+    env = DoodleJumpEnv(render_mode="human", seed=args.seed, reward_preset=args.persona,
+                        **obs_kwargs(model.observation_space))
 
     obs, info = env.reset()
     done, trunc = False, False
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from eval_stats import EvalStats, StopRule, wilson_ci
+
+
+def _stats(returns, deaths):
+    stats = EvalStats(len(returns))
+    for ep, (r, d) in enumerate(zip(returns, deaths)):
+        stats.add(ep, dict(return_=r, steps=100, best_height=0.0, platforms=0, death=d))
+    return stats
+
+
+@pytest.mark.parametrize("death", [0, 1])
+def test_crash_ci_keeps_width_when_every_episode_agrees(death):
+    # 16 identical crash outcomes: the Wilson half-width is ~0.1, well above crash_tol=0.05
+    lo, hi = _stats([0.0] * 16, [death] * 16).ci(("death",))["death"]
+    assert lo <= death <= hi
+    assert (hi - lo) / 2 == pytest.approx(0.097, abs=0.005)
+
+
+@pytest.mark.parametrize("death", [0, 1])
+def test_stop_rule_keeps_playing_noisy_returns_with_unanimous_crashes(death):
+    rng = np.random.default_rng(0)
+    stats = _stats(rng.uniform(0, 800, size=16), [death] * 16)  # return CI half-width far above 50
+    assert StopRule(return_tol=50.0, crash_tol=0.05).check(stats) == ""
+
+
+def test_crash_ci_narrows_with_more_episodes():
+    lo, hi = wilson_ci(0, 400)
+    assert lo == 0.0 and hi / 2 <= 0.05
+    assert StopRule(return_tol=1.0, crash_tol=0.05).check(_stats(np.arange(400.0), [0] * 400)) == "crash_ci"